@@ -1,13 +1,122 @@
-from fastapi import FastAPI, HTTPException
-from library import Library, Book, PydanticBook
-from message_display import UnicodeDisplay
+import asyncio
+from contextlib import asynccontextmanager, suppress
+import json
+import time
+import os
+from datetime import datetime
+from itertools import islice
+from typing import List, Optional
+from fastapi import Body, FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from library import (Library, error_status, project_event, project_hold, project_loan, to_timestamp, Book, Copy,
+                     Member, PydanticBook, PydanticMember)
+from message_display import UnicodeDisplay, configure_logging, reset_logging
+from storage import SQLiteStorage
+from events import EventLog
+from metrics import CONTENT_TYPE, REGISTRY, timing_middleware
+
+# Uygulama çalışırken gecikmiş ödünçler arka planda izlenir (iade tarihi zamanlayıcısı)
+# Kapanırken izleme durdurulur, bekleyen yazmalar tamamlanır ve HTTP istemcileri kapatılır
+# Sunucu çalışırken mesajlar stdout'a beklemeden, kuyruk üzerinden JSON satırları halinde yazılır; modül içe
+# aktarıldığında (testler, betikler) konsol modu değişmez. Seviye LOG_LEVEL ortam değişkeniyle seçilir
+# (debug, info, warning, error)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging(os.environ.get("LOG_LEVEL", "info"))
+    watcher = asyncio.create_task(library.watch_overdue())
+    yield
+    watcher.cancel()
+    with suppress(asyncio.CancelledError):
+        await watcher
+    await library.aclose()
+    reset_logging()
 
 app = FastAPI(
     title="Kütüphane API",
     description="Kütüphane Yönetim Sistemi API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
-library = Library("Kütüphane API")
+
+# Her isteğin süresi ve durum kodu rota şablonuna göre ölçülür (GET /metrics)
+app.middleware("http")(timing_middleware)
+# Anlık görüntü binary dosyada tutulur: açılışta mmap ile açılır, kitaplar ihtiyaç anında yüklenir
+# Birden fazla worker ile (uvicorn --workers N) her süreç kendi Library nesnesini tutar; veri paylaşımı için:
+#   LIBRARY_DB=library.db : tüm worker'lar aynı SQLite veritabanını pushdown modunda kullanır
+#   LIBRARY_SHARED=1      : JSON dosyaları süreçler arasında kilitlenir, değişiklikler günlükten okunur
+# JSON anlık görüntüsü ve günlüğü LIBRARY_JSON (varsayılan library.json) yanında tutulur
+# Dolaşım olayları library.events dizinine (LIBRARY_EVENTS) yazılır, EVENT_RETENTION_DAYS günden (varsayılan 365)
+# eski segmentler silinir; her worker kendi segmentlerine yazar. Dosyalar ve dizin ilk yazmada oluşturulur
+def create_library():
+    event_log = EventLog(os.environ.get("LIBRARY_EVENTS", "library.events"),
+                         retention_days=float(os.environ.get("EVENT_RETENTION_DAYS", "365")))
+    json_file = os.environ.get("LIBRARY_JSON", "library.json")
+    if os.environ.get("LIBRARY_DB"):
+        return Library("Kütüphane API", storage=SQLiteStorage(os.environ["LIBRARY_DB"], pushdown=True),
+                       event_log=event_log)
+    if os.environ.get("LIBRARY_SHARED") == "1":
+        return Library("Kütüphane API", json_file, journal=True, binary_snapshot=True, shared=True,
+                       event_log=event_log)
+    return Library("Kütüphane API", json_file, journal=True, background_writer=True, binary_snapshot=True,
+                   event_log=event_log)
+
+library = create_library()
+
+# GET /books cevabında seçilebilecek alanlar; copies (nüsha sayısı) ve available (boştaki nüsha) isteğe bağlıdır
+BOOK_FIELDS = ("title", "author", "isbn", "borrowed", "type", "copies", "available")
+DEFAULT_BOOK_FIELDS = ("title", "author", "isbn", "borrowed")
+COPY_FIELDS = {"copies", "available"}
+
+
+# Kitabı istenen alanları içeren sözlüğe dönüştürür
+# counts nüshası kaydedilmiş kitabın (nüsha sayısı, boştaki nüsha sayısı); yoksa kitap tek nüshadır
+def project_book(book, fields=DEFAULT_BOOK_FIELDS, counts=None):
+    total, free = counts or (1, 0 if book.is_borrowed else 1)
+    values = {
+        "title": book.title,
+        "author": book.author,
+        "isbn": book.isbn,
+        "borrowed": book.is_borrowed,
+        "type": type(book).__name__,
+        "copies": total,
+        "available": free
+    }
+    return {name: values[name] for name in fields}
+
+
+# Kitapları sırayla dönüştürür; nüsha alanları istendiyse sayılar her 500 kitap için tek seferde okunur
+def project_books(books, fields=DEFAULT_BOOK_FIELDS):
+    books = iter(books)
+    while chunk := list(islice(books, 500)):
+        counts = library.copy_counts([book.isbn for book in chunk]) if COPY_FIELDS.intersection(fields) else {}
+        for book in chunk:
+            yield project_book(book, fields, counts.get(book.isbn))
+
+
+# "title,isbn" gibi alan listesini doğrular
+def parse_fields(fields: str):
+    if not fields:
+        return DEFAULT_BOOK_FIELDS
+    selected = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    invalid = [name for name in selected if name not in BOOK_FIELDS]
+    if invalid or not selected:
+        raise HTTPException(400, f"Geçersiz alan: {', '.join(invalid)}. Geçerli alanlar: {', '.join(BOOK_FIELDS)}")
+    return selected
+
+# member_id verildiyse üyenin kayıtlı olduğunu kontrol eder
+def require_member(member_id: Optional[str]):
+    if member_id is not None and not library.find_member(member_id):
+        raise HTTPException(404, "Üye bulunamadı")
+
+# Başarısız kütüphane işleminin kendi hata mesajı; durum kodu error_status ile seçilir (bulunamadı 404,
+# kaydedilemedi 503, diğerleri 400)
+def library_error():
+    message = library.last_error
+    return HTTPException(error_status(message), message)
+
+# Kütüphane çağrıları bloklayıcıdır (okuma/yazma ve ISBN kilitleri, paylaşımlı modda dosya kilidi, SQLite sorguları);
+# bu yüzden işleyiciler düz def ile tanımlanır ve FastAPI tarafından thread havuzunda çalıştırılır, yavaş bir istek
+# olay döngüsünü durdurmaz. Yalnızca OpenLibrary'yi bekleyen işleyiciler async'tir.
 
 # Ana sayfa
 @app.get("/", summary="Ana Sayfa")
@@ -25,12 +134,12 @@ def add_book(book_data: PydanticBook):
 
 # ISBN ile kitap ekleme
 @app.post("/books/isbn", summary="ISBN ile Kitap Ekle")
-def add_book_by_isbn(isbn_data: dict):
+async def add_book_by_isbn(isbn_data: dict):
     isbn = isbn_data.get("isbn", "").strip()
     if not isbn:
         raise HTTPException(400, "ISBN gerekli")
     
-    success = library.add_book_by_isbn(isbn)
+    success = await library.add_book_by_isbn_async(isbn)
     if success:
         book = library.find_book_by_isbn(isbn)
         if book:
@@ -45,81 +154,280 @@ def add_book_by_isbn(isbn_data: dict):
             }
     raise HTTPException(400, "Kitap eklenemedi - ISBN OpenLibrary'de bulunamadı, lütfen manuel ekleme yapın.")
 
-# Tüm kitapları listeleme
-@app.get("/books", summary="Tüm Kitapları Listele")
-def get_books():
-    return [{"title": b.title, "author": b.author, "isbn": b.isbn, "borrowed": b.is_borrowed} 
-            for b in library._books]
+# ISBN listesi ile toplu kitap ekleme
+@app.post("/books/isbn/bulk", summary="ISBN Listesi ile Toplu Kitap Ekle")
+async def add_books_by_isbn_bulk(isbn_data: dict):
+    isbns = isbn_data.get("isbns", [])
+    if not isinstance(isbns, list) or not any(str(isbn).strip() for isbn in isbns):
+        raise HTTPException(400, "En az bir ISBN gerekli")
+
+    results = await library.add_books_by_isbn_async([str(isbn) for isbn in isbns])
+    added = sum(1 for result in results if result["success"])
+    return {"message": f"{added} kitap eklendi", "eklenen": added, "sonuçlar": results}
+
+# Toplu işlemler ya hep ya hiç çalışır: bir öğe bile geçersizse hiçbir değişiklik yapılmaz ve 400 döner
+# Cevap her ISBN için sonucu içerir. Bu yollar /books/{isbn} yollarından önce tanımlanmalıdır.
+def batch_response(results: list, message: str):
+    if not results:
+        raise HTTPException(400, "En az bir kitap gerekli")
+    if not all(result["success"] for result in results):
+        raise HTTPException(400, {"message": "Toplu işlem uygulanmadı", "sonuçlar": results})
+    return {"message": message.format(count=len(results)), "sonuçlar": results}
+
+# Birden fazla kitabı tek işlemde ekleme
+@app.post("/books/batch", summary="Toplu Kitap Ekle")
+def add_books_batch(books: List[PydanticBook] = Body(..., embed=True)):
+    results = library.add_books([Book(b.title, b.author, b.isbn) for b in books])
+    return batch_response(results, "{count} kitap eklendi")
+
+# Birden fazla kitabı tek işlemde ödünç verme
+@app.patch("/books/batch/borrow", summary="Toplu Ödünç Ver")
+def borrow_books_batch(isbns: List[str] = Body(..., embed=True), member_id: Optional[str] = None):
+    require_member(member_id)
+    return batch_response(library.borrow_books(isbns, member_id), "{count} kitap ödünç verildi")
+
+# Birden fazla kitabı tek işlemde iade etme
+@app.patch("/books/batch/return", summary="Toplu İade Et")
+def return_books_batch(isbns: List[str] = Body(..., embed=True), member_id: Optional[str] = None):
+    require_member(member_id)
+    return batch_response(library.return_books(isbns, member_id), "{count} kitap iade edildi")
+
+# Kitapları listeleme
+# - Parametresiz çağrı tüm kitapları tek bir liste olarak döndürür
+# - limit/cursor ile ISBN sırasına göre sayfalama yapılır, cevap bir sonraki sayfanın imlecini içerir
+# - format=ndjson ile kitaplar satır satır akış (streaming) olarak gönderilir
+@app.get("/books", summary="Kitapları Listele")
+def get_books(limit: Optional[int] = Query(None, ge=1, le=1000), cursor: str = "",
+              borrowed: Optional[bool] = None, book_type: Optional[str] = Query(None, alias="type"),
+              fields: str = "", format: str = Query("json", pattern="^(json|ndjson)$")):
+    selected = parse_fields(fields)
+
+    if format == "ndjson":
+        books = library.iter_books(cursor, borrowed, book_type)
+        if limit:
+            books = islice(books, limit)
+        lines = (json.dumps(row, ensure_ascii=False) + "\n" for row in project_books(books, selected))
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+
+    if limit or cursor:
+        books, next_cursor = library.page_books(limit or 100, cursor, borrowed, book_type)
+        return {"kitaplar": list(project_books(books, selected)), "sonraki_imleç": next_cursor}
+
+    return list(project_books(library.iter_books(borrowed=borrowed, book_type=book_type), selected))
 
 # Kitap bulma
+# q ile serbest metin araması yapılır: kısmi ve hatalı yazımlı başlık/yazar, uygunluk sıralı liste döner
+# title/author/isbn ise tam eşleşen ilk kitabı döndürür
 @app.get("/books/search", summary="Kitap Ara")
-def search_books(title: str = "", author: str = "", isbn: str = ""):
-    if not title and not author and not isbn:
+def search_books(title: str = "", author: str = "", isbn: str = "", q: str = "",
+                 limit: int = Query(10, ge=1, le=100), offset: int = Query(0, ge=0)):
+    if not title and not author and not isbn and not q:
         raise HTTPException(400, "En az bir arama kriteri gerekli")
+
+    # Serbest metin araması; uygunluk sıralı sayfa, sonraki_offset sonraki sayfayı verir (son sayfada None)
+    if q:
+        books = library.search_books(q, limit + 1, offset)
+        return {"kitaplar": [project_book(b) for b in books[:limit]],
+                "sonraki_offset": offset + limit if len(books) > limit else None}
     
     # Başlık ile arama
     if title:
         book = library.find_book_by_title(title)
         if book:
-            return {"title": book.title, "author": book.author, "isbn": book.isbn, "borrowed": book.is_borrowed}
+            return project_book(book)
     
     # Yazar ile arama
     if author:
         book = library.find_book_by_author(author)
         if book:
-            return {"title": book.title, "author": book.author, "isbn": book.isbn, "borrowed": book.is_borrowed}
+            return project_book(book)
     
     # ISBN ile arama
     if isbn:
         book = library.find_book_by_isbn(isbn)
         if book:
-            return {"title": book.title, "author": book.author, "isbn": book.isbn, "borrowed": book.is_borrowed}
+            return project_book(book)
     
     raise HTTPException(404, "Kitap bulunamadı")
 
 # Kitap silme
 @app.delete("/books/{isbn}")
 def remove_book(isbn: str):
-    success = library.remove_book(isbn)
-    if success:
-        return {"message": "Kitap silindi"}
-    raise HTTPException(404, "Kitap bulunamadı")
+    if not library.remove_book(isbn):
+        raise library_error()
+    return {"message": "Kitap silindi"}
 
-# Kitap ödünç alma
+# Kitap ödünç alma; member_id verilirse kitap üyeye ödünç verilir ve deftere kaydedilir
+# due_at ile iade tarihi belirlenebilir (varsayılan 14 gün sonra)
 @app.patch("/books/{isbn}/borrow")
-def borrow_book(isbn: str):
+def borrow_book(isbn: str, member_id: Optional[str] = None, due_at: Optional[datetime] = None):
     book = library.find_book_by_isbn(isbn)
-    if not book:
-        raise HTTPException(404, "Kitap bulunamadı")
-    try:
-        book.borrow_book()
-        return {"message": f"'{book.title}' ödünç alındı"}
-    except Exception as e:
-        raise HTTPException(400, str(e))
+    if not library.borrow_book(isbn, member_id, to_timestamp(due_at)):
+        raise library_error()
+    return {"message": f"'{book.title}' ödünç alındı"}
 
-# Kitap iade etme
+# Kitap iade etme; member_id verilirse kitap o üyede olmalıdır, barcode ile iade edilen nüsha seçilir
+# Kitabın ayırtma sırası varsa nüsha aynı işlemde sıradaki üyeye ödünç verilir ve yeni ödünç döndürülür
 @app.patch("/books/{isbn}/return")
-def return_book(isbn: str):
+def return_book(isbn: str, member_id: Optional[str] = None, barcode: Optional[str] = None):
+    book = library.find_book_by_isbn(isbn)
+    require_member(member_id)
+    holds = library.hold_queue(isbn, limit=1)
+    if not library.return_book(isbn, member_id, barcode):
+        raise library_error()
+    loan = next((loan for loan in library.title_loans(isbn) if loan.member_id == holds[0].member_id), None) \
+        if holds else None
+    if loan:
+        return {"message": f"'{book.title}' iade edildi ve sıradaki üyeye ({loan.member_id}) ödünç verildi",
+                "loan": project_loan(loan)}
+    return {"message": f"'{book.title}' iade edildi"}
+
+# Kitabın tüm nüshalarının aktif ödünçleri (kimde oldukları ve iade tarihleri), iade tarihi sırasıyla
+@app.get("/books/{isbn}/loan", summary="Kitabın Ödünçleri")
+def get_book_loan(isbn: str):
+    loans = library.title_loans(isbn)
+    if loans:
+        return [project_loan(loan) for loan in loans]
+    if not library.find_book_by_isbn(isbn):
+        raise HTTPException(404, "Kitap bulunamadı")
+    raise HTTPException(404, "Kitap bir üyeye ödünç verilmedi")
+
+# Nüsha ekleme: {"barcodes": [...]} ile verilen barkodlar ya da {"count": n} ile üretilen barkodlar eklenir
+# Kitabı bekleyen ayırtmalar varsa yeni nüshalar sıradaki üyelere ödünç verilir
+@app.post("/books/{isbn}/copies", summary="Nüsha Ekle")
+def add_copies(isbn: str, barcodes: Optional[List[str]] = Body(None),
+               count: Optional[int] = Body(None, ge=1, le=1000)):
+    if not barcodes and not count:
+        raise HTTPException(400, "barcodes ya da count gerekli")
+    copies = library.add_copies(isbn, barcodes, count)
+    if not copies:
+        raise library_error()
+    return {"message": f"{len(copies)} nüsha eklendi", "barcodes": [copy.barcode for copy in copies]}
+
+# Kitabın nüshaları ve ödünçleri; nüshası kaydedilmemiş kitap, barkodu ISBN'i olan tek nüsha olarak gösterilir
+@app.get("/books/{isbn}/copies", summary="Kitabın Nüshaları")
+def get_copies(isbn: str):
     book = library.find_book_by_isbn(isbn)
     if not book:
         raise HTTPException(404, "Kitap bulunamadı")
-    try:
-        book.return_book()
-        return {"message": f"'{book.title}' iade edildi"}
-    except Exception as e:
-        raise HTTPException(400, str(e))
+    copies = library.copies(isbn) or [Copy(isbn, isbn, book.is_borrowed)]
+    loans = {loan.barcode: loan for loan in library.title_loans(isbn)}
+    return {"isbn": isbn, "copies": len(copies), "available": sum(1 for copy in copies if not copy.on_loan),
+            "items": [{"barcode": copy.barcode, "on_loan": copy.on_loan,
+                       "loan": project_loan(loans[copy.barcode]) if copy.barcode in loans else None}
+                      for copy in copies]}
+
+# Nüsha silme; ödünçteki nüsha ve kitabın son nüshası silinemez
+@app.delete("/copies/{barcode}", summary="Nüsha Sil")
+def remove_copy(barcode: str):
+    if not library.remove_copy(barcode):
+        raise library_error()
+    return {"message": "Nüsha silindi"}
+
+# Ayırtma: ödünçteki kitap için üye sıraya girer; kitap iade edildiğinde sıradaki üyeye otomatik ödünç verilir
+@app.post("/books/{isbn}/holds", summary="Kitabı Ayırt")
+def place_hold(isbn: str, member_id: str):
+    if not library.place_hold(isbn, member_id):
+        raise library_error()
+    return {"message": "Ayırtma alındı", "position": library.hold_position(isbn, member_id)}
+
+# Kitabın ayırtma sırası, sıradaki üye ilk
+@app.get("/books/{isbn}/holds", summary="Ayırtma Sırası")
+def get_holds(isbn: str):
+    if not library.find_book_by_isbn(isbn):
+        raise HTTPException(404, "Kitap bulunamadı")
+    return [project_hold(hold, position) for position, hold in enumerate(library.hold_queue(isbn), 1)]
+
+# Üyenin sıradaki yeri
+@app.get("/books/{isbn}/holds/{member_id}", summary="Sıradaki Yer")
+def get_hold(isbn: str, member_id: str):
+    for position, hold in enumerate(library.hold_queue(isbn), 1):
+        if hold.member_id == member_id:
+            return project_hold(hold, position)
+    raise HTTPException(404, "Ayırtma bulunamadı")
+
+# Ayırtma iptali
+@app.delete("/books/{isbn}/holds/{member_id}", summary="Ayırtmayı İptal Et")
+def cancel_hold(isbn: str, member_id: str):
+    if not library.cancel_hold(isbn, member_id):
+        raise library_error()
+    return {"message": "Ayırtma iptal edildi"}
+
+# Gecikmiş ödünçler, iade tarihi sırasıyla; iade tarihi zamanlayıcısından okunur, ödünçler taranmaz
+@app.get("/loans/overdue", summary="Gecikmiş Ödünçler")
+def get_overdue_loans(limit: int = Query(100, ge=1, le=10000)):
+    now = time.time()
+    return [{**project_loan(loan), "days_overdue": int((now - loan.due_at) // 86400)}
+            for loan in library.overdue_loans(limit, now)]
+
+# Üye ekleme
+@app.post("/members", summary="Üye Ekle")
+def add_member(member_data: PydanticMember):
+    if not library.add_member(Member(member_data.name, member_data.member_id, member_data.email)):
+        raise library_error()
+    return {"message": "Üye eklendi", "üye": member_data.model_dump()}
+
+# Üye bilgileri
+@app.get("/members/{member_id}", summary="Üye Bilgileri")
+def get_member(member_id: str):
+    member = library.find_member(member_id)
+    if not member:
+        raise HTTPException(404, "Üye bulunamadı")
+    return {"member_id": member.member_id, "name": member.name, "email": member.email}
+
+# Üye silme; üyede ödünç kitap ya da bekleyen ayırtma varsa silinmez
+@app.delete("/members/{member_id}", summary="Üye Sil")
+def remove_member(member_id: str):
+    if not library.remove_member(member_id):
+        raise library_error()
+    return {"message": "Üye silindi"}
+
+# Üyenin ödünçleri, iade tarihi sırasıyla
+@app.get("/members/{member_id}/loans", summary="Üyenin Ödünçleri")
+def get_member_loans(member_id: str):
+    require_member(member_id)
+    return [project_loan(loan) for loan in library.member_loans(member_id)]
+
+# Üyenin ayırtmaları ve her kitabın sırasındaki yeri
+@app.get("/members/{member_id}/holds", summary="Üyenin Ayırtmaları")
+def get_member_holds(member_id: str):
+    require_member(member_id)
+    return [project_hold(hold, library.hold_position(hold.isbn, member_id))
+            for hold in library.member_holds(member_id)]
+
+# Dolaşım geçmişi: [from, to) aralığındaki ekleme, silme, ödünç verme ve iade olayları, zaman sırasıyla
+# from/to ISO 8601 ya da Unix zamanı olabilir; isbn ile tek kitabın geçmişi alınır
+# format=ndjson ile aralıktaki tüm olaylar akış halinde dışa aktarılır (limit uygulanmaz)
+@app.get("/events", summary="Olay Geçmişi")
+def get_events(start: Optional[datetime] = Query(None, alias="from"),
+               end: Optional[datetime] = Query(None, alias="to"), isbn: Optional[str] = None,
+               limit: int = Query(100, ge=1, le=10000), format: str = Query("json", pattern="^(json|ndjson)$")):
+    if format == "ndjson":
+        events = library.event_log.iter_events(to_timestamp(start), to_timestamp(end), isbn)
+        lines = (json.dumps(project_event(event), ensure_ascii=False) + "\n" for event in events)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    return [project_event(event)
+            for event in library.event_log.query(to_timestamp(start), to_timestamp(end), isbn, limit)]
 
 # Kütüphane istatistikleri
 @app.get("/stats")
 def get_stats():
-    total = library.total_books
-    borrowed = sum(1 for book in library._books if book.is_borrowed)
-    return {
-        "kütüphane": library.name,
-        "toplam_kitap": total,
-        "mevcut_kitap": total - borrowed,
-        "ödünç_kitap": borrowed
-    }
+    return library.stats()
+
+# En çok kitabı bulunan yazarlar
+@app.get("/stats/authors")
+def get_author_stats(limit: int = Query(10, ge=1, le=100)):
+    return [{"yazar": author, "kitap_sayısı": count} for author, count in library.top_authors(limit)]
+
+# OpenLibrary önbellek istatistikleri
+@app.get("/cache/stats")
+def get_cache_stats():
+    return library.metadata_cache.stats()
+
+# Prometheus metin biçiminde ölçümler (istek süreleri, Library işlemleri, yazmalar, OpenLibrary istekleri)
+@app.get("/metrics", summary="Ölçümler", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,104 @@
+"""
+Kitap nesnelerinin bellek kullanımını ölçer.
+
+Kullanım:
+    python src/bench_memory.py [kitap_sayısı]
+
+"Önce" satırı __slots__ kullanılmadan önceki (nesne başına __dict__ taşıyan) kitap sınıflarını,
+"Sonra" satırı library.py'deki mevcut sınıfları ölçer. "Library" satırı indeksler dahil
+kütüphanedeki kitap başına toplam maliyeti gösterir.
+"""
+import contextlib
+import gc
+import io
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from library import Book, EBook, AudioBook, Library
+
+
+# __slots__ öncesi kitap sınıfları (karşılaştırma için)
+class DictBook:
+    def __init__(self, title: str, author: str, isbn: str):
+        self.title = title
+        self.author = author
+        self.isbn = isbn
+        self.is_borrowed = False
+
+
+class DictEBook(DictBook):
+    def __init__(self, title: str, author: str, isbn: str, file_format: str, file_size: float):
+        super().__init__(title, author, isbn)
+        self.file_format = file_format
+        self.file_size = file_size
+
+
+class DictAudioBook(DictBook):
+    def __init__(self, title: str, author: str, isbn: str, duration_minutes: int):
+        super().__init__(title, author, isbn)
+        self.duration_minutes = duration_minutes
+
+
+# Book/EBook/AudioBook karışımı sentetik kitap verisi üretir; yazarlar kitaplar arasında tekrar eder
+def generate_rows(count: int):
+    for i in range(count):
+        title = f"Kitap Başlığı {i}"
+        author = f"Yazar {i % 5000}"
+        isbn = f"{9780000000000 + i}"
+        if i % 10 == 0:
+            yield "EBook", (title, author, isbn, "PDF", 2.5)
+        elif i % 10 == 1:
+            yield "AudioBook", (title, author, isbn, 300)
+        else:
+            yield "Book", (title, author, isbn)
+
+
+# Verilen fabrika ile kitapları oluşturur ve kitap başına ayrılan bellek miktarını döndürür
+def measure(classes: dict, count: int):
+    rows = list(generate_rows(count))  # girdi stringleri ölçümden önce oluşturulur
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    books = [classes[kind](*args) for kind, args in rows]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del books
+    return (after - before) / count
+
+
+# Library içinde (indeksler dahil) kitap başına bellek kullanımını ölçer
+def measure_library(count: int):
+    rows = list(generate_rows(count))
+    classes = {"Book": Book, "EBook": EBook, "AudioBook": AudioBook}
+    with tempfile.TemporaryDirectory() as temp_dir, contextlib.redirect_stdout(io.StringIO()):
+        library = Library("Benchmark", os.path.join(temp_dir, "bench.json"))
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for kind, args in rows:
+            library._attach_book(classes[kind](*args))
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        library.close()
+    return (after - before) / count
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    dict_classes = {"Book": DictBook, "EBook": DictEBook, "AudioBook": DictAudioBook}
+    slot_classes = {"Book": Book, "EBook": EBook, "AudioBook": AudioBook}
+
+    dict_bytes = measure(dict_classes, count)
+    slot_bytes = measure(slot_classes, count)
+    library_bytes = measure_library(count)
+
+    print(f"{count} kitap için kitap başına bellek:")
+    print(f"  Önce (__dict__)   : {dict_bytes:8.1f} bayt")
+    print(f"  Sonra (__slots__) : {slot_bytes:8.1f} bayt  ({100 * (1 - slot_bytes / dict_bytes):.0f}% daha az)")
+    print(f"  Library (indeksler dahil): {library_bytes:8.1f} bayt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Kütüphane işlemleri ve API uç noktaları için performans ölçümleri.
+
+Kullanım:
+    python src/benchmark.py [--sizes 10000 100000 1000000] [--repeat 1000] [--no-api]
+    python src/benchmark.py --save-baseline                      # sonuçları temel değer dosyasına yazar
+    python src/benchmark.py --baseline bench_baseline.json       # temel değerle karşılaştırır
+
+Her boyut için Book/EBook/AudioBook karışımı sentetik bir katalog üretilir ve şunlar ölçülür:
+    - Library yükleme süresi (JSON ve binary anlık görüntü), save() maliyeti
+    - add_book, borrow_book, return_book, find_book_by_* ve search_books gecikmesi (JSON günlük modu)
+    - olay günlüğüne kayıt ekleme (event_record) maliyeti
+    - SQLite arka ucu (pushdown) toplu ekleme hızı, ISBN ile okuma, ödünç verme ve FTS araması
+    - TestClient üzerinden GET /books, /books/search ve /stats gecikmesi
+Her ölçüm için p50/p99 gecikme (mikrosaniye) ve saniyedeki işlem sayısı raporlanır.
+
+Temel değerler (baseline) makineye özgüdür. Karşılaştırmada p50 gecikmesi temel değerden tolerans oranından
+(varsayılan %30) fazla kötüleşen ölçümler listelenir ve program 1 çıkış koduyla biter.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+from bench_memory import generate_rows
+from library import Book, Library
+from message_display import configure_logging
+from storage import JsonStorage, SQLiteStorage
+
+DEFAULT_BASELINE = "bench_baseline.json"
+SQLITE_BATCH = 1000  # SQLite toplu eklemesinde bir commit'teki kitap sayısı
+
+
+# Sentetik katalog satırlarını Library._book_to_dict şemasında sözlüklere dönüştürür
+def generate_books(count: int):
+    books = []
+    for kind, args in generate_rows(count):
+        book = {"title": args[0], "author": args[1], "isbn": args[2], "is_borrowed": False, "type": kind}
+        if kind == "EBook":
+            book["file_format"], book["file_size"] = args[3], args[4]
+        elif kind == "AudioBook":
+            book["duration_minutes"] = args[3]
+        books.append(book)
+    return books
+
+
+# Sıralı örneklerden en yakın sıra (nearest-rank) yöntemiyle yüzdelik değer
+def percentile(samples: list, percent: float):
+    return samples[min(len(samples) - 1, max(0, round(percent / 100 * len(samples)) - 1))]
+
+
+# Nanosaniye örneklerinden p50/p99 (mikrosaniye) ve saniyedeki işlem sayısını hesaplar
+# ops_per_sample bir örneğin kaç işlem içerdiğini belirtir (ör. toplu eklemede kitap sayısı)
+def summarize(samples: list, ops_per_sample: int = 1):
+    samples = sorted(samples)
+    total = sum(samples) or 1
+    return {
+        "p50_us": round(percentile(samples, 50) / 1000, 2),
+        "p99_us": round(percentile(samples, 99) / 1000, 2),
+        "ops_per_sec": round(len(samples) * ops_per_sample / (total / 1e9), 1),
+        "samples": len(samples)
+    }
+
+
+# Fonksiyonu her argüman grubu için bir kez çalıştırır ve her çağrının süresini ölçer
+def timed(func, arguments, ops_per_sample: int = 1):
+    samples = []
+    for args in arguments:
+        start = time.perf_counter_ns()
+        func(*args)
+        samples.append(time.perf_counter_ns() - start)
+    return summarize(samples, ops_per_sample)
+
+
+# JSON günlük modundaki Library işlemleri (API'nin varsayılan yapılandırması, arka plan yazıcısı olmadan)
+def bench_library(results: dict, books: list, temp_dir: str, repeat: int, rng: random.Random):
+    json_file = os.path.join(temp_dir, "bench.json")
+    snapshot_dir = os.path.join(temp_dir, "snapshot")
+    os.mkdir(snapshot_dir)
+    snapshot_json = os.path.join(snapshot_dir, "bench.json")
+    JsonStorage(json_file).save("Benchmark", books)
+    JsonStorage(snapshot_json, binary_snapshot=True).save("Benchmark", books)
+
+    results["load_json"] = timed(lambda: Library("Benchmark", json_file).close(), [()] * 3)
+    results["load_binary_snapshot"] = timed(
+        lambda: Library("Benchmark", snapshot_json, binary_snapshot=True).close(), [()] * 3)
+
+    library = Library("Benchmark", json_file, journal=True, compact_after=repeat * 10)
+    isbns = [rng.choice(books)["isbn"] for _ in range(repeat)]
+    titles = [rng.choice(books)["title"] for _ in range(repeat)]
+    authors = [rng.choice(books)["author"] for _ in range(repeat)]
+    results["find_book_by_isbn"] = timed(library.find_book_by_isbn, [(isbn,) for isbn in isbns])
+    results["find_book_by_title"] = timed(library.find_book_by_title, [(title,) for title in titles])
+    results["find_book_by_author"] = timed(library.find_book_by_author, [(author,) for author in authors])
+    results["search_books"] = timed(library.search_books, [(title.split()[-1] + " kitap",) for title in titles])
+
+    borrow_isbns = [book["isbn"] for book in rng.sample(books, min(repeat, len(books)))]
+    results["borrow_book"] = timed(library.borrow_book, [(isbn,) for isbn in borrow_isbns])
+    results["return_book"] = timed(library.return_book, [(isbn,) for isbn in borrow_isbns])
+    new_books = [Book(f"Yeni Kitap {i}", "Yeni Yazar", f"{9790000000000 + i}") for i in range(repeat)]
+    results["add_book"] = timed(library.add_book, [(book,) for book in new_books])
+    # Değişikliklerin olay günlüğüne eklenme maliyeti (sıcak yolda yalnızca tampona ekleme)
+    results["event_record"] = timed(library.event_log.record, [("borrow", isbn) for isbn in borrow_isbns])
+    results["save"] = timed(library.save, [()] * 3)
+    return library
+
+
+# SQLite arka ucu (pushdown): toplu ekleme hızı ve veritabanından yapılan sorgular
+# Kitap önbelleği kapalıdır, böylece her okuma veritabanına gider
+def bench_sqlite(results: dict, books: list, temp_dir: str, repeat: int, rng: random.Random):
+    storage = SQLiteStorage(os.path.join(temp_dir, "bench.db"), pushdown=True)
+    library = Library("Benchmark", storage=storage, book_cache_size=0)
+    batches = [books[i:i + SQLITE_BATCH] for i in range(0, len(books), SQLITE_BATCH)]
+    results["sqlite_add_books"] = timed(
+        lambda batch: library.add_books([library._dict_to_book(book) for book in batch]),
+        [(batch,) for batch in batches], SQLITE_BATCH)
+
+    isbns = [rng.choice(books)["isbn"] for _ in range(repeat)]
+    results["sqlite_find_book_by_isbn"] = timed(library.find_book_by_isbn, [(isbn,) for isbn in isbns])
+    results["sqlite_search_books"] = timed(
+        library.search_books, [(rng.choice(books)["title"].split()[-1] + " kitap",) for _ in range(repeat)])
+    borrow_isbns = [book["isbn"] for book in rng.sample(books, min(repeat, len(books)))]
+    results["sqlite_borrow_book"] = timed(library.borrow_book, [(isbn,) for isbn in borrow_isbns])
+    results["sqlite_stats"] = timed(library.stats, [()] * min(repeat, 100))
+    library.close()
+
+
+# API uç noktaları TestClient üzerinden, verilen kütüphaneyle ölçülür
+# api modülü içe aktarılırken kendi kütüphanesini çalışma dizininde açtığı için geçici dizinde içe aktarılır
+def bench_api(results: dict, library: Library, books: list, temp_dir: str, repeat: int, rng: random.Random):
+    from fastapi.testclient import TestClient
+    cwd = os.getcwd()
+    os.chdir(temp_dir)
+    try:
+        import api
+    finally:
+        os.chdir(cwd)
+    # api modülü sunucu günlük modunu açar; ölçüm sırasında günlük kayıtları atılır
+    configure_logging(stream=open(os.devnull, "w", encoding="utf-8"))
+    previous, api.library = api.library, library
+    try:
+        client = TestClient(api.app)
+        cursors = [rng.choice(books)["isbn"] for _ in range(repeat)]
+        results["api_get_books"] = timed(lambda cursor: client.get("/books", params={"limit": 100, "cursor": cursor}),
+                                         [(cursor,) for cursor in cursors])
+        results["api_search"] = timed(lambda q: client.get("/books/search", params={"q": q}),
+                                      [(rng.choice(books)["title"].split()[-1] + " kitap",) for _ in range(repeat)])
+        results["api_stats"] = timed(lambda: client.get("/stats"), [()] * repeat)
+    finally:
+        api.library = previous
+
+
+# Bir katalog boyutu için tüm ölçümleri çalıştırır; {ölçüm adı: özet} döndürür
+def run_size(size: int, repeat: int, include_api: bool = True):
+    rng = random.Random(size)
+    books = generate_books(size)
+    results = {}
+    with tempfile.TemporaryDirectory() as temp_dir, contextlib.redirect_stdout(io.StringIO()):
+        library = bench_library(results, books, temp_dir, repeat, rng)
+        try:
+            if include_api:
+                bench_api(results, library, books, temp_dir, repeat, rng)
+        finally:
+            library.close()
+        bench_sqlite(results, books, temp_dir, repeat, rng)
+    return results
+
+
+# Sonuçları temel değerlerle karşılaştırır; p50'si tolerans oranından fazla kötüleşen ölçümleri döndürür
+# Temel değerde bulunmayan boyut ve ölçümler atlanır
+def compare(results: dict, baseline: dict, tolerance: float = 0.3):
+    regressions = []
+    for size, cases in results.items():
+        for name, current in cases.items():
+            base = baseline.get("results", {}).get(size, {}).get(name)
+            if base and current["p50_us"] > base["p50_us"] * (1 + tolerance):
+                regressions.append(f"{size} kitap / {name}: p50 {base['p50_us']} µs -> {current['p50_us']} µs")
+    return regressions
+
+
+def print_results(results: dict):
+    print(f"{'kitap':>8}  {'ölçüm':<26}{'p50 (µs)':>12}{'p99 (µs)':>12}{'işlem/sn':>14}")
+    for size, cases in results.items():
+        for name, summary in cases.items():
+            print(f"{size:>8}  {name:<26}{summary['p50_us']:>12.2f}{summary['p99_us']:>12.2f}"
+                  f"{summary['ops_per_sec']:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Kütüphane performans ölçümleri")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000], help="katalog boyutları")
+    parser.add_argument("--repeat", type=int, default=1000, help="gecikme ölçümü başına çağrı sayısı")
+    parser.add_argument("--no-api", action="store_true", help="API uç noktalarını ölçme")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="temel değer dosyası")
+    parser.add_argument("--save-baseline", action="store_true", help="sonuçları temel değer dosyasına yaz")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="izin verilen p50 kötüleşme oranı")
+    parser.add_argument("--output", help="sonuçları bu JSON dosyasına da yaz")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        results[str(size)] = run_size(size, args.repeat, not args.no_api)
+    report = {"python": platform.python_version(), "platform": platform.platform(), "results": results}
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nTemel değerler {args.baseline} dosyasına yazıldı.")
+        return
+    if not os.path.exists(args.baseline):
+        print(f"\nTemel değer dosyası {args.baseline} bulunamadı; karşılaştırma yapılmadı.")
+        return
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} ölçümde gerileme (tolerans %{args.tolerance * 100:.0f}):")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nGerileme yok ({args.baseline} ile karşılaştırıldı).")
+
+
+if __name__ == "__main__":
+    main()
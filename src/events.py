@@ -0,0 +1,333 @@
+"""
+Dolaşım olayları: kitap ekleme, silme, ödünç verme ve iade işlemlerinin değişmez, zaman damgalı geçmişi.
+
+Olaylar yalnızca eklenir (append-only) ve segmentlere bölünür:
+    <directory>/<ilk olayın zamanı, µs>-<pid>.jsonl   her satır bir olay: {"ts", "type", "isbn", "member_id"}
+- record() olayı yalnızca bellekteki tampona ekler; yazıcı thread'i tamponu flush_interval aralıklarla ya da
+  batch_size olay biriktiğinde etkin segmentin sonuna tek bir write ile ekler. Okumalar önce tamponu boşaltır.
+- Segment segment_events olaya ulaşınca kapatılır ve yeni segment açılır; kapanan segment bir daha değişmez
+- Zaman indeksi: segmentler başlangıç zamanına göre sıralıdır (dosya adı) ve her segment için index_every olayda
+  bir (zaman, bayt konumu) tutulur. Aralık sorgusu başlangıcı aralığın sonundan sonra olan segmentleri hiç açmaz,
+  okunan segmentte seyrek indeksle aralığın başına atlar ve aralığın sonunda okumayı bırakır.
+- retention_days verilirse son olayı saklama süresinden eski segmentler silinir (prune); segment kapatılırken
+  ve istendiğinde çalışır
+- Her süreç kendi segmentlerine yazar (uvicorn --workers N); sorgular tüm süreçlerin segmentlerini zaman
+  sırasıyla birleştirir
+- Dizin ve yazıcı thread'i ilk olay kaydedildiğinde oluşturulur; kullanılmayan günlük diske dokunmaz
+- directory verilmezse segmentler bellekte tutulur: tampon batch_size olayda bir kaydeden thread'de boşaltılır ve
+  en yeni memory_segments segment saklanır, böylece bellek kullanımı sınırlı kalır
+Olay zamanları süreç içinde azalmayan, mikrosaniye hassasiyetinde Unix zamanıdır (saniye).
+"""
+import atexit
+import heapq
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+
+from message_display import UnicodeDisplay
+
+EVENT_TYPES = ("add", "remove", "borrow", "return")
+DAY_SECONDS = 86400
+
+
+# Olay zamanı mikrosaniyeye yuvarlanır; ISO 8601 gösterimi (µs) aynı zamana geri çevrilebilir
+def _now():
+    return time.time_ns() // 1000 / 1_000_000
+
+
+class _Segment:
+    """Bir segmentin seyrek zaman indeksi; dosya büyüdükçe (başka süreç yazıyorsa) kaldığı yerden devam eder."""
+
+    __slots__ = ("path", "start", "size", "count", "index", "end", "events")
+
+    def __init__(self, path: str, start: float, events: list = None):
+        self.path = path
+        self.start = start
+        self.size = 0                    # indekslenen bayt sayısı
+        self.count = 0                   # indekslenen olay sayısı
+        self.index = []                  # (zaman, bayt konumu), index_every olayda bir
+        self.end = start                 # son olayın zamanı
+        self.events = events             # bellek modunda olaylar
+
+
+class EventLog:
+    def __init__(self, directory: str = None, segment_events: int = 100_000, retention_days: float = None,
+                 batch_size: int = 1024, flush_interval: float = 0.2, index_every: int = 256,
+                 memory_segments: int = 10):
+        self.directory = directory
+        self.segment_events = segment_events
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.index_every = index_every
+        self.memory_segments = memory_segments
+        self.display = UnicodeDisplay()
+        self._pending = []               # henüz yazılmamış olaylar: (zaman, tür, ISBN, üye no)
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()  # segment listesi, etkin segment ve yazmalar
+        self._last_ts = 0.0
+        self._segments = {}              # yol -> _Segment (bellek modunda anahtar segment adıdır)
+        self._active = None              # bu sürecin yazdığı segment
+        self._closed = False
+        self._wake = threading.Event()
+        self._thread = None
+
+    # Olayı kaydeder; yalnızca tampona ekler (sıcak yol). Kapatılmış günlüğe gelen olaylar atılır
+    def record(self, kind: str, isbn: str, member_id: str = None):
+        ts = _now()
+        with self._pending_lock:
+            if self._closed:
+                return
+            if ts < self._last_ts:
+                ts = self._last_ts
+            self._last_ts = ts
+            self._pending.append((ts, kind, isbn, member_id))
+            full = len(self._pending) >= self.batch_size
+        self._written(full)
+
+    # Aynı anda yapılan birden fazla olayı (toplu işlemler) tek kilitle kaydeder; olaylar (tür, ISBN, üye no)
+    def record_many(self, events):
+        ts = _now()
+        with self._pending_lock:
+            if self._closed:
+                return
+            if ts < self._last_ts:
+                ts = self._last_ts
+            self._last_ts = ts
+            self._pending.extend((ts, kind, isbn, member_id) for kind, isbn, member_id in events)
+            full = len(self._pending) >= self.batch_size
+        self._written(full)
+
+    # Tampon dolduysa yazıcı thread'i uyandırılır; bellek modunda yazıcı olmadığı için tampon burada boşaltılır
+    # Yazıcı thread'i ilk olayda başlatılır
+    def _written(self, full: bool):
+        if not self.directory:
+            if full:
+                self.flush()
+            return
+        if self._thread is None:
+            self._start()
+        if full:
+            self._wake.set()
+
+    def _start(self):
+        with self._write_lock:
+            if self._thread is not None or self._closed:
+                return
+            self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    # Tampondaki olayları segmentlere yazar
+    def flush(self):
+        with self._write_lock:
+            with self._pending_lock:
+                events, self._pending = self._pending, []
+            if events:
+                self._write(events)
+
+    # _write_lock tutulurken çağrılır; segment dolunca yenisi açılır
+    def _write(self, events: list):
+        position = 0
+        while position < len(events):
+            if self._active is None or self._active.count >= self.segment_events:
+                self._roll(events[position][0])
+            segment = self._active
+            chunk = events[position:position + self.segment_events - segment.count]
+            position += len(chunk)
+            if segment.events is not None:
+                self._index_events(segment, chunk)
+                continue
+            lines = [(json.dumps({"ts": ts, "type": kind, "isbn": isbn, "member_id": member_id},
+                                 ensure_ascii=False) + "\n").encode("utf-8") for ts, kind, isbn, member_id in chunk]
+            try:
+                with open(segment.path, "ab") as f:
+                    f.write(b"".join(lines))
+            except OSError as e:
+                self.display.error(f"Olaylar {segment.path} dosyasına yazılamadı: {e}")
+                return
+            # Yazılan satırlar yeniden ayrıştırılmadan indekslenir
+            offset = segment.size
+            for event, line in zip(chunk, lines):
+                if segment.count % self.index_every == 0:
+                    segment.index.append((event[0], offset))
+                segment.count += 1
+                offset += len(line)
+            segment.size = offset
+            segment.end = chunk[-1][0]
+
+    # Etkin segmenti kapatır ve ilk olayın zamanıyla yeni bir segment açar
+    # Bellek modunda en eski segmentler memory_segments sınırına kadar atılır
+    def _roll(self, start: float):
+        name = f"{int(start * 1_000_000):020d}-{os.getpid()}.jsonl"
+        if self.directory:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+            except OSError:
+                pass  # segment dosyası açılamayınca _write hatayı bildirir
+            path = os.path.join(self.directory, name)
+            self._active = self._segments[path] = _Segment(path, start)
+        else:
+            self._active = self._segments[name] = _Segment(name, start, [])
+            for name in sorted(self._segments)[:-self.memory_segments]:
+                del self._segments[name]
+        if self.retention_days is not None:
+            self._prune(time.time() - self.retention_days * DAY_SECONDS)
+
+    def _index_events(self, segment: _Segment, events: list):
+        for event in events:
+            if segment.count % self.index_every == 0:
+                segment.index.append((event[0], len(segment.events)))
+            segment.events.append(event)
+            segment.count += 1
+        segment.end = events[-1][0]
+
+    # Yeni yazılan (ya da başka sürecin eklediği) satırları seyrek indekse ekler
+    def _index_lines(self, segment: _Segment, data: bytes, offset: int):
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # başka bir sürecin yarım kalmış yazması; bir sonraki okumada tamamlanır
+            ts = json.loads(line)["ts"]
+            if segment.count % self.index_every == 0:
+                segment.index.append((ts, offset))
+            segment.count += 1
+            segment.end = ts
+            offset += len(line)
+        segment.size = offset
+
+    # Dizindeki segmentleri (diğer süreçlerinkiler dahil) bulur, silinenleri çıkarır, büyüyenleri indeksler
+    # _write_lock tutulurken çağrılır
+    def _refresh(self):
+        if not self.directory:
+            return
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith(".jsonl")]
+        except OSError:
+            return
+        paths = {os.path.join(self.directory, name): name for name in names}
+        for path in [path for path in self._segments if path not in paths]:
+            del self._segments[path]
+        for path, name in paths.items():
+            segment = self._segments.get(path)
+            if segment is None:
+                segment = self._segments[path] = _Segment(path, int(name.split("-")[0]) / 1_000_000)
+            if segment is self._active:
+                continue
+            try:
+                if os.path.getsize(path) == segment.size:
+                    continue
+                with open(path, "rb") as f:
+                    f.seek(segment.size)
+                    self._index_lines(segment, f.read(), segment.size)
+            except OSError:
+                continue
+
+    # Son olayı cutoff'tan eski segmentleri siler; etkin segment silinmez
+    def prune(self, cutoff: float = None):
+        if cutoff is None:
+            if self.retention_days is None:
+                return 0
+            cutoff = time.time() - self.retention_days * DAY_SECONDS
+        with self._write_lock:
+            self._refresh()
+            return self._prune(cutoff)
+
+    def _prune(self, cutoff: float):
+        expired = [segment for segment in self._segments.values()
+                   if segment is not self._active and segment.count and segment.end < cutoff]
+        for segment in expired:
+            if segment.events is None:
+                try:
+                    os.remove(segment.path)
+                except OSError:
+                    continue
+            del self._segments[segment.path]
+        if expired:
+            self.display.info(f"{len(expired)} eski olay segmenti silindi.")
+        return len(expired)
+
+    # [start, end) aralığındaki olayları zaman sırasıyla döndüren üreteç; isbn verilirse yalnızca o kitabın olayları
+    # Segmentlerin listesi çağrı anında alınır, olaylar okundukça döndürülür
+    def iter_events(self, start: float = None, end: float = None, isbn: str = None):
+        self.flush()
+        with self._write_lock:
+            self._refresh()
+            segments = sorted((segment for segment in self._segments.values()
+                               if segment.count and (end is None or segment.start < end)
+                               and (start is None or segment.end >= start)), key=lambda segment: segment.start)
+            # Etkin segmente yazılmaya devam edilir; okuma çağrı anındaki son olayda durur
+            readers = [self._read_segment(segment, start, end, isbn, segment.count, segment.size)
+                       for segment in segments]
+        for event in heapq.merge(*readers, key=lambda event: event["ts"]):
+            yield event
+
+    # Segmentten aralıktaki olayları okur; seyrek indeksle aralığın başına atlanır
+    def _read_segment(self, segment: _Segment, start, end, isbn, count: int, size: int):
+        position = 0
+        if start is not None:
+            slot = bisect_right(segment.index, (start,)) - 1
+            if slot > 0:
+                position = segment.index[slot][1]
+        if segment.events is not None:
+            events = (segment.events[i] for i in range(position, count))
+            for ts, kind, event_isbn, member_id in events:
+                if end is not None and ts >= end:
+                    return
+                if (start is None or ts >= start) and (isbn is None or event_isbn == isbn):
+                    yield {"ts": ts, "type": kind, "isbn": event_isbn, "member_id": member_id}
+            return
+        try:
+            with open(segment.path, "rb") as f:
+                f.seek(position)
+                remaining = size - position
+                for line in f:
+                    if remaining <= 0:
+                        return
+                    remaining -= len(line)
+                    event = json.loads(line)
+                    if end is not None and event["ts"] >= end:
+                        return
+                    if (start is None or event["ts"] >= start) and (isbn is None or event["isbn"] == isbn):
+                        yield event
+        except FileNotFoundError:
+            return  # segment okunurken saklama süresi dolduğu için silindi
+
+    # Aralıktaki olayların listesi, en fazla limit olay
+    def query(self, start: float = None, end: float = None, isbn: str = None, limit: int = None):
+        events = self.iter_events(start, end, isbn)
+        if limit is None:
+            return list(events)
+        return [event for _, event in zip(range(limit), events)]
+
+    # Aralıktaki olayları JSON satırları (NDJSON) olarak akış halinde döndürür; dışa aktarma için
+    def export(self, start: float = None, end: float = None, isbn: str = None):
+        for event in self.iter_events(start, end, isbn):
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    # Segment sayısı ve olay sayısı
+    def stats(self):
+        self.flush()
+        with self._write_lock:
+            self._refresh()
+            return {"segment_sayısı": len(self._segments),
+                    "olay_sayısı": sum(segment.count for segment in self._segments.values())}
+
+    # Bekleyen olayları yazar ve yazıcı thread'ini durdurur; bundan sonra kaydedilen olaylar tampona eklenmez
+    def close(self):
+        with self._pending_lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._thread is not None:
+            self._wake.set()
+            self._thread.join()
+            atexit.unregister(self.close)
+        self.flush()
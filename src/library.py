@@ -1,16 +1,34 @@
 from dataclasses import dataclass, field
-from typing import List
+from itertools import islice
 from pydantic import BaseModel, Field, ValidationError
-import json
+import asyncio
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import sys
+import threading
+import time
 from pathlib import Path
 import httpx
+from events import EventLog
 from message_display import UnicodeDisplay
+from metadata_cache import MetadataCache
+from metrics import record_openlibrary_request, timed
+from locks import RWLock, StripedLock
+from snapshot import SnapshotReader
+from sorted_keys import SortedKeys
+from storage import RELOAD, StorageBackend, JsonStorage, loan_barcode
+from scheduler import DueScheduler
+from search import SearchIndex, casefold_tr
 
 
+# Büyük kataloglarda bellek kullanımını azaltmak için kitap sınıfları __slots__ kullanır (nesne başına __dict__ yok)
 class Book:
+    __slots__ = ("title", "author", "isbn", "is_borrowed")
+
     def __init__(self, title: str, author: str, isbn: str):
         self.title = title
-        self.author = author
+        self.author = sys.intern(author)  # aynı yazarın kitapları tek bir string nesnesini paylaşır
         self.isbn = isbn
         self.is_borrowed = False
 
@@ -33,6 +51,8 @@ class Book:
         return self.display_info()
 
 class EBook(Book):
+    __slots__ = ("file_format", "file_size")
+
     def __init__(self, title: str, author: str, isbn: str, file_format: str, file_size: float):
         super().__init__(title, author, isbn)
         self.file_format = file_format
@@ -42,6 +62,8 @@ class EBook(Book):
         return f"{super().display_info()} - Format: {self.file_format} - Dosya Boyutu: {self.file_size}MB"
 
 class AudioBook(Book):
+    __slots__ = ("duration_minutes",)
+
     def __init__(self, title: str, author: str, isbn: str, duration_minutes: int):
         super().__init__(title, author, isbn)
         self.duration_minutes = duration_minutes
@@ -50,13 +72,203 @@ class AudioBook(Book):
         return f"{super().display_info()} - Süre: {self.duration_minutes} dakika"
 
 
+# Kütüphane üyesi
+@dataclass
+class Member:
+    name: str
+    member_id: str
+    email: str
+
+
+# Aktif ödünç: kitap, üye, ödünç ve iade tarihi (Unix zamanı, saniye) ve ödünç verilen nüsha
+# Nüshası kaydedilmemiş kitaplarda barkod ISBN'dir
+@dataclass(slots=True)
+class Loan:
+    isbn: str
+    member_id: str
+    borrowed_at: float
+    due_at: float
+    barcode: str = None
+
+    def __post_init__(self):
+        if self.barcode is None:
+            self.barcode = self.isbn
+
+
+# Kitabın fiziksel nüshası
+@dataclass(slots=True)
+class Copy:
+    barcode: str
+    isbn: str
+    on_loan: bool = False
+
+
+# Ayırtma: ödünçteki kitap için sıraya giren üye; kitap iade edilince sıradaki üyeye ödünç verilir
+@dataclass(slots=True)
+class Hold:
+    isbn: str
+    member_id: str
+    placed_at: float
+
+
+# Kaydın ilgili olduğu ISBN; üye kayıtları için None
+def _record_isbn(record: dict):
+    if "book" in record:
+        return record["book"]["isbn"]
+    if "loan" in record:
+        return record["loan"]["isbn"]
+    if "hold" in record:
+        return record["hold"]["isbn"]
+    if "copy" in record:
+        return record["copy"]["isbn"]
+    return record.get("isbn")
+
+
+# Bir ödünç verme/iade işleminin değişiklikleri; önce bellekte uygulanır, sonra tek bir yazma ile kaydedilir
+@dataclass
+class _Circulation:
+    items: int = 0                                   # ödünç verilen ya da iade edilen nüsha sayısı
+    books: list = field(default_factory=list)        # ödünç durumu değişen kitaplar
+    copies: list = field(default_factory=list)       # ödünç durumu değişen nüshalar
+    loans: list = field(default_factory=list)        # açılan (ödünç verirken) ya da kapanan (iade ederken) ödünçler
+    holds: list = field(default_factory=list)        # sırası gelen ayırtmalar
+    handoffs: list = field(default_factory=list)     # sırası gelen üyelere açılan ödünçler
+
+
+DAY_SECONDS = 86400
+LEDGER_OPS = ("member", "member_remove", "loan", "loan_end", "hold", "hold_remove", "copy", "copy_remove",
+              "copy_status")
+
+
+# Başlık ve yazar indeksleri için büyük/küçük harf duyarsız anahtar üretir
+def _normalize_key(text: str) -> str:
+    return casefold_tr(text)
+
+
+PERSIST_ERROR = "Değişiklikler kaydedilemedi"
+# Kayıt bulunamadığı için başarısız olan işlemlerin hata mesajları; diğer hatalar kitabın ya da üyenin durumuyla çelişir
+NOT_FOUND_ERRORS = frozenset({"Kitap bulunamadı", "Üye bulunamadı", "Nüsha bulunamadı", "Ayırtma bulunamadı"})
+
+
+# Başarısız tekil işlemin (last_error) HTTP durum kodu: kayıt bulunamadıysa 404, değişiklik kaydedilemediyse
+# (disk ya da veritabanı hatası, sunucu tarafı) 503, işlem kitabın ya da üyenin durumuna uymuyorsa 400
+def error_status(error: str):
+    if error in NOT_FOUND_ERRORS:
+        return 404
+    return 503 if error == PERSIST_ERROR else 400
+
+
+# REST API ve web demo cevapları için ortak dönüşümler; zamanlar ISO 8601 (UTC) biçimindedir
+def project_loan(loan: Loan):
+    return {
+        "isbn": loan.isbn,
+        "barcode": loan.barcode,
+        "member_id": loan.member_id,
+        "borrowed_at": datetime.fromtimestamp(loan.borrowed_at, timezone.utc).isoformat(),
+        "due_at": datetime.fromtimestamp(loan.due_at, timezone.utc).isoformat()
+    }
+
+
+# Ayırtmayı ve üyenin sıradaki yerini JSON'a dönüştürür
+def project_hold(hold: Hold, position: int):
+    return {
+        "isbn": hold.isbn,
+        "member_id": hold.member_id,
+        "placed_at": datetime.fromtimestamp(hold.placed_at, timezone.utc).isoformat(),
+        "position": position
+    }
+
+
+# Dolaşım olayını JSON'a dönüştürür
+def project_event(event: dict):
+    return {"time": datetime.fromtimestamp(event["ts"], timezone.utc).isoformat(), "type": event["type"],
+            "isbn": event["isbn"], "member_id": event["member_id"]}
+
+
+# İstekteki zamanı Unix zamanına dönüştürür; saat dilimi belirtilmeyen zamanlar UTC kabul edilir
+def to_timestamp(value: datetime = None):
+    if value is None:
+        return None
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+
+
 class Library:
-    def __init__(self, name: str, json_file: str = "library.json"):
+    def __init__(self, name: str, json_file: str = "library.json", journal: bool = False,
+                 compact_after: int = 1000, metadata_cache: MetadataCache = None,
+                 background_writer: bool = False, binary_snapshot: bool = False, storage: StorageBackend = None,
+                 book_cache_size: int = 1024, shared: bool = False, loan_days: int = 14, event_log: EventLog = None):
         self.name = name
-        self._books = []
-        self.json_file = json_file       # verileri kaydetmek için JSON dosyası
+        self._books = {}                 # kitap -> None; ekleme sırasını korur, silme O(1)
+        self._isbn_index = {}            # ISBN -> kitap
+        self._title_index = {}           # normalize edilmiş başlık -> kitaplar
+        self._author_index = {}          # normalize edilmiş yazar -> kitaplar
+        self.search_index = SearchIndex()  # başlık/yazar üzerinde serbest metin araması
+        self._sorted_isbns = SortedKeys()  # imleç tabanlı sayfalama için sıralı ISBN'ler
+        # Üye ve ödünç defteri; pushdown modunda veritabanında tutulur ve indekslerle sorgulanır
+        self._members = {}               # üye no -> üye
+        self._loans = {}                 # barkod -> aktif ödünç
+        self._isbn_loans = {}            # ISBN -> {barkod: ödünç}
+        self._member_loans = {}          # üye no -> {barkod: ödünç}
+        self._due_index = SortedKeys()   # iade tarihine göre sıralı (iade tarihi, barkod) anahtarları
+        # Nüshalar: nüshası kaydedilmemiş kitap tek nüshadır ve ödünç durumu kitabın durumudur. Nüshalı kitabın
+        # boştaki nüshaları serbest listede tutulur, "herhangi bir boş nüsha" O(1) ile alınır; kitap ancak boşta
+        # nüshası kalmayınca ödünç verilmiş sayılır. Sayaçlar değişikliklerle birlikte güncellenir, taranmaz.
+        self._copies = {}                # barkod -> nüsha
+        self._title_copies = {}          # ISBN -> {barkod: nüsha}
+        self._free_copies = {}           # ISBN -> OrderedDict(barkod -> boştaki nüsha); boş listeler tutulmaz
+        self._free_copy_count = 0        # boştaki nüsha sayısı
+        # Ayırtma sıraları; sıradaki üye sıranın başıdır (O(1)), iptal edilen ayırtma sıradan O(1) ile çıkarılır
+        self._holds = {}                 # ISBN -> OrderedDict(üye no -> ayırtma), ayırtma sırasıyla
+        self._member_holds = {}          # üye no -> {ISBN: ayırtma}
+        self.loan_days = loan_days       # üyeye ödünç verilen kitabın varsayılan süresi (gün)
+        # İade tarihi heap'i; gecikmiş ödünçler kitaplar ya da ödünçler taranmadan bulunur
+        # pushdown modunda heap kullanılmaz, gecikmeler idx_loans_due üzerinden son kontrolden itibaren sorgulanır
+        self.scheduler = DueScheduler()
+        self._overdue_checked = float("-inf")  # pushdown: son gecikme kontrolünün zamanı
+        self._overdue_seen = 0                 # pushdown: son kontrolde görülen en büyük ödünç id'si
+        self._overdue_lock = threading.Lock()
+        self._reset_counters()
+        self._borrow_operations = 0      # başlangıçtan beri yapılan ödünç verme işlemleri
+        self._return_operations = 0      # başlangıçtan beri yapılan iade işlemleri
+        # Eşzamanlı kullanım için kilitler; alınma sırası:
+        # ISBN kilidi -> arka ucun süreçler arası kilidi -> kayıt kilidi -> okuma/yazma kilidi
+        self._lock = RWLock()            # liste, indeksler ve sayaçlar (okumalar birbirini beklemez)
+        self._isbn_locks = StripedLock() # aynı ISBN üzerindeki kontrol-değiştir-kaydet adımlarını sıralar
+        self._persist_lock = threading.Lock()  # kayıtların ve anlık görüntülerin arka uca gönderilme sırası
+        # Kalıcılık depolama arka ucuna bırakılır (JSON, SQLite ya da bellek)
+        # storage verilmezse json_file ve günlük ayarlarıyla bir JsonStorage oluşturulur
+        # shared açıksa aynı dosyaları birden fazla süreç (ör. uvicorn worker'ları) kullanabilir
+        self.storage = storage or JsonStorage(json_file, journal, compact_after, background_writer, binary_snapshot,
+                                              shared)
+        self._snapshot = None            # henüz kitap nesnelerine dönüştürülmemiş binary anlık görüntü
+        # Arka uç sorguları kendisi yanıtlıyorsa (SQLite pushdown) kitaplar belleğe yüklenmez;
+        # yalnızca son kullanılan kitaplar sınırlı bir LRU önbellekte tutulur
+        self._pushdown = self.storage.serves_queries
+        self._hot_books = OrderedDict()  # ISBN -> kitap (pushdown modunda)
+        self.book_cache_size = book_cache_size
+        self._cache_lock = threading.Lock()
+        # OpenLibrary cevapları için önbellek, varsayılan olarak veri dosyasının yanında tutulur
+        cache_file = str(Path(self.storage.path).with_suffix(".cache.db")) if self.storage.path else None
+        self.metadata_cache = metadata_cache or MetadataCache(cache_file)
+        # Ekleme, silme, ödünç verme ve iade olaylarının geçmişi; verilmezse bellekte tutulur
+        self.event_log = event_log or EventLog()
+        self._http_client = None         # OpenLibrary istekleri için paylaşılan istemci
+        self._async_http_client = None   # async istekler için paylaşılan istemci
         self.display = UnicodeDisplay()  # mesaj gösterme için
-        self.load_from_json()
+        self._errors = threading.local()  # thread başına son başarısız tekil işlemin hata mesajı (last_error)
+        self.load()
+
+    # Bu thread'de son başarısız olan tekil kitap, üye, nüsha ya da ayırtma işleminin hata mesajı
+    # (ör. "Kitap bulunamadı"); API'ler False dönen çağrının nedenini buradan okur
+    @property
+    def last_error(self):
+        return getattr(self._errors, "message", None)
+
+    # Tekil işlemin başarısızlığını kaydeder ve gösterir; False döndürür
+    def _fail(self, error: str, message: str = None):
+        self._errors.message = error
+        self.display.error(message or f"Hata: {error}")
+        return False
 
     # Kitap nesnesini dict formatına dönüştürür
     def _book_to_dict(self, book: Book):
@@ -107,132 +319,1287 @@ class Library:
         book.is_borrowed = book_dict.get("is_borrowed", False)
         return book
 
-    # Kütüphane verilerini JSON dosyasına kaydeder
-    def save_to_json(self):
-        try:
-            books_data = [self._book_to_dict(book) for book in self._books]
-            library_data = {
-                "name": self.name,
-                "books": books_data
-            }
+    # Arka planda bekleyen yazmaların diske ulaşmasını bekler
+    def flush(self):
+        self.storage.flush()
+        self.event_log.flush()
+
+    # Bekleyen yazmaları tamamlar, depolama arka ucunu, olay günlüğünü, OpenLibrary önbelleğini ve HTTP istemcisini
+    # kapatır
+    def close(self):
+        self.storage.close()
+        self.event_log.close()
+        with self._lock.write():
+            if self._snapshot is not None:
+                self._snapshot.close()
+                self._snapshot = None
+        self.metadata_cache.close()
+        if self._http_client is not None:
+            self._http_client.close()
+            self._http_client = None
 
-            with open(self.json_file, 'w', encoding='utf-8') as f:
-                json.dump(library_data, f, indent=2, ensure_ascii=False)
+    # close()'un async karşılığı; async HTTP istemcisini de kapatır
+    async def aclose(self):
+        if self._async_http_client is not None:
+            await self._async_http_client.aclose()
+            self._async_http_client = None
+        self.close()
 
-            self.display.success(f"Kütüphane verileri {self.json_file} dosyasına kaydedildi.")
+    # Kütüphanenin tamamını arka uca yazar (JSON günlük modunda bu işlem sıkıştırmadır)
+    # Paylaşımlı modda önce diğer süreçlerin değişiklikleri alınır, böylece onların yazdıkları ezilmez
+    @timed("save")
+    def save(self):
+        with self.storage.exclusive():
+            self._sync()
+            with self._persist_lock:
+                return self._save_snapshot()
+
+    # _persist_lock tutulurken çağrılır
+    # pushdown modunda veritabanı zaten günceldir, bellekte yazılacak bir kopya yoktur
+    def _save_snapshot(self):
+        if self._pushdown:
             return True
-        except Exception as e:
-            self.display.error(f"JSON dosyasına kaydederken hata oluştu: {e}")
-            return False
+        # Veri çağıran thread'de kopyalanır, arka plandaki yazma sonraki değişikliklerden etkilenmez
+        self._ensure_loaded()
+        with self._lock.read():
+            books = [self._book_to_dict(book) for book in self._books]
+            ledger = {"members": [self._member_to_dict(member) for member in self._members.values()],
+                      "loans": [self._loan_to_dict(loan) for loan in self._loans.values()],
+                      "holds": [self._hold_to_dict(hold) for queue in self._holds.values() for hold in queue.values()],
+                      "copies": [self._copy_to_dict(copy) for copy in self._copies.values()]}
+        return self.storage.save(self.name, books, ledger)
 
-    # Kütüphane verilerini JSON dosyasından yükler
-    def load_from_json(self):
-        try:
-            if not Path(self.json_file).exists():
-                self.display.warning(f" JSON dosyası {self.json_file} bulunamadı. Boş kütüphane ile başlanıyor.")
-                return False
+    def _member_to_dict(self, member: Member):
+        return {"member_id": member.member_id, "name": member.name, "email": member.email}
 
-            with open(self.json_file, 'r', encoding='utf-8') as f:
-                library_data = json.load(f)
+    def _loan_to_dict(self, loan: Loan):
+        return {"isbn": loan.isbn, "member_id": loan.member_id, "borrowed_at": loan.borrowed_at,
+                "due_at": loan.due_at, "barcode": loan.barcode}
 
-            self.name = library_data.get("name", self.name)
-            books_data = library_data.get("books", [])
+    def _copy_to_dict(self, copy: Copy):
+        return {"barcode": copy.barcode, "isbn": copy.isbn, "on_loan": copy.on_loan}
 
-            self._books = [self._dict_to_book(book_dict) for book_dict in books_data]
-            self.display.success(f"{self.total_books} kitap {self.json_file} dosyasından yüklendi.")
+    def _hold_to_dict(self, hold: Hold):
+        return {"isbn": hold.isbn, "member_id": hold.member_id, "placed_at": hold.placed_at}
+
+    # Kütüphaneyi arka uçtan yükler
+    # Binary anlık görüntü kitaplar oluşturulmadan açılır, kitaplar ilk ihtiyaç anında çözülür
+    @timed("load")
+    def load(self):
+        self.name, books = self.storage.load(self.name)
+        self._load_ledger(self.storage.load_ledger())
+        if isinstance(books, SnapshotReader):
+            self._open_binary_snapshot(books)
             return True
-        except Exception as e:
-            self.display.error(f"JSON dosyasından yüklerken hata oluştu: {e}")
-            return False
 
+        books = [self._dict_to_book(book_dict) for book_dict in books]
+        with self._lock.write():
+            self._books = dict.fromkeys(books)
+            self._rebuild_indexes()
+        return bool(books)
+
+    # Eski adlar: arka uçtan önceki JSON'a özgü API'yi kullanan çağıranlar için
+    save_to_json = save
+    load_from_json = load
+
+    # Üye, ödünç, ayırtma ve nüsha indekslerini yeniden kurar; iade tarihi indeksi bir kez sıralanır
+    def _load_ledger(self, ledger: dict):
+        with self._lock.write():
+            self._members = {member["member_id"]: Member(**member) for member in ledger["members"]}
+            self._loans = {}
+            self._isbn_loans = {}
+            self._member_loans = {}
+            for loan_dict in ledger["loans"]:
+                loan = Loan(**loan_dict)
+                self._loans[loan.barcode] = loan
+                self._isbn_loans.setdefault(loan.isbn, {})[loan.barcode] = loan
+                self._member_loans.setdefault(loan.member_id, {})[loan.barcode] = loan
+            self._due_index = SortedKeys((loan.due_at, loan.barcode) for loan in self._loans.values())
+            self._holds = {}
+            self._member_holds = {}
+            for hold_dict in ledger["holds"]:
+                hold = Hold(**hold_dict)
+                self._holds.setdefault(hold.isbn, OrderedDict())[hold.member_id] = hold
+                self._member_holds.setdefault(hold.member_id, {})[hold.isbn] = hold
+            self._copies = {}
+            self._title_copies = {}
+            self._free_copies = {}
+            self._free_copy_count = 0
+            self._index_copies(Copy(**copy) for copy in ledger["copies"])
+        if self._pushdown:
+            self._overdue_checked = float("-inf")
+            self._overdue_seen = 0
+        else:
+            self.scheduler.rebuild(self._loans.values(), time.time())
+
+    # Binary anlık görüntüyü kullanmaya başlar; sayaçlar dosya başlığından alınır
+    def _open_binary_snapshot(self, snapshot: SnapshotReader):
+        with self._lock.write():
+            if self._snapshot is not None:
+                self._snapshot.close()
+            self._books = {}
+            self._rebuild_indexes()
+            self._snapshot = snapshot
+            self._borrowed_count = snapshot.borrowed_count
+            self._type_counts = Counter(snapshot.type_counts)
+
+    # Binary anlık görüntüdeki kitapları ilk ihtiyaç anında nesnelere dönüştürür ve indeksleri kurar
+    # Okuma kilidi tutulurken çağrılmamalıdır
+    def _ensure_loaded(self):
+        if self._snapshot is None:
+            return
+        with self._lock.write():
+            snapshot = self._snapshot
+            if snapshot is None:
+                return
+            self._books = dict.fromkeys(self._dict_to_book(book_dict) for book_dict in snapshot)
+            self._rebuild_indexes()
+            self._snapshot = None
+        snapshot.close()
+
+    # Paylaşımlı modda diğer süreçlerin yaptığı değişiklikleri belleğe uygular
+    # Yeni günlük kayıtları tek tek uygulanır; anlık görüntü yeniden yazıldıysa kütüphane yeniden yüklenir
+    # pushdown modunda sorgular zaten veritabanından yapılır, yalnızca kitap önbelleği temizlenir
+    # Okuma kilidi tutulurken çağrılmamalıdır
+    def _sync(self):
+        if not self.storage.shared:
+            return
+        with self.storage.shared_lock():
+            change = self.storage.poll()
+            if change is None:
+                return
+            if change == RELOAD:
+                if self._pushdown:
+                    with self._cache_lock:
+                        self._hot_books.clear()
+                else:
+                    self.load()
+            else:
+                self._apply_records(change)
+
+    # Başka bir sürecin yazdığı kayıtları bellekteki kitaplara uygular; kayıtlar idempotenttir
+    # Sayaçlardan yalnızca ödünç sayısı değişir, ödünç/iade işlem sayıları bu sürecin işlemlerini sayar
+    def _apply_records(self, records):
+        self._ensure_loaded()
+        for record in records:
+            op = record.get("op")
+            if op in LEDGER_OPS:
+                self._apply_ledger_record(record)
+                continue
+            book = self._isbn_index.get(_record_isbn(record))
+            if book is not None and op in ("upsert", "remove"):
+                self._detach_book(book)
+                book = None
+            if op in ("add", "upsert") and book is None:
+                self._attach_book(self._dict_to_book(record["book"]))
+            elif op == "status" and book is not None and book.is_borrowed != record["is_borrowed"]:
+                with self._lock.write():
+                    book.is_borrowed = record["is_borrowed"]
+                    self._borrowed_count += 1 if book.is_borrowed else -1
+
+    # Üye, ödünç, ayırtma ve nüsha kayıtlarını deftere uygular; mevcut kayıt önce çıkarılır
+    def _apply_ledger_record(self, record: dict):
+        op = record["op"]
+        if op in ("copy", "copy_remove", "copy_status"):
+            copy = self._copies.get(record["copy"]["barcode"] if op == "copy" else record["barcode"])
+            if copy is not None:
+                self._detach_copies([copy])
+            if op == "copy":
+                self._attach_copies([Copy(**record["copy"])])
+            elif op == "copy_status" and copy is not None:
+                self._attach_copies([Copy(copy.barcode, copy.isbn, record["on_loan"])])
+            return
+        if op in ("hold", "hold_remove"):
+            hold_dict = record["hold"] if op == "hold" else record
+            hold = self._holds.get(hold_dict["isbn"], {}).get(hold_dict["member_id"])
+            if op == "hold" and hold is None:
+                self._attach_holds([Hold(**hold_dict)])
+            elif op == "hold_remove" and hold is not None:
+                self._detach_holds([hold])
+            return
+        if op in ("member", "member_remove"):
+            member_id = record["member"]["member_id"] if op == "member" else record["member_id"]
+            member = self._members.get(member_id)
+            if member is not None:
+                self._detach_member(member)
+            if op == "member":
+                self._attach_member(Member(**record["member"]))
+            return
+        loan = self._loans.get(loan_barcode(record["loan"] if op == "loan" else record))
+        if loan is not None:
+            self._detach_loans([loan])
+        if op == "loan":
+            self._attach_loans([Loan(**record["loan"])])
+
+    # Değişiklik bölümü: ISBN kilitleri ve arka ucun süreçler arası kilidi alınır, ardından diğer süreçlerin
+    # değişiklikleri uygulanır; kontrol ve değişiklik her zaman verinin son hali üzerinde yapılır
+    @contextmanager
+    def _mutation(self, isbns):
+        with self._isbn_locks.for_keys(isbns), self.storage.exclusive():
+            self._sync()
+            yield
+
+    # Değişiklikleri kalıcı hale getirir; birden fazla kayıt arka uca tek bir yazma işlemiyle gönderilir
+    # Arka uç isterse (ör. günlüksüz JSON, günlük eşiği) ardından kütüphanenin tamamı yazılır
+    # Kayıtlar ilgili ISBN kilidi tutulurken gönderilir; aynı kitaptaki değişiklikler arka uca sırayla ulaşır
+    def _persist(self, *records: dict):
+        with self._persist_lock:
+            if not self.storage.commit(list(records)):
+                # pushdown modunda veritabanı bizim gördüğümüzden farklı; ilgili kitaplar önbellekten çıkarılır
+                if self._pushdown:
+                    self._evict_hot_books(_record_isbn(record) for record in records)
+                return False
+            if self.storage.needs_snapshot:
+                return self._save_snapshot()
+            return True
+
+    # İstatistik sayaçlarını sıfırlar; kitaplar indekslenirken yeniden sayılır
+    def _reset_counters(self):
+        self._borrowed_count = 0         # ödünç verilmiş kitap sayısı
+        self._type_counts = Counter()    # kitap türü -> kitap sayısı
+        self._author_counts = Counter()  # yazar -> kitap sayısı
+
+    # Kitapların ödünç durumunu değiştirir, sayaçları günceller; undo ile değişiklik geri alınır
+    def _apply_status(self, books, borrowed: bool, undo: bool = False):
+        count = -len(books) if undo else len(books)
+        with self._lock.write():
+            for book in books:
+                book.is_borrowed = borrowed != undo
+            self._borrowed_count += count if borrowed else -count
+
+    # Kitabı ISBN, başlık ve yazar indekslerine ekler
+    # Toplu yeniden kurmada (sort_isbns=False) sıralı ISBN'ler sonunda tek seferde oluşturulur
+    def _index_book(self, book: Book, sort_isbns: bool = True):
+        if sort_isbns and book.isbn not in self._isbn_index:
+            self._sorted_isbns.add(book.isbn)
+        self._isbn_index.setdefault(book.isbn, book)
+        self._type_counts[type(book).__name__] += 1
+        self._author_counts[book.author] += 1
+        if book.is_borrowed:
+            self._borrowed_count += 1
+        self._title_index.setdefault(_normalize_key(book.title), []).append(book)
+        self._author_index.setdefault(_normalize_key(book.author), []).append(book)
+        self.search_index.add(book.isbn, book.title, book.author)
+
+    # Kitabı indekslerden çıkarır
+    def _unindex_book(self, book: Book):
+        self._type_counts[type(book).__name__] -= 1
+        self._author_counts[book.author] -= 1
+        if not self._author_counts[book.author]:
+            del self._author_counts[book.author]
+        if book.is_borrowed:
+            self._borrowed_count -= 1
+        if self._isbn_index.get(book.isbn) is book:
+            del self._isbn_index[book.isbn]
+            self._sorted_isbns.remove(book.isbn)
+            self.search_index.remove(book.isbn)
+        for index, key in ((self._title_index, _normalize_key(book.title)),
+                           (self._author_index, _normalize_key(book.author))):
+            bucket = index.get(key)
+            if bucket and book in bucket:
+                bucket.remove(book)
+                if not bucket:
+                    del index[key]
+
+    # Tüm indeksleri kitap listesinden yeniden oluşturur
+    def _rebuild_indexes(self):
+        self._isbn_index = {}
+        self._title_index = {}
+        self._author_index = {}
+        self.search_index = SearchIndex()
+        self._reset_counters()
+        for book in self._books:
+            self._index_book(book, sort_isbns=False)
+        self._sorted_isbns = SortedKeys(self._isbn_index)
+
+    # Kitapları listeye ve indekslere ekler
+    # pushdown modunda bellekte indeks yoktur; kitaplar ilk okunduklarında önbelleğe alınır
+    def _attach_books(self, books):
+        if self._pushdown:
+            return
+        with self._lock.write():
+            for book in books:
+                self._books[book] = None
+                self._index_book(book)
+
+    # Kitapları listeden ve indekslerden çıkarır (pushdown modunda önbellekten)
+    def _detach_books(self, books):
+        if self._pushdown:
+            self._evict_hot_books(book.isbn for book in books)
+            return
+        with self._lock.write():
+            for book in books:
+                del self._books[book]
+                self._unindex_book(book)
+
+    def _attach_book(self, book: Book):
+        self._attach_books([book])
+
+    def _evict_hot_books(self, isbns):
+        with self._cache_lock:
+            for isbn in isbns:
+                self._hot_books.pop(isbn, None)
+
+    # Önbellek sınırı aşıldıysa en uzun süredir kullanılmayan kitapları çıkarır; _cache_lock tutulurken çağrılır
+    def _trim_hot_books(self):
+        while len(self._hot_books) > self.book_cache_size:
+            self._hot_books.popitem(last=False)
+
+    # pushdown modunda kitabı önce önbellekten, yoksa veritabanından okur
+    # Aynı ISBN için önbellekteki nesne döndürülür; böylece değişiklikler her zaman aynı nesne üzerinde yapılır
+    def _hot_find(self, isbn: str):
+        with self._cache_lock:
+            book = self._hot_books.get(isbn)
+            if book is not None:
+                self._hot_books.move_to_end(isbn)
+                return book
+        book_dict = self.storage.find(isbn)
+        if book_dict is None:
+            return None
+        with self._cache_lock:
+            book = self._hot_books.setdefault(isbn, self._dict_to_book(book_dict))
+            self._trim_hot_books()
+        return book
+
+    # pushdown sorgularından gelen sözlükleri kitap nesnelerine dönüştürür
+    # Sonuçlar veritabanının o anki durumunu gösterir; önbelleğe alınmaz
+    def _books_from_dicts(self, book_dicts):
+        return [self._dict_to_book(book_dict) for book_dict in book_dicts]
+
+    def _detach_book(self, book: Book):
+        self._detach_books([book])
+
+    # Defter değişiklikleri de önce bellekte yapılır; pushdown modunda defter yalnızca veritabanındadır
+    def _attach_member(self, member: Member):
+        if self._pushdown:
+            return
+        with self._lock.write():
+            self._members[member.member_id] = member
+
+    def _detach_member(self, member: Member):
+        if self._pushdown:
+            return
+        with self._lock.write():
+            self._members.pop(member.member_id, None)
+
+    # Ödünçleri barkod, ISBN, üye ve iade tarihi indekslerine ve zamanlayıcıya ekler
+    def _attach_loans(self, loans):
+        if self._pushdown:
+            return
+        for loan in loans:
+            self.scheduler.schedule(loan)
+        with self._lock.write():
+            for loan in loans:
+                self._loans[loan.barcode] = loan
+                self._isbn_loans.setdefault(loan.isbn, {})[loan.barcode] = loan
+                self._member_loans.setdefault(loan.member_id, {})[loan.barcode] = loan
+                self._due_index.add((loan.due_at, loan.barcode))
+
+    def _detach_loans(self, loans):
+        if self._pushdown:
+            return
+        for loan in loans:
+            self.scheduler.cancel(loan.barcode)
+        with self._lock.write():
+            for loan in loans:
+                del self._loans[loan.barcode]
+                for index, key in ((self._isbn_loans, loan.isbn), (self._member_loans, loan.member_id)):
+                    bucket = index[key]
+                    del bucket[loan.barcode]
+                    if not bucket:
+                        del index[key]
+                self._due_index.remove((loan.due_at, loan.barcode))
+
+    # Nüshaları kitapların nüsha listelerine, boştakileri serbest listeye ekler; yazma kilidi tutulurken çağrılır
+    def _index_copies(self, copies):
+        for copy in copies:
+            self._copies[copy.barcode] = copy
+            self._title_copies.setdefault(copy.isbn, {})[copy.barcode] = copy
+            if not copy.on_loan:
+                self._free_copies.setdefault(copy.isbn, OrderedDict())[copy.barcode] = copy
+                self._free_copy_count += 1
+
+    def _unindex_copies(self, copies):
+        for copy in copies:
+            del self._copies[copy.barcode]
+            title_copies = self._title_copies[copy.isbn]
+            del title_copies[copy.barcode]
+            if not title_copies:
+                del self._title_copies[copy.isbn]
+            if not copy.on_loan:
+                self._take_free_copy(copy)
+
+    # Nüshayı serbest listeden çıkarır; yazma kilidi tutulurken çağrılır
+    def _take_free_copy(self, copy: Copy):
+        free = self._free_copies[copy.isbn]
+        del free[copy.barcode]
+        if not free:
+            del self._free_copies[copy.isbn]
+        self._free_copy_count -= 1
+
+    def _attach_copies(self, copies):
+        if self._pushdown:
+            return
+        with self._lock.write():
+            self._index_copies(copies)
+
+    def _detach_copies(self, copies):
+        if self._pushdown:
+            return
+        with self._lock.write():
+            self._unindex_copies(copies)
+
+    # Nüshaların ödünç durumunu değiştirir ve serbest listeyi günceller; undo ile değişiklik geri alınır
+    def _apply_copies(self, copies, borrowed: bool, undo: bool = False):
+        if self._pushdown or not copies:
+            return
+        on_loan = borrowed != undo
+        with self._lock.write():
+            for copy in copies:
+                copy.on_loan = on_loan
+                if on_loan:
+                    self._take_free_copy(copy)
+                else:
+                    self._free_copies.setdefault(copy.isbn, OrderedDict())[copy.barcode] = copy
+                    self._free_copy_count += 1
+
+    # Ayırtmaları kitapların sırasının sonuna (front ile başına, geri alırken) ekler
+    def _attach_holds(self, holds, front: bool = False):
+        if self._pushdown:
+            return
+        with self._lock.write():
+            for hold in holds:
+                queue = self._holds.setdefault(hold.isbn, OrderedDict())
+                queue[hold.member_id] = hold
+                if front:
+                    queue.move_to_end(hold.member_id, last=False)
+                self._member_holds.setdefault(hold.member_id, {})[hold.isbn] = hold
+
+    def _detach_holds(self, holds):
+        if self._pushdown:
+            return
+        with self._lock.write():
+            for hold in holds:
+                queue = self._holds[hold.isbn]
+                del queue[hold.member_id]
+                if not queue:
+                    del self._holds[hold.isbn]
+                member_holds = self._member_holds[hold.member_id]
+                del member_holds[hold.isbn]
+                if not member_holds:
+                    del self._member_holds[hold.member_id]
+
+    # Değişiklikler önce bellekte yapılır, sonra kaydedilir; kaydedilemezse bellekteki değişiklik geri alınır
+    @timed("add_book")
     def add_book(self, book: Book):
-        # ISBN ile kontrol
-        existing_book = self.find_book_by_isbn(book.isbn)
-        if existing_book:
-            self.display.warning(f" Kitap zaten mevcut: {existing_book.display_info()}")
-            return False
+        self._ensure_loaded()
+        with self._mutation([book.isbn]):
+            # ISBN ile kontrol
+            existing_book = self.find_book_by_isbn(book.isbn)
+            if existing_book:
+                self.display.warning(f" Kitap zaten mevcut: {existing_book.display_info()}")
+                return False
 
-        self._books.append(book)
-        self.display.success(f"Kitap başarıyla eklendi: {book.display_info()}")
-        self.save_to_json()
-        return True
+            self._attach_book(book)
+            if not self._persist({"op": "add", "book": self._book_to_dict(book)}):
+                self._detach_book(book)
+                return False
+            self.event_log.record("add", book.isbn)
+            self.display.success(f"Kitap başarıyla eklendi: {book.display_info()}")
+            return True
 
+    @timed("remove_book")
     def remove_book(self, isbn: str):
-        book = self.find_book_by_isbn(isbn)
-        if book:
-            self._books.remove(book)
+        self._ensure_loaded()
+        with self._mutation([isbn]):
+            book = self.find_book_by_isbn(isbn)
+            if not book:
+                return self._fail("Kitap bulunamadı", f"ISBN {isbn} ile kitap bulunamadı.")
+            if self.title_loans(isbn):
+                return self._fail("Kitap bir üyede, silinemez", f"Kitap bir üyede, silinemez: {book.display_info()}")
+            if self._next_hold(isbn):
+                return self._fail("Kitabı bekleyen ayırtmalar var, silinemez",
+                                  f"Kitabı bekleyen ayırtmalar var, silinemez: {book.display_info()}")
+
+            copies = self.copies(isbn)
+            self._detach_book(book)
+            self._detach_copies(copies)
+            if not self._persist({"op": "remove", "isbn": isbn}, *self._copy_remove_records(copies)):
+                self._attach_copies(copies)
+                self._attach_book(book)
+                return self._fail(PERSIST_ERROR)
+            self.event_log.record("remove", isbn)
             self.display.success(f"Kitap başarıyla silindi: {book.display_info()}")
-            self.save_to_json()
             return True
-        else:
-            self.display.error(f"ISBN {isbn} ile kitap bulunamadı.")
-            return False
 
-    def borrow_book(self, isbn: str):
-        book = self.find_book_by_isbn(isbn)
-        if book:
-            try:
-                book.borrow_book()
-                self.display.success(f"Kitap ödünç verildi: {book.display_info()}")
-                self.save_to_json()
+    # member_id verilirse kitap üyeye ödünç verilir ve deftere bir ödünç açılır (iade tarihi varsayılan olarak
+    # loan_days gün sonrası); verilmezse yalnızca kitabın ödünç durumu değişir
+    # Nüshalı kitapta boştaki herhangi bir nüsha verilir; üye aynı kitaptan ikinci bir nüsha alamaz
+    @timed("borrow_book")
+    def borrow_book(self, isbn: str, member_id: str = None, due_at: float = None):
+        return self._change_borrowed(isbn, True, member_id, due_at)
+
+    # Kitabın aktif ödüncü varsa kapatılır; member_id verilirse kitap o üyede olmalıdır
+    # Nüshalı kitapta iade edilen nüsha barkodla, verilmezse üyenin ödüncüyle, o da yoksa ödünçteki herhangi bir
+    # nüsha olarak seçilir
+    # Kitabın ayırtma sırası varsa nüsha rafa dönmez, aynı yazmada sıradaki üyeye ödünç verilir
+    @timed("return_book")
+    def return_book(self, isbn: str, member_id: str = None, barcode: str = None):
+        return self._change_borrowed(isbn, False, member_id, barcode=barcode)
+
+    # Ödünç durumunu karşılaştır-ve-değiştir (compare-and-set) ile değiştirir
+    # Durum beklenen değilse (ör. kitap zaten ödünç verilmişse) hiçbir şey değişmez ve False döner
+    # Aynı kitabın durumu yalnızca ISBN kilidi tutulurken değiştirilir, kontrol ile değişiklik arasına kimse giremez
+    # Üye kilidi de alınır; böylece üye, ödünç alırken silinemez
+    def _change_borrowed(self, isbn: str, borrowed: bool, member_id: str = None, due_at: float = None,
+                         barcode: str = None):
+        self._ensure_loaded()
+        with self._mutation([isbn] if member_id is None else [isbn, member_id]):
+            book = self.find_book_by_isbn(isbn)
+            if not book:
+                return self._fail("Kitap bulunamadı", f"ISBN {isbn} ile kitap bulunamadı.")
+            circulation = _Circulation()
+            error = self._plan_circulation(circulation, book, borrowed, member_id, due_at, barcode)
+            if error:
+                return self._fail(error)
+
+            self._apply_circulation(circulation, borrowed)
+            if not self._persist(*self._circulation_records(circulation, borrowed)):
+                self._apply_circulation(circulation, borrowed, undo=True)
+                return self._fail(PERSIST_ERROR)
+            loans, handoffs = circulation.loans, circulation.handoffs
+            self.event_log.record("borrow" if borrowed else "return", isbn, loans[0].member_id if loans else member_id)
+            if handoffs:
+                self.event_log.record("borrow", isbn, handoffs[0].member_id)
+                self.display.success(f"Kitap iade edildi ve sıradaki üyeye ({handoffs[0].member_id}) ödünç verildi: "
+                                     f"{book.display_info()}")
                 return True
-            except Exception as e:
-                self.display.error(f"Hata: {e}")
-                return False
+            copy = f" (nüsha {circulation.copies[0].barcode})" if circulation.copies else ""
+            self.display.success(f"Kitap {'ödünç verildi' if borrowed else 'iade edildi'}{copy}: {book.display_info()}")
+            return True
+
+    # Kitap zaten istenen durumdaysa hata mesajını döndürür
+    def _status_error(self, book: Book, borrowed: bool):
+        if book.is_borrowed == borrowed:
+            return f"{book.title} zaten ödünç verildi." if borrowed else f"{book.title} ödünç verilmedi."
+        return None
+
+    # Bir kitabın ödünç verme/iade değişikliklerini planlayıp circulation'a ekler; geçersizse hata mesajını döndürür
+    # Planlama hiçbir şeyi değiştirmez, değişiklikler _apply_circulation ile uygulanır. Nüshalı kitapta ödünç
+    # verilecek nüsha serbest listenin başından alınır; kitap, son boş nüsha verilince ödünç verilmiş, ödünçteki
+    # nüshalardan biri dönünce yeniden mevcut sayılır. Nüshası kaydedilmemiş kitabın tek nüshası kitabın kendisidir.
+    def _plan_circulation(self, circulation: _Circulation, book: Book, borrowed: bool, member_id: str = None,
+                          due_at: float = None, barcode: str = None):
+        isbn = book.isbn
+        counts = self.copy_counts([isbn]).get(isbn)
+        now = time.time()
+        if borrowed:
+            error = self._status_error(book, True) or self._borrow_error(isbn, member_id)
+            if error:
+                return error
+            copy = self._pick_copy(isbn, False) if counts else None
+            circulation.items += 1
+            if copy:
+                circulation.copies.append(copy)
+            if not copy or counts[1] == 1:
+                circulation.books.append(book)
+            if member_id is not None:
+                circulation.loans.append(Loan(isbn, member_id, now, due_at or now + self.loan_days * DAY_SECONDS,
+                                              copy.barcode if copy else isbn))
+            return None
+
+        if counts:
+            copy, error = self._returned_copy(isbn, member_id, barcode)
         else:
-            self.display.error(f"ISBN {isbn} ile kitap bulunamadı.")
-            return False
+            copy, error = None, "Nüsha bulunamadı" if barcode not in (None, isbn) else self._status_error(book, False)
+        if error:
+            return error
+        barcode = copy.barcode if copy else isbn
+        loan = self.find_loan(barcode)
+        if member_id is not None and (loan is None or loan.member_id != member_id):
+            return "Kitap bu üyede değil"
+        circulation.items += 1
+        if loan:
+            circulation.loans.append(loan)
+        hold = self._next_hold(isbn)
+        if hold:
+            circulation.holds.append(hold)
+            circulation.handoffs.append(Loan(isbn, hold.member_id, now, now + self.loan_days * DAY_SECONDS, barcode))
+            return None
+        if copy:
+            circulation.copies.append(copy)
+        if book.is_borrowed:
+            circulation.books.append(book)
+        return None
 
-    def return_book(self, isbn: str):
-        book = self.find_book_by_isbn(isbn)
-        if book:
-            try:
-                book.return_book()
-                self.display.success(f"Kitap iade edildi: {book.display_info()}")
-                self.save_to_json()
-                return True
-            except Exception as e:
-                self.display.error(f"Hata: {e}")
-                return False
+    # Ödünç verilecek üye kayıtlı olmalı ve kitabın başka bir nüshası zaten üyede olmamalı
+    def _borrow_error(self, isbn: str, member_id: str):
+        if member_id is None:
+            return None
+        if not self.find_member(member_id):
+            return "Üye bulunamadı"
+        return "Kitap zaten bu üyede" if self._member_title_loan(member_id, isbn) else None
+
+    # Nüshalı kitapta iade edilecek nüsha; (nüsha, hata mesajı) döndürür
+    def _returned_copy(self, isbn: str, member_id: str, barcode: str):
+        if barcode is not None:
+            copy = self._find_copy(barcode)
+            if copy is None or copy.isbn != isbn:
+                return None, "Nüsha bulunamadı"
+        elif member_id is not None:
+            loan = self._member_title_loan(member_id, isbn)
+            if loan is None:
+                return None, "Kitap bu üyede değil"
+            copy = self._find_copy(loan.barcode)
         else:
-            self.display.error(f"ISBN {isbn} ile kitap bulunamadı.")
-            return False
+            copy = self._pick_copy(isbn, True)
+        if copy is None or not copy.on_loan:
+            return None, "Nüsha ödünç verilmedi"
+        return copy, None
+
+    # Planlanan değişiklikleri bellekte uygular ve işlem sayaçlarını günceller; undo ile ters sırada geri alınır
+    def _apply_circulation(self, circulation: _Circulation, borrowed: bool, undo: bool = False):
+        if undo:
+            self._apply_handoffs(circulation.holds, circulation.handoffs, undo=True)
+            self._apply_loans(circulation.loans, borrowed, undo=True)
+            self._apply_copies(circulation.copies, borrowed, undo=True)
+            self._apply_status(circulation.books, borrowed, undo=True)
+        else:
+            self._apply_status(circulation.books, borrowed)
+            self._apply_copies(circulation.copies, borrowed)
+            self._apply_loans(circulation.loans, borrowed)
+            self._apply_handoffs(circulation.holds, circulation.handoffs)
+        sign = -1 if undo else 1
+        with self._lock.write():
+            if borrowed:
+                self._borrow_operations += sign * circulation.items
+            else:
+                self._return_operations += sign * circulation.items
+            self._borrow_operations += sign * len(circulation.handoffs)
+
+    def _circulation_records(self, circulation: _Circulation, borrowed: bool):
+        return [*self._status_records(circulation.books, borrowed),
+                *({"op": "copy_status", "barcode": copy.barcode, "on_loan": borrowed} for copy in circulation.copies),
+                *self._loan_records(circulation.loans, borrowed),
+                *self._handoff_records(circulation.holds, circulation.handoffs)]
+
+    # Ödünçleri açar ya da kapatır; undo ile değişiklik geri alınır
+    def _apply_loans(self, loans, borrowed: bool, undo: bool = False):
+        if borrowed != undo:
+            self._attach_loans(loans)
+        else:
+            self._detach_loans(loans)
+
+    def _loan_records(self, loans, borrowed: bool):
+        if borrowed:
+            return [{"op": "loan", "loan": self._loan_to_dict(loan)} for loan in loans]
+        return [{"op": "loan_end", "isbn": loan.isbn, "barcode": loan.barcode} for loan in loans]
+
+    def _status_records(self, books, borrowed: bool):
+        return [{"op": "status", "isbn": book.isbn, "is_borrowed": borrowed} for book in books]
+
+    def _copy_remove_records(self, copies):
+        return [{"op": "copy_remove", "barcode": copy.barcode} for copy in copies]
+
+    # Ayırtmaları sıradan çıkarır ve sırası gelen üyelere ödünçleri açar; kapanan ödünçlerden sonra çağrılır.
+    # undo ile geri alınır, ayırtmalar sıranın başına döner
+    def _apply_handoffs(self, holds, loans, undo: bool = False):
+        if not holds:
+            return
+        if undo:
+            self._detach_loans(loans)
+            self._attach_holds(holds, front=True)
+        else:
+            self._detach_holds(holds)
+            self._attach_loans(loans)
+
+    def _handoff_records(self, holds, loans):
+        return [*({"op": "hold_remove", "isbn": hold.isbn, "member_id": hold.member_id} for hold in holds),
+                *self._loan_records(loans, True)]
+
+    # Toplu işlemler: her öğe kontrol edilir, biri bile geçersizse hiçbir değişiklik yapılmaz (ya hep ya hiç)
+    # Geçerli bir toplu işlem tek bir yazma ile kaydedilir; her ISBN için sonuç döndürülür
+    @timed("add_books")
+    def add_books(self, books):
+        self._ensure_loaded()
+        isbns = [book.isbn for book in books]
+        with self._mutation(isbns):
+            errors = self._batch_errors(isbns, lambda isbn: "Kitap zaten mevcut" if self.find_book_by_isbn(isbn) else None)
+            if not any(errors):
+                self._attach_books(books)
+                if not self._persist(*({"op": "add", "book": self._book_to_dict(book)} for book in books)):
+                    self._detach_books(books)
+                    errors = [PERSIST_ERROR] * len(isbns)
+                else:
+                    self.event_log.record_many(("add", isbn, None) for isbn in isbns)
+        return self._batch_results(isbns, errors, "Kitap eklendi")
+
+    @timed("remove_books")
+    def remove_books(self, isbns):
+        self._ensure_loaded()
+        isbns = list(isbns)
+        with self._mutation(isbns):
+            errors = self._batch_errors(isbns, lambda isbn: "Kitap bulunamadı" if not self.find_book_by_isbn(isbn) else
+                                        "Kitap bir üyede" if self.title_loans(isbn) else
+                                        "Kitabı bekleyen ayırtmalar var" if self._next_hold(isbn) else None)
+            if not any(errors):
+                books = [self.find_book_by_isbn(isbn) for isbn in isbns]
+                copies = [copy for isbn in isbns for copy in self.copies(isbn)]
+                self._detach_books(books)
+                self._detach_copies(copies)
+                if not self._persist(*({"op": "remove", "isbn": isbn} for isbn in isbns),
+                                     *self._copy_remove_records(copies)):
+                    self._attach_copies(copies)
+                    self._attach_books(books)
+                    errors = [PERSIST_ERROR] * len(isbns)
+                else:
+                    self.event_log.record_many(("remove", isbn, None) for isbn in isbns)
+        return self._batch_results(isbns, errors, "Kitap silindi")
+
+    @timed("borrow_books")
+    def borrow_books(self, isbns, member_id: str = None, due_at: float = None):
+        return self._change_borrowed_batch(list(isbns), True, member_id, due_at)
+
+    @timed("return_books")
+    def return_books(self, isbns, member_id: str = None):
+        return self._change_borrowed_batch(list(isbns), False, member_id)
+
+    def _change_borrowed_batch(self, isbns, borrowed: bool, member_id: str = None, due_at: float = None):
+        circulation = _Circulation()
+
+        def check(isbn: str):
+            book = self.find_book_by_isbn(isbn)
+            if not book:
+                return "Kitap bulunamadı"
+            return self._plan_circulation(circulation, book, borrowed, member_id, due_at)
+
+        self._ensure_loaded()
+        with self._mutation(isbns if member_id is None else isbns + [member_id]):
+            errors = self._batch_errors(isbns, check)
+            if not any(errors):
+                self._apply_circulation(circulation, borrowed)
+                if not self._persist(*self._circulation_records(circulation, borrowed)):
+                    self._apply_circulation(circulation, borrowed, undo=True)
+                    errors = [PERSIST_ERROR] * len(isbns)
+                else:
+                    members = {loan.isbn: loan.member_id for loan in circulation.loans}
+                    handed_over = {loan.isbn: loan.member_id for loan in circulation.handoffs}
+                    events = []
+                    for isbn in isbns:
+                        events.append(("borrow" if borrowed else "return", isbn, members.get(isbn, member_id)))
+                        if isbn in handed_over:
+                            events.append(("borrow", isbn, handed_over[isbn]))
+                    self.event_log.record_many(events)
+        return self._batch_results(isbns, errors, "Ödünç verildi" if borrowed else "İade edildi")
+
+    # Her ISBN için hata mesajını (ya da None) döndürür; aynı ISBN'in tekrarı da hatadır
+    def _batch_errors(self, isbns, check):
+        seen = set()
+        errors = []
+        for isbn in isbns:
+            if isbn in seen:
+                errors.append("ISBN toplu işlemde birden fazla kez geçiyor")
+            else:
+                seen.add(isbn)
+                errors.append(check(isbn))
+        return errors
+
+    def _batch_results(self, isbns, errors, success_message: str):
+        failed = any(errors)
+        if failed:
+            self.display.warning(f" Toplu işlem geri çevrildi: {sum(1 for e in errors if e)}/{len(isbns)} öğe geçersiz.")
+        elif isbns:
+            self.display.success(f"Toplu işlem: {len(isbns)} kitap - {success_message}.")
+        return [{"isbn": isbn, "success": not failed,
+                 "message": error or ("Diğer öğelerdeki hata nedeniyle uygulanmadı" if failed else success_message)}
+                for isbn, error in zip(isbns, errors)]
 
     def display_books(self):
-        if not self._books:
+        self._sync()
+        if self._pushdown:
+            books = list(self.iter_books())
+        else:
+            self._ensure_loaded()
+            with self._lock.read():
+                books = list(self._books)
+        if not books:
             self.display.info("Kütüphanede hiç kitap yok.")
             return
 
-        self.display.success(f"{self.name} - Toplam {self.total_books} kitap:")
+        self.display.success(f"{self.name} - Toplam {len(books)} kitap:")
         print("-" * 50)
-        for i, book in enumerate(self._books, 1):
+        for i, book in enumerate(books, 1):
             status = " (Ödünç verildi)" if book.is_borrowed else ""
             print(f"\t{i}. {book.display_info()}{status}")
 
+    @timed("find_book_by_title")
     def find_book_by_title(self, title: str):
-        for book in self._books:
-            if book.title.lower() == title.lower():
-                return book
-        return None
+        self._sync()
+        if self._pushdown:
+            books = self._books_from_dicts(self.storage.find_by_title(title, limit=1))
+            return books[0] if books else None
+        self._ensure_loaded()
+        with self._lock.read():
+            books = self._title_index.get(_normalize_key(title))
+            return books[0] if books else None
 
+    # Binary anlık görüntü henüz yüklenmediyse kitap dosyadan ikili arama ile okunur
+    @timed("find_book_by_isbn")
     def find_book_by_isbn(self, isbn: str):
-        for book in self._books:
-            if book.isbn == isbn:
-                return book
-        return None
+        self._sync()
+        if self._pushdown:
+            return self._hot_find(isbn)
+        with self._lock.read():
+            if self._snapshot is not None:
+                book_dict = self._snapshot.find(isbn)
+                return self._dict_to_book(book_dict) if book_dict else None
+            return self._isbn_index.get(isbn)
 
+    @timed("find_book_by_author")
     def find_book_by_author(self, author: str):
-        for book in self._books:
-            if book.author.lower() == author.lower():
-                return book
+        self._sync()
+        if self._pushdown:
+            books = self._books_from_dicts(self.storage.find_by_author(author, limit=1))
+            return books[0] if books else None
+        self._ensure_loaded()
+        with self._lock.read():
+            books = self._author_index.get(_normalize_key(author))
+            return books[0] if books else None
+
+    # Verilen başlığa sahip tüm kitapları döndürür
+    @timed("find_books_by_title")
+    def find_books_by_title(self, title: str):
+        self._sync()
+        if self._pushdown:
+            return self._books_from_dicts(self.storage.find_by_title(title))
+        self._ensure_loaded()
+        with self._lock.read():
+            return list(self._title_index.get(_normalize_key(title), ()))
+
+    # Verilen yazara ait tüm kitapları döndürür
+    @timed("find_books_by_author")
+    def find_books_by_author(self, author: str):
+        self._sync()
+        if self._pushdown:
+            return self._books_from_dicts(self.storage.find_by_author(author))
+        self._ensure_loaded()
+        with self._lock.read():
+            return list(self._author_index.get(_normalize_key(author), ()))
+
+    # Kitapları ISBN sırasıyla, verilen ISBN'den (imleç) sonrasından başlayarak döndürür
+    # Liste parça parça okunur; dolaşma sırasında eklenen/silinen kitaplar sorun çıkarmaz
+    # Okuma kilidi yalnızca her parça hazırlanırken tutulur, kitaplar kilit dışında döndürülür
+    # Binary anlık görüntü henüz yüklenmediyse parçalar doğrudan dosyanın ISBN indeksinden okunur
+    # pushdown modunda her parça filtreler uygulanmış bir SQL sorgusudur
+    def iter_books(self, after: str = "", borrowed: bool = None, book_type: str = None, chunk_size: int = 500):
+        self._sync()
+        while True:
+            if self._pushdown:
+                chunk = self._books_from_dicts(self.storage.page(after, chunk_size, borrowed, book_type))
+            else:
+                chunk = self._read_chunk(after, chunk_size)
+            if not chunk:
+                return
+            for book in chunk:
+                if borrowed is not None and book.is_borrowed != borrowed:
+                    continue
+                if book_type and type(book).__name__ != book_type:
+                    continue
+                yield book
+            after = chunk[-1].isbn
+
+    # Bellekteki (ya da binary anlık görüntüdeki) kitaplardan ISBN sırasıyla bir parça okur
+    def _read_chunk(self, after: str, chunk_size: int):
+        with self._lock.read():
+            if self._snapshot is not None:
+                return [self._dict_to_book(book_dict) for book_dict in self._snapshot.page(after, chunk_size)]
+            return [self._isbn_index[isbn] for isbn in self._sorted_isbns.after(after, chunk_size)]
+
+    # Anahtar (keyset) tabanlı sayfalama: (kitaplar, sonraki sayfanın imleci) döndürür
+    @timed("page_books")
+    def page_books(self, limit: int, after: str = "", borrowed: bool = None, book_type: str = None):
+        books = list(islice(self.iter_books(after, borrowed, book_type), limit + 1))
+        next_cursor = books[limit - 1].isbn if len(books) > limit else None
+        return books[:limit], next_cursor
+
+    # Başlık ve yazarda kısmi ve hatalı yazımlı arama yapar, kitapları uygunluk sırasıyla döndürür
+    # offset ile sıralı sonuçlar sayfalanır
+    # pushdown modunda arama SQLite FTS5 indeksinde yapılır (bm25 sıralı, önek eşleşmeli; hatalı yazım desteği yoktur)
+    @timed("search_books")
+    def search_books(self, query: str, limit: int = 10, offset: int = 0):
+        self._sync()
+        if self._pushdown:
+            return self._books_from_dicts(self.storage.search(query, limit, offset))
+        self._ensure_loaded()
+        with self._lock.read():
+            return [self._isbn_index[isbn] for isbn, _ in self.search_index.search(query, limit + offset)[offset:]]
+
+    # Üyeler ve ödünçler: okumalar bellekteki indekslerden (pushdown modunda indeksli SQL sorgularından) yapılır
+    @timed("add_member")
+    def add_member(self, member: Member):
+        with self._mutation([member.member_id]):
+            if self.find_member(member.member_id):
+                return self._fail("Üye zaten mevcut", f"Üye zaten mevcut: {member.member_id}")
+
+            self._attach_member(member)
+            if not self._persist({"op": "member", "member": self._member_to_dict(member)}):
+                self._detach_member(member)
+                return self._fail(PERSIST_ERROR)
+            self.display.success(f"Üye eklendi: {member.name} ({member.member_id})")
+            return True
+
+    # Üzerinde ödünç kitap ya da bekleyen ayırtması bulunan üye silinemez
+    @timed("remove_member")
+    def remove_member(self, member_id: str):
+        with self._mutation([member_id]):
+            member = self.find_member(member_id)
+            if not member:
+                return self._fail("Üye bulunamadı", f"{member_id} numaralı üye bulunamadı.")
+            if self.member_loans(member_id):
+                return self._fail("Üyenin iade etmediği kitaplar var",
+                                  f"Üyenin iade etmediği kitaplar var: {member_id}")
+            if self.member_holds(member_id):
+                return self._fail("Üyenin bekleyen ayırtmaları var", f"Üyenin bekleyen ayırtmaları var: {member_id}")
+
+            self._detach_member(member)
+            if not self._persist({"op": "member_remove", "member_id": member_id}):
+                self._attach_member(member)
+                return self._fail(PERSIST_ERROR)
+            self.display.success(f"Üye silindi: {member.name} ({member_id})")
+            return True
+
+    @timed("find_member")
+    def find_member(self, member_id: str):
+        self._sync()
+        if self._pushdown:
+            member = self.storage.find_member(member_id)
+            return Member(**member) if member else None
+        with self._lock.read():
+            return self._members.get(member_id)
+
+    # Nüshanın aktif ödüncü (kimde olduğu), yoksa None; nüshası kaydedilmemiş kitabın barkodu ISBN'idir
+    @timed("find_loan")
+    def find_loan(self, barcode: str):
+        self._sync()
+        if self._pushdown:
+            loan = self.storage.find_loan(barcode)
+            return Loan(**loan) if loan else None
+        with self._lock.read():
+            return self._loans.get(barcode)
+
+    # Kitabın tüm nüshalarının ödünçleri, iade tarihi sırasıyla
+    @timed("title_loans")
+    def title_loans(self, isbn: str):
+        self._sync()
+        if self._pushdown:
+            return [Loan(**loan) for loan in self.storage.title_loans(isbn)]
+        with self._lock.read():
+            loans = list(self._isbn_loans.get(isbn, {}).values())
+        return sorted(loans, key=lambda loan: (loan.due_at, loan.barcode))
+
+    # Üyedeki, kitabın herhangi bir nüshasının ödüncü; yoksa None
+    def _member_title_loan(self, member_id: str, isbn: str):
+        return next((loan for loan in self.member_loans(member_id) if loan.isbn == isbn), None)
+
+    # Üyenin ödünçleri, iade tarihi sırasıyla; yalnızca üyenin kendi ödünçleri okunur
+    @timed("member_loans")
+    def member_loans(self, member_id: str):
+        self._sync()
+        if self._pushdown:
+            return [Loan(**loan) for loan in self.storage.member_loans(member_id)]
+        with self._lock.read():
+            loans = list(self._member_loans.get(member_id, {}).values())
+        return sorted(loans, key=lambda loan: (loan.due_at, loan.barcode))
+
+    # İade tarihi [since, until) aralığındaki ödünçler, iade tarihi sırasıyla (ör. until=time.time() ile gecikenler)
+    @timed("loans_due")
+    def loans_due(self, until: float, since: float = 0.0, limit: int = None):
+        self._sync()
+        if self._pushdown:
+            return [Loan(**loan) for loan in self.storage.loans_due(since, until, -1 if limit is None else limit)]
+        with self._lock.read():
+            keys = islice(self._due_index.irange((since,), (until,)), limit)
+            return [self._loans[barcode] for _, barcode in keys]
+
+    # Nüshalar: kitaba barkodlu fiziksel nüshalar eklenir. Nüshası kaydedilmemiş kitap, barkodu ISBN'i olan tek
+    # nüshadır; ilk nüshalar eklenirken bu nüsha da kitabın ödünç durumuyla kaydedilir, açık ödüncü geçerli kalır.
+    # barcodes verilmezse count kadar "<ISBN>-<sıra>" barkodu üretilir. Kitabı bekleyen ayırtmalar varsa yeni
+    # nüshalar aynı yazmada sıradaki üyelere ödünç verilir. Eklenen nüshaları, eklenemezse False döndürür.
+    @timed("add_copies")
+    def add_copies(self, isbn: str, barcodes=None, count: int = None):
+        self._ensure_loaded()
+        with self._mutation([isbn]):
+            book = self.find_book_by_isbn(isbn)
+            if not book:
+                return self._fail("Kitap bulunamadı", f"ISBN {isbn} ile kitap bulunamadı.")
+            counts = self.copy_counts([isbn]).get(isbn)
+            implicit = [] if counts else [Copy(isbn, isbn, book.is_borrowed)]
+            barcodes = list(barcodes) if barcodes is not None else self._new_barcodes(isbn, count or 0,
+                                                                                      1 + (counts or (1,))[0])
+            error = self._copy_error(isbn, barcodes)
+            if error:
+                return self._fail(error)
+
+            copies = [Copy(barcode, isbn) for barcode in barcodes]
+            circulation = _Circulation()
+            if book.is_borrowed:
+                now = time.time()
+                circulation.holds = self.hold_queue(isbn, limit=len(copies))
+                for copy, hold in zip(copies, circulation.holds):
+                    copy.on_loan = True
+                    circulation.handoffs.append(Loan(isbn, hold.member_id, now, now + self.loan_days * DAY_SECONDS,
+                                                     copy.barcode))
+                if len(copies) > len(circulation.holds):
+                    circulation.books.append(book)
+            self._attach_copies(implicit + copies)
+            self._apply_circulation(circulation, False)
+            if not self._persist(*({"op": "copy", "copy": self._copy_to_dict(copy)} for copy in implicit + copies),
+                                 *self._circulation_records(circulation, False)):
+                self._apply_circulation(circulation, False, undo=True)
+                self._detach_copies(implicit + copies)
+                return self._fail(PERSIST_ERROR)
+            self.event_log.record_many(("borrow", isbn, loan.member_id) for loan in circulation.handoffs)
+            self.display.success(f"{len(copies)} nüsha eklendi: {book.display_info()}")
+            return copies
+
+    # Kitabın start'tan başlayan, kullanılmayan sıra numaralarıyla count adet barkod
+    def _new_barcodes(self, isbn: str, count: int, start: int):
+        barcodes = []
+        while len(barcodes) < count:
+            barcode = f"{isbn}-{start}"
+            if not self._find_copy(barcode):
+                barcodes.append(barcode)
+            start += 1
+        return barcodes
+
+    # Barkodlar boş olmamalı, tekrarlanmamalı, başka bir nüshanın ya da kitabın (ISBN) barkodu olmamalı
+    def _copy_error(self, isbn: str, barcodes):
+        if not barcodes:
+            return "Eklenecek nüsha yok"
+        if len(set(barcodes)) != len(barcodes):
+            return "Barkod birden fazla kez geçiyor"
+        for barcode in barcodes:
+            if not barcode:
+                return "Barkod boş olamaz"
+            if self._find_copy(barcode) or barcode == isbn or self.find_book_by_isbn(barcode):
+                return f"Barkod zaten kullanılıyor: {barcode}"
+        return None
+
+    # Boştaki nüshayı siler; ödünçteki nüsha ve kitabın son nüshası silinemez
+    # Silinen nüsha son boş nüshaysa kitap ödünç verilmiş sayılır
+    @timed("remove_copy")
+    def remove_copy(self, barcode: str):
+        self._ensure_loaded()
+        copy = self._find_copy(barcode)
+        if not copy:
+            return self._fail("Nüsha bulunamadı", f"Nüsha bulunamadı: {barcode}")
+        with self._mutation([copy.isbn]):
+            copy = self._find_copy(barcode)
+            total, free = self.copy_counts([copy.isbn]).get(copy.isbn, (0, 0)) if copy else (0, 0)
+            error = "Nüsha bulunamadı" if not copy else "Nüsha ödünçte, silinemez" if copy.on_loan else \
+                "Kitabın son nüshası silinemez" if total == 1 else None
+            if error:
+                return self._fail(error, f"Hata: {error}: {barcode}")
+
+            books = [self.find_book_by_isbn(copy.isbn)] if free == 1 else []
+            self._detach_copies([copy])
+            self._apply_status(books, True)
+            if not self._persist(*self._copy_remove_records([copy]), *self._status_records(books, True)):
+                self._apply_status(books, True, undo=True)
+                self._attach_copies([copy])
+                return self._fail(PERSIST_ERROR)
+            self.display.success(f"Nüsha silindi: {barcode}")
+            return True
+
+    # Kitabın nüshaları, barkod sırasıyla; nüshası kaydedilmemiş kitap için boş liste
+    @timed("copies")
+    def copies(self, isbn: str):
+        self._sync()
+        if self._pushdown:
+            return [Copy(**copy) for copy in self.storage.copies(isbn)]
+        with self._lock.read():
+            copies = list(self._title_copies.get(isbn, {}).values())
+        return sorted(copies, key=lambda copy: copy.barcode)
+
+    # Nüshası kaydedilmiş kitaplar için ISBN -> (nüsha sayısı, boştaki nüsha sayısı); sayaçlardan okunur.
+    # Listede olmayan kitap tek nüshadır ve ödünç durumu kitabın durumudur
+    def copy_counts(self, isbns):
+        self._sync()
+        if self._pushdown:
+            return self.storage.copy_counts(list(isbns))
+        with self._lock.read():
+            return {isbn: (len(self._title_copies[isbn]), len(self._free_copies.get(isbn, ())))
+                    for isbn in isbns if isbn in self._title_copies}
+
+    def _find_copy(self, barcode: str):
+        self._sync()
+        if self._pushdown:
+            copy = self.storage.find_copy(barcode)
+            return Copy(**copy) if copy else None
+        with self._lock.read():
+            return self._copies.get(barcode)
+
+    # Kitabın boştaki (serbest listenin başı, O(1)) ya da ödünçteki herhangi bir nüshası, yoksa None
+    def _pick_copy(self, isbn: str, on_loan: bool):
+        self._sync()
+        if self._pushdown:
+            copy = self.storage.pick_copy(isbn, on_loan)
+            return Copy(**copy) if copy else None
+        with self._lock.read():
+            if not on_loan:
+                free = self._free_copies.get(isbn)
+                return next(iter(free.values())) if free else None
+            return next((copy for copy in self._title_copies.get(isbn, {}).values() if copy.on_loan), None)
+
+    # Ayırtmalar: ödünçteki kitap için üye sıraya girer (ilk gelen ilk alır); kitap iade edildiğinde aynı
+    # yazmada sıradaki üyeye ödünç verilir, böylece istemcilerin kitabın boşalmasını yoklaması gerekmez
+    @timed("place_hold")
+    def place_hold(self, isbn: str, member_id: str):
+        self._ensure_loaded()
+        with self._mutation([isbn, member_id]):
+            error = self._hold_error(isbn, member_id)
+            if error:
+                return self._fail(error)
+
+            hold = Hold(isbn, member_id, time.time())
+            self._attach_holds([hold])
+            if not self._persist({"op": "hold", "hold": self._hold_to_dict(hold)}):
+                self._detach_holds([hold])
+                return self._fail(PERSIST_ERROR)
+            self.display.success(f"Ayırtma alındı: {isbn} ({member_id}), sıra {self.hold_position(isbn, member_id)}")
+            return True
+
+    # Ayırtma yalnızca kayıtlı üye, ödünçteki kitap ve sırada olmayan üye için alınır
+    def _hold_error(self, isbn: str, member_id: str):
+        book = self.find_book_by_isbn(isbn)
+        if not book:
+            return "Kitap bulunamadı"
+        if not self.find_member(member_id):
+            return "Üye bulunamadı"
+        if not book.is_borrowed:
+            return f"{book.title} ödünç verilmedi, doğrudan ödünç alınabilir"
+        if self._member_title_loan(member_id, isbn):
+            return "Kitap zaten bu üyede"
+        if self._find_hold(isbn, member_id):
+            return "Üyenin bu kitap için ayırtması zaten var"
         return None
 
+    @timed("cancel_hold")
+    def cancel_hold(self, isbn: str, member_id: str):
+        with self._mutation([isbn, member_id]):
+            hold = self._find_hold(isbn, member_id)
+            if not hold:
+                return self._fail("Ayırtma bulunamadı", f"Ayırtma bulunamadı: {isbn} ({member_id})")
+
+            self._detach_holds([hold])
+            if not self._persist({"op": "hold_remove", "isbn": isbn, "member_id": member_id}):
+                self._attach_holds([hold])  # kaydedilemedi; ayırtma sıranın sonuna döner
+                return self._fail(PERSIST_ERROR)
+            self.display.success(f"Ayırtma iptal edildi: {isbn} ({member_id})")
+            return True
+
+    def _find_hold(self, isbn: str, member_id: str):
+        self._sync()
+        if self._pushdown:
+            holds = [Hold(**hold) for hold in self.storage.member_holds(member_id) if hold["isbn"] == isbn]
+            return holds[0] if holds else None
+        with self._lock.read():
+            return self._holds.get(isbn, {}).get(member_id)
+
+    # Kitabın sıradaki ayırtması, yoksa None
+    def _next_hold(self, isbn: str):
+        self._sync()
+        if self._pushdown:
+            holds = self.storage.holds(isbn, limit=1)
+            return Hold(**holds[0]) if holds else None
+        with self._lock.read():
+            queue = self._holds.get(isbn)
+            return next(iter(queue.values())) if queue else None
+
+    # Kitabın ayırtma sırası, sıradaki üye ilk; limit verilirse sıranın başındaki limit kadar ayırtma
+    @timed("hold_queue")
+    def hold_queue(self, isbn: str, limit: int = None):
+        self._sync()
+        if self._pushdown:
+            return [Hold(**hold) for hold in self.storage.holds(isbn, -1 if limit is None else limit)]
+        with self._lock.read():
+            return list(islice(self._holds.get(isbn, {}).values(), limit))
+
+    # Üyenin kitabın sırasındaki yeri (1 sıradaki üyedir); ayırtması yoksa 0
+    @timed("hold_position")
+    def hold_position(self, isbn: str, member_id: str):
+        self._sync()
+        if self._pushdown:
+            return self.storage.hold_position(isbn, member_id)
+        with self._lock.read():
+            for position, queued in enumerate(self._holds.get(isbn, ()), 1):
+                if queued == member_id:
+                    return position
+        return 0
+
+    # Üyenin ayırtmaları, ayırtma sırasıyla
+    @timed("member_holds")
+    def member_holds(self, member_id: str):
+        self._sync()
+        if self._pushdown:
+            return [Hold(**hold) for hold in self.storage.member_holds(member_id)]
+        with self._lock.read():
+            holds = list(self._member_holds.get(member_id, {}).values())
+        return sorted(holds, key=lambda hold: hold.placed_at)
+
+    # Zamanı gelen ödünçleri gecikmiş olarak ayırır ve yeni gecikenleri döndürür
+    # pushdown modunda ödünçleri başka süreçler de açıp kapattığı için heap tutulmaz; yalnızca son kontrolden bu
+    # yana iade tarihi geçen ödünçler (idx_loans_due) ile son kontrolden sonra eklenmiş, iade tarihi zaten geçmiş
+    # ödünçler (geçmiş tarihli ödünç, içe aktarma) sorgulanır
+    @timed("check_overdue")
+    def check_overdue(self, now: float = None):
+        now = time.time() if now is None else now
+        if self._pushdown:
+            with self._overdue_lock:
+                if now <= self._overdue_checked:
+                    return []
+                loans, self._overdue_seen = self.storage.overdue_since(self._overdue_checked, now,
+                                                                       self._overdue_seen)
+                self._overdue_checked = now
+            return [Loan(**loan) for loan in loans]
+        self._sync()
+        return self.scheduler.advance(now)
+
+    # Gecikmiş ödünçler; zamanlayıcıdan, pushdown modunda iade tarihi indeksinden okunur
+    @timed("overdue_loans")
+    def overdue_loans(self, limit: int = None, now: float = None):
+        if self._pushdown:
+            return self.loans_due(time.time() if now is None else now, float("-inf"), limit)
+        self.check_overdue(now)
+        return self.scheduler.overdue(limit)
+
+    # Sıradaki (henüz gecikmemiş) en erken iade tarihi; ödünç yoksa None
+    def next_due(self, now: float = None):
+        if self._pushdown:
+            loans = self.loans_due(float("inf"), time.time() if now is None else now, limit=1)
+            return loans[0].due_at if loans else None
+        self._sync()
+        return self.scheduler.next_due()
+
+    # Arka plan görevi: sıradaki iade tarihine kadar (en fazla max_interval saniye) bekler, gecikenleri ayırır ve
+    # günlüğe yazar. Kontrol ayrı bir thread'de yapılır, event loop beklemez. FastAPI lifespan içinde başlatılır.
+    async def watch_overdue(self, max_interval: float = 60.0):
+        while True:
+            due = await asyncio.to_thread(self.check_overdue)
+            if due:
+                isbns = ", ".join(loan.isbn for loan in due[:10])
+                self.display.warning(f" {len(due)} ödünç gecikti: {isbns}{' ...' if len(due) > 10 else ''}")
+            next_due = await asyncio.to_thread(self.next_due)
+            delay = max_interval if next_due is None else min(max_interval, next_due - time.time())
+            await asyncio.sleep(max(delay, 0.01))
+
     def find_book(self):
         print("\t1. Başlığa göre ara")
         print("\t2. Yazara göre ara")
         print("\t3. ISBN'e göre ara")
+        print("\t4. Serbest arama (kısmi başlık/yazar)")
 
-        choice = input("\nArama türünü seçin (1-3): ").strip()
+        choice = input("\nArama türünü seçin (1-4): ").strip()
 
         if choice == "1":
             title = input("\n\tKitap başlığını girin: ").strip()
@@ -243,6 +1610,18 @@ class Library:
         elif choice == "3":
             isbn = input("\n\tISBN numarasını girin: ").strip()
             book = self.find_book_by_isbn(isbn)
+        elif choice == "4":
+            query = input("\n\tAranacak kelimeleri girin: ").strip()
+            books = self.search_books(query)
+            print("")
+            if not books:
+                self.display.error("Kitap bulunamadı.")
+                return
+            self.display.search(f"{len(books)} kitap bulundu:\n")
+            for i, book in enumerate(books, 1):
+                status = " (Ödünç verildi)" if book.is_borrowed else ""
+                print(f"\t{i}. {book.display_info()}{status}")
+            return
         else:
             print("")
             self.display.error("Geçersiz seçim!")
@@ -261,68 +1640,161 @@ class Library:
 
     @property
     def total_books(self):
-        return len(self._books)
+        self._sync()
+        if self._pushdown:
+            return self.storage.count()
+        snapshot = self._snapshot
+        return len(snapshot) if snapshot is not None else len(self._books)
+
+    @property
+    def borrowed_books(self):
+        self._sync()
+        if self._pushdown:
+            return self.storage.counts()["borrowed"]
+        return self._borrowed_count
 
+    # En çok kitabı bulunan yazarlar
+    def top_authors(self, limit: int = 10):
+        self._sync()
+        if self._pushdown:
+            return self.storage.top_authors(limit)
+        self._ensure_loaded()
+        with self._lock.read():
+            return self._author_counts.most_common(limit)
 
+    # Sayaçlardan hesaplanan kütüphane istatistikleri; kitaplar taranmaz
+    # pushdown modunda sayılar veritabanındaki indekslerden hesaplanır
+    @timed("stats")
+    def stats(self):
+        self._sync()
+        if self._pushdown:
+            counts = self.storage.counts()
+            return self._stats(counts["total"], counts["borrowed"], counts["types"], counts["authors"],
+                               counts["copies"])
+        with self._lock.read():
+            snapshot = self._snapshot
+            total, author_count = (len(snapshot), snapshot.author_count) if snapshot is not None else \
+                (len(self._books), len(self._author_counts))
+            copies = {"titles": len(self._title_copies), "total": len(self._copies), "free": self._free_copy_count,
+                      "titles_with_free": len(self._free_copies)}
+            return self._stats(total, self._borrowed_count, self._type_counts, author_count, copies)
+
+    # Nüsha sayıları kitap ve nüsha sayaçlarından hesaplanır: nüshası kaydedilmemiş her kitap tek nüshadır ve
+    # ödünç verilmiş kitaplardan boş nüshası kalmamış nüshalı kitaplar çıkarılınca kalanlar bu tek nüshalardır
+    def _stats(self, total: int, borrowed: int, type_counts, author_count: int, copies: dict):
+        single = total - copies["titles"]
+        single_borrowed = borrowed - (copies["titles"] - copies["titles_with_free"])
+        copy_total = single + copies["total"]
+        copy_free = single - single_borrowed + copies["free"]
+        return {
+            "kütüphane": self.name,
+            "toplam_kitap": total,
+            "mevcut_kitap": total - borrowed,
+            "ödünç_kitap": borrowed,
+            "ödünç_oranı": round(borrowed / total, 4) if total else 0.0,
+            "tür_dağılımı": {book_type: type_counts.get(book_type, 0)
+                             for book_type in ("Book", "EBook", "AudioBook")},
+            "yazar_sayısı": author_count,
+            "toplam_nüsha": copy_total,
+            "mevcut_nüsha": copy_free,
+            "ödünç_nüsha": copy_total - copy_free,
+            "ödünç_işlemi": self._borrow_operations,
+            "iade_işlemi": self._return_operations
+        }
+
+
+    # URL'i önce önbellekten, yoksa OpenLibrary'den çeker; (durum kodu, JSON verisi) döndürür
+    def _cached_get(self, url: str):
+        cached = self.metadata_cache.get(url)
+        if cached is not None:
+            return cached
+
+        if self._http_client is None:
+            self._http_client = httpx.Client(timeout=10.0, follow_redirects=True)
+        start = time.perf_counter()
+        try:
+            response = self._http_client.get(url)
+        except httpx.HTTPError:
+            record_openlibrary_request(start)
+            raise
+        record_openlibrary_request(start, response.status_code)
+        data = response.json() if response.status_code == 200 else None
+        self.metadata_cache.set(url, response.status_code, data)
+        return response.status_code, data
+
+    # _cached_get'in eşzamansız (async) karşılığı; yalnızca önbellekte olmayan istekler semaforu bekler
+    async def _cached_get_async(self, client: httpx.AsyncClient, url: str, semaphore: asyncio.Semaphore):
+        cached = self.metadata_cache.get(url)
+        if cached is not None:
+            return cached
+
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.get(url)
+            except httpx.HTTPError:
+                record_openlibrary_request(start)
+                raise
+        record_openlibrary_request(start, response.status_code)
+        data = response.json() if response.status_code == 200 else None
+        self.metadata_cache.set(url, response.status_code, data)
+        return response.status_code, data
+
+    @timed("fetch_book_from_api")
     def fetch_book_from_api(self, isbn: str):
         try:
             url = f"https://openlibrary.org/isbn/{isbn}.json"
+            status, data = self._cached_get(url)
 
-            with httpx.Client(timeout=10.0, follow_redirects=True) as client:
-                response = client.get(url)
+            if status == 404:
+                self.display.error(f"Kitap bulunamadı: ISBN {isbn} ile kitap bulunamadı.")
+                return None
+            elif status != 200:
+                self.display.error(f"API hatası: HTTP {status}")
+                return None
 
-                if response.status_code == 404:
-                    self.display.error(f"Kitap bulunamadı: ISBN {isbn} ile kitap bulunamadı.")
-                    return None
-                elif response.status_code != 200:
-                    self.display.error(f"API hatası: HTTP {response.status_code}")
-                    return None
-
-                data = response.json()
+            # Kitap bilgilerini al
+            title = data.get("title")
+            if not title:
+                self.display.error(f"API hatası: Kitap başlığı bulunamadı")
+                return None
 
-                # Kitap bilgilerini al
-                title = data.get("title")
-                if not title:
-                    self.display.error(f"API hatası: Kitap başlığı bulunamadı")
-                    return None
+            authors_data = data.get("authors", [])
+            if not authors_data:
+                self.display.error(f"API hatası: Yazar bilgisi bulunamadı")
+                return None
 
-                authors_data = data.get("authors", [])
-                if not authors_data:
-                    self.display.error(f"API hatası: Yazar bilgisi bulunamadı")
-                    return None
+            author_names = []
+            for author_ref in authors_data:
+                try:
+                    author_url = f"https://openlibrary.org{author_ref['key']}.json"
+                    author_status, author_data = self._cached_get(author_url)
+                    if author_status != 200:
+                        self.display.error(f"API hatası: Yazar bilgisi çekilemedi (HTTP {author_status})")
+                        return None
 
-                author_names = []
-                for author_ref in authors_data:
-                    try:
-                        author_url = f"https://openlibrary.org{author_ref['key']}.json"
-                        author_response = client.get(author_url, follow_redirects=True)
-                        if author_response.status_code != 200:
-                            self.display.error(f"API hatası: Yazar bilgisi çekilemedi (HTTP {author_response.status_code})")
-                            return None
-                        
-                        author_data = author_response.json()
-                        author_name = author_data.get("name")
-                        if not author_name:
-                            self.display.error(f"API hatası: Yazar adı bulunamadı")
-                            return None
-                        
-                        author_names.append(author_name)
-                    except Exception as e:
-                        self.display.error(f"API hatası: Yazar bilgisi çekilirken hata: {e}")
+                    author_name = author_data.get("name")
+                    if not author_name:
+                        self.display.error(f"API hatası: Yazar adı bulunamadı")
                         return None
-                
-                if not author_names:
-                    self.display.error(f"API hatası: Hiç yazar bilgisi alınamadı")
+
+                    author_names.append(author_name)
+                except Exception as e:
+                    self.display.error(f"API hatası: Yazar bilgisi çekilirken hata: {e}")
                     return None
 
-                # Birden fazla yazarı " & " ile birleştir
-                author = " & ".join(author_names)
+            if not author_names:
+                self.display.error(f"API hatası: Hiç yazar bilgisi alınamadı")
+                return None
+
+            # Birden fazla yazarı " & " ile birleştir
+            author = " & ".join(author_names)
 
-                return {
-                    "title": title,
-                    "author": author,
-                    "isbn": isbn
-                }
+            return {
+                "title": title,
+                "author": author,
+                "isbn": isbn
+            }
 
         except httpx.TimeoutException:
             self.display.error("API isteği zaman aşımına uğradı. İnternet bağlantınızı kontrol edin.")
@@ -335,6 +1807,7 @@ class Library:
             return None
 
 
+    @timed("add_book_by_isbn")
     def add_book_by_isbn(self, isbn: str):
         # Kitap zaten mevcut mu kontrolü
         existing_book = self.find_book_by_isbn(isbn)
@@ -347,23 +1820,150 @@ class Library:
         if not book_info:
             return False
 
-        # Kitap nesnesi oluştur
-        book = Book(book_info["title"], book_info["author"], isbn)
+        # Kitap nesnesi oluştur ve kütüphaneye ekle
+        # İstek sürerken aynı ISBN başka bir thread tarafından eklenmiş olabilir; add_book tekrar kontrol eder
+        return self.add_book(Book(book_info["title"], book_info["author"], isbn))
 
-        # Kütüphaneye ekle
-        self._books.append(book)
-        self.display.success(f"Kitap başarıyla eklendi: {book.display_info()}")
-        self.save_to_json()
-        return True
+    # Sunucu içinde kullanılan paylaşılan AsyncClient'ı döndürür, ilk çağrıda oluşturur
+    # İstemci oluşturulduğu event loop'a bağlıdır; asyncio.run ile yapılan tek seferlik işlemler kendi istemcisini açar
+    def _get_async_client(self):
+        if self._async_http_client is None:
+            self._async_http_client = httpx.AsyncClient(timeout=10.0, follow_redirects=True)
+        return self._async_http_client
 
+    # Birden fazla ISBN için kitap bilgilerini eşzamanlı olarak çeker
+    # Tüm istekler tek bir AsyncClient'ı paylaşır, aynı yazar toplu işlem boyunca bir kez çekilir
+    # client verilmezse işlem süresince geçici bir istemci açılır
+    # Her ISBN için (isbn, kitap bilgisi, hata mesajı) üçlüsü döndürür
+    async def fetch_books_from_api_async(self, isbns, max_concurrency: int = 10, transport=None,
+                                         client: httpx.AsyncClient = None):
+        if client is not None:
+            return await self._fetch_books_with_client(client, isbns, max_concurrency)
+        async with httpx.AsyncClient(timeout=10.0, follow_redirects=True, transport=transport) as client:
+            return await self._fetch_books_with_client(client, isbns, max_concurrency)
+
+    async def _fetch_books_with_client(self, client: httpx.AsyncClient, isbns, max_concurrency: int):
+        semaphore = asyncio.Semaphore(max_concurrency)
+        author_tasks = {}
+
+        async def fetch_author(key: str):
+            status, data = await self._cached_get_async(client, f"https://openlibrary.org{key}.json", semaphore)
+            if status != 200:
+                raise LookupError(f"Yazar bilgisi çekilemedi (HTTP {status})")
+            author_name = data.get("name")
+            if not author_name:
+                raise LookupError("Yazar adı bulunamadı")
+            return author_name
+
+        def author_task(key: str):
+            if key not in author_tasks:
+                author_tasks[key] = asyncio.ensure_future(fetch_author(key))
+            return author_tasks[key]
+
+        async def fetch_one(isbn: str):
+            try:
+                url = f"https://openlibrary.org/isbn/{isbn}.json"
+                status, data = await self._cached_get_async(client, url, semaphore)
+
+                if status == 404:
+                    return isbn, None, f"ISBN {isbn} ile kitap bulunamadı"
+                elif status != 200:
+                    return isbn, None, f"API hatası: HTTP {status}"
+
+                title = data.get("title")
+                if not title:
+                    return isbn, None, "API hatası: Kitap başlığı bulunamadı"
+
+                authors_data = data.get("authors", [])
+                if not authors_data:
+                    return isbn, None, "API hatası: Yazar bilgisi bulunamadı"
+
+                author_names = await asyncio.gather(*(author_task(ref["key"]) for ref in authors_data))
+                return isbn, {"title": title, "author": " & ".join(author_names), "isbn": isbn}, None
+            except LookupError as e:
+                return isbn, None, f"API hatası: {e}"
+            except httpx.TimeoutException:
+                return isbn, None, "API isteği zaman aşımına uğradı"
+            except httpx.RequestError as e:
+                return isbn, None, f"API isteği başarısız: {e}"
+            except Exception as e:
+                return isbn, None, f"Beklenmeyen hata: {e}"
+
+        results = await asyncio.gather(*(fetch_one(isbn) for isbn in isbns))
+        # Hata nedeniyle beklenmeden kalan yazar istekleri istemci kapanmadan tamamlanır
+        await asyncio.gather(*author_tasks.values(), return_exceptions=True)
+        return results
+
+    # add_book_by_isbn'in async karşılığı; OpenLibrary beklenirken event loop diğer istekleri işler
+    async def add_book_by_isbn_async(self, isbn: str, client: httpx.AsyncClient = None):
+        existing_book = self.find_book_by_isbn(isbn)
+        if existing_book:
+            self.display.error(f"Kitap zaten mevcut: {existing_book.display_info()}")
+            return False
+
+        [(_, book_info, error)] = await self.fetch_books_from_api_async([isbn], client=client or self._get_async_client())
+        if not book_info:
+            self.display.error(error)
+            return False
+
+        # Beklerken aynı ISBN başka bir istekle eklenmiş olabilir; add_book tekrar kontrol eder
+        return self.add_book(Book(book_info["title"], book_info["author"], isbn))
+
+    # Toplu eklemede zaten mevcut olan ISBN'leri ayırır; (sonuçlar, çekilecek ISBN'ler) döndürür
+    def _prepare_bulk_isbns(self, isbns):
+        results = dict.fromkeys(isbn.strip() for isbn in isbns if isbn.strip())
+        to_fetch = []
+        for isbn in results:
+            if self.find_book_by_isbn(isbn):
+                results[isbn] = {"isbn": isbn, "success": False, "message": "Kitap zaten mevcut"}
+            else:
+                to_fetch.append(isbn)
+        return results, to_fetch
+
+    # Çekilen kitapları ekler ve hepsini tek bir yazma işlemiyle kaydeder
+    # Tüm ISBN kilitleri kayıt bitene kadar tutulur, böylece araya giren bir silme kaydı eklemeden önce yazılamaz
+    def _apply_bulk_isbns(self, results: dict, fetched):
+        new_books = []
+        self._ensure_loaded()
+        with self._mutation([isbn for isbn, _, _ in fetched]):
+            for isbn, book_info, error in fetched:
+                if book_info is None:
+                    results[isbn] = {"isbn": isbn, "success": False, "message": error}
+                elif self.find_book_by_isbn(isbn):
+                    results[isbn] = {"isbn": isbn, "success": False, "message": "Kitap zaten mevcut"}
+                else:
+                    new_books.append(Book(book_info["title"], book_info["author"], isbn))
+
+            self._attach_books(new_books)
+            if new_books and not self._persist(*({"op": "add", "book": self._book_to_dict(book)} for book in new_books)):
+                self._detach_books(new_books)
+                for book in new_books:
+                    results[book.isbn] = {"isbn": book.isbn, "success": False, "message": PERSIST_ERROR}
+                new_books = []
+            self.event_log.record_many(("add", book.isbn, None) for book in new_books)
+
+            for book in new_books:
+                results[book.isbn] = {"isbn": book.isbn, "success": True, "message": "Kitap eklendi",
+                                      "title": book.title, "author": book.author}
+        self.display.success(f"Toplu ISBN ekleme: {len(new_books)}/{len(results)} kitap eklendi.")
+        return list(results.values())
+
+    # ISBN listesindeki kitapları OpenLibrary'den toplu olarak ekler
+    # Başarılı tüm kitaplar tek bir yazma işlemiyle kaydedilir; her ISBN için sonuç döndürür
+    @timed("add_books_by_isbn")
+    def add_books_by_isbn(self, isbns, max_concurrency: int = 10, transport=None):
+        results, to_fetch = self._prepare_bulk_isbns(isbns)
+        fetched = asyncio.run(self.fetch_books_from_api_async(to_fetch, max_concurrency, transport)) if to_fetch else []
+        return self._apply_bulk_isbns(results, fetched)
+
+    # add_books_by_isbn'in async karşılığı; çalışan event loop içinde paylaşılan istemciyi kullanır
+    async def add_books_by_isbn_async(self, isbns, max_concurrency: int = 10, client: httpx.AsyncClient = None):
+        results, to_fetch = self._prepare_bulk_isbns(isbns)
+        fetched = await self.fetch_books_from_api_async(
+            to_fetch, max_concurrency, client=client or self._get_async_client()) if to_fetch else []
+        return self._apply_bulk_isbns(results, fetched)
 
 
-@dataclass
-class Member:
-    name: str
-    member_id: str
-    email: str
-    borrowed_books: List[Book] = field(default_factory=list)
 
 class PydanticBook(BaseModel):
     title: str
@@ -371,3 +1971,9 @@ class PydanticBook(BaseModel):
     isbn: str = Field(..., min_length=10, max_length=13)
     publication_year: int = Field(..., gt=1400, le=2030)
 
+
+class PydanticMember(BaseModel):
+    name: str = Field(..., min_length=1)
+    member_id: str = Field(..., min_length=1, max_length=64)
+    email: str = Field(..., min_length=3)
+
@@ -0,0 +1,72 @@
+import threading
+from contextlib import contextmanager, ExitStack
+
+
+class RWLock:
+    """
+    Okuyucu-yazıcı kilidi.
+    - Birden fazla okuyucu aynı anda kilidi tutabilir (listeleme, arama, istatistik birbirini beklemez)
+    - Yazıcı tek başına çalışır
+    - Bekleyen bir yazıcı varsa yeni okuyucular bekler, böylece sürekli okuma yazıcıyı aç bırakmaz
+    Kilit yeniden girişli (reentrant) değildir: okuma kilidini tutan thread tekrar kilit almamalıdır.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class StripedLock:
+    """
+    Anahtar (ISBN) başına kilit. Her anahtar için ayrı kilit tutmak yerine anahtarlar sabit sayıda
+    kilide dağıtılır; farklı ISBN'ler üzerindeki işlemler büyük olasılıkla birbirini beklemez.
+    """
+
+    def __init__(self, stripes: int = 64):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def _index(self, key: str):
+        return hash(key) % len(self._locks)
+
+    # Anahtarın kilidini döndürür
+    def for_key(self, key: str):
+        return self._locks[self._index(key)]
+
+    # Birden fazla anahtarın kilitlerini alır; kilitler her zaman aynı sırayla alındığı için kilitlenme olmaz
+    @contextmanager
+    def for_keys(self, keys):
+        with ExitStack() as stack:
+            for index in sorted({self._index(key) for key in keys}):
+                stack.enter_context(self._locks[index])
+            yield
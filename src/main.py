@@ -1,6 +1,8 @@
+import argparse
 from library import Book, Library, PydanticBook, EBook, AudioBook
 from pydantic import ValidationError
 from message_display import UnicodeDisplay
+from storage import SQLiteStorage
 
 
 display = UnicodeDisplay()
@@ -283,11 +285,50 @@ def return_book_menu(library):
         display.error(f"Kitap iade edilirken hata oluştu: {e}")
 
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Kütüphane Yönetim Sistemi")
+    parser.add_argument("--isbn", nargs="+", metavar="ISBN",
+                        help="Verilen ISBN'leri OpenLibrary'den toplu olarak ekler ve çıkar")
+    parser.add_argument("--isbn-file", metavar="DOSYA",
+                        help="Her satırında bir ISBN bulunan dosyadaki kitapları toplu olarak ekler ve çıkar")
+    parser.add_argument("--binary", action="store_true",
+                        help="Verileri JSON yerine hızlı açılan binary anlık görüntüde (library.snap) saklar")
+    parser.add_argument("--sqlite", metavar="DOSYA",
+                        help="Verileri JSON yerine verilen SQLite veritabanında saklar")
+    return parser.parse_args()
+
+
+def bulk_isbn_import(library, isbns):
+    print("\n--- TOPLU KİTAP EKLEME (ISBN İLE) ---")
+    display.info(f"{len(isbns)} ISBN için Open Library API'den bilgiler çekiliyor...")
+
+    results = library.add_books_by_isbn(isbns)
+    for result in results:
+        if result["success"]:
+            display.success(f"{result['isbn']}: {result['title']} - {result['author']}")
+        else:
+            display.error(f"{result['isbn']}: {result['message']}")
+
+
 def main():
 
+    args = parse_args()
     display = UnicodeDisplay()
     display.info("Kütüphane Yönetim Sistemi başlatılıyor...")
-    library = Library(name="Kütüphanem")
+    storage = SQLiteStorage(args.sqlite) if args.sqlite else None
+    library = Library(name="Kütüphanem", binary_snapshot=args.binary, storage=storage)
+
+    if args.isbn or args.isbn_file:
+        isbns = list(args.isbn or [])
+        if args.isbn_file:
+            try:
+                with open(args.isbn_file, encoding="utf-8") as f:
+                    isbns.extend(line.strip() for line in f if line.strip())
+            except OSError as e:
+                display.error(f"ISBN dosyası okunamadı: {e}")
+                return
+        bulk_isbn_import(library, isbns)
+        return
 
     while True:
         try:
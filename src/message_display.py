@@ -1,3 +1,121 @@
+"""
+Kullanıcıya gösterilen mesajlar.
+
+Varsayılan (konsol) modunda mesajlar simgeleriyle birlikte print() ile yazılır; etkileşimli CLI bu modu kullanır.
+API sunucuları configure_logging() ile sunucu moduna geçer: mesajlar bir kuyruğa konur ve arka plan thread'i
+tarafından JSON satırları halinde toplu olarak yazılır. İsteği işleyen kod stdout'a yazmayı beklemez.
+"""
+import atexit
+import json
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+# Mesaj türlerinin günlük seviyeleri
+KIND_LEVELS = {"success": "info", "info": "info", "book": "info", "search": "info", "warning": "warning",
+               "error": "error"}
+
+
+class JsonLogSink:
+    """
+    Kuyruk tabanlı, beklemeyen JSON satırı günlükçüsü.
+    - emit() yalnızca kuyruğa ekler; kuyruk doluysa kayıt düşürülür ve dropped sayacı artar
+    - level altındaki mesajlar kuyruğa hiç girmez
+    - Yazıcı thread'i kuyrukta biriken kayıtları (en fazla batch_size) tek bir write/flush ile yazar
+    stream verilmezse yazma anındaki sys.stdout kullanılır. Süreç kapanırken kuyrukta kalan kayıtlar da yazılır.
+    """
+
+    def __init__(self, level: str = "info", stream=None, batch_size: int = 256, max_queue: int = 10000):
+        if level not in LEVELS:
+            raise ValueError(f"Geçersiz günlük seviyesi: {level}. Geçerli seviyeler: {', '.join(LEVELS)}")
+        self.level = LEVELS[level]
+        self.stream = stream
+        self.batch_size = batch_size
+        self.dropped = 0                 # kuyruk dolu olduğu için yazılmayan kayıtlar
+        self.errors = 0                  # yazılamayan toplu kayıtlar
+        self._queue = queue.Queue(max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def emit(self, level: str, kind: str, message: str):
+        if LEVELS[level] < self.level or self._closed:
+            return
+        try:
+            self._queue.put_nowait((time.time(), level, kind, message))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [record for record in batch if record is not None]
+            if records:
+                self._write(records)
+            for _ in batch:
+                self._queue.task_done()
+            if len(records) < len(batch):
+                return
+
+    def _write(self, records):
+        lines = "".join(json.dumps({
+            "time": datetime.fromtimestamp(created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": level,
+            "event": kind,
+            "message": message.strip()
+        }, ensure_ascii=False) + "\n" for created, level, kind, message in records)
+        try:
+            stream = self.stream or sys.stdout
+            stream.write(lines)
+            stream.flush()
+        except Exception:
+            # Günlük yazılamaması isteği işleyen kodu etkilemez
+            self.errors += 1
+
+    # Kuyruktaki tüm kayıtlar yazılana kadar bekler
+    def flush(self):
+        if not self._closed:
+            self._queue.join()
+
+    # Kalan kayıtları yazar ve thread'i durdurur
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        atexit.unregister(self.close)
+
+
+_sink = None  # sunucu modunda tüm UnicodeDisplay nesnelerinin kullandığı günlükçü
+
+
+# Sunucu modunu açar; sonraki tüm mesajlar JSON satırı olarak yazılır
+def configure_logging(level: str = "info", stream=None, batch_size: int = 256, max_queue: int = 10000):
+    global _sink
+    previous, _sink = _sink, JsonLogSink(level, stream, batch_size, max_queue)
+    if previous is not None:
+        previous.close()
+    return _sink
+
+
+# Konsol moduna döner; bekleyen kayıtlar yazılır
+def reset_logging():
+    global _sink
+    previous, _sink = _sink, None
+    if previous is not None:
+        previous.close()
+
+
 class UnicodeDisplay:
     def __init__(self):
         self.supports_unicode = self._check_unicode_support()
@@ -30,22 +148,28 @@ class UnicodeDisplay:
                 'search': '[SEARCH]'
             }
     
+    # Sunucu modunda mesaj günlük kuyruğuna, konsol modunda ekrana yazılır
+    def _show(self, kind: str, message):
+        sink = _sink
+        if sink is not None:
+            sink.emit(KIND_LEVELS[kind], kind, str(message))
+        else:
+            print(f"{self.symbols[kind]} {message}")
+
     def success(self, message):
-        print(f"{self.symbols['success']} {message}")
+        self._show('success', message)
     
     def error(self, message):
-        print(f"{self.symbols['error']} {message}")
+        self._show('error', message)
 
     def warning(self, message):
-        print(f"{self.symbols['warning']} {message}")
+        self._show('warning', message)
 
     def info(self, message):
-        print(f"{self.symbols['info']} {message}")
+        self._show('info', message)
 
     def book(self, message):
-        print(f"{self.symbols['book']} {message}")
+        self._show('book', message)
         
     def search(self, message):
-        print(f"{self.symbols['search']} {message}")
-
-
+        self._show('search', message)
@@ -0,0 +1,154 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class MetadataCache:
+    """
+    OpenLibrary cevapları için iki katmanlı önbellek.
+    - Bellekte LRU (en son kullanılan kayıtlar)
+    - Diskte SQLite (süreç yeniden başlasa da korunur)
+    Her kayıt bir URL'e karşılık gelen (HTTP durum kodu, JSON verisi) ikilisidir. 404 cevapları da
+    (negatif önbellek) daha kısa bir süre için saklanır.
+    Disk kayıt sayısı bellekte tutulur; okunan kaydın kullanım zamanı (LRU silme sırası) yalnızca son yazılan
+    zamandan touch_interval saniye sonra güncellenir, böylece isabetler diske yazmaz.
+    """
+
+    def __init__(self, db_file: str = None, ttl: float = 7 * 24 * 3600, negative_ttl: float = 24 * 3600,
+                 max_entries: int = 50_000, memory_entries: int = 2048, touch_interval: float = 3600):
+        self.db_file = db_file              # None ise yalnızca bellek kullanılır
+        self.ttl = ttl                      # başarılı cevapların geçerlilik süresi (saniye)
+        self.negative_ttl = negative_ttl    # 404 cevaplarının geçerlilik süresi (saniye)
+        self.max_entries = max_entries      # diskte tutulacak en fazla kayıt
+        self.memory_entries = memory_entries
+        self.touch_interval = touch_interval  # kullanım zamanının güncellenme aralığı (saniye)
+        self._disk_entries = 0              # diskteki kayıt sayısı; bağlantı açılırken bir kez sayılır
+        self._memory = OrderedDict()        # url -> (bitiş zamanı, durum kodu, veri)
+        self._conn = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # Disk bağlantısını ilk ihtiyaç anında açar; önbellek hiç kullanılmazsa dosya oluşmaz
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS metadata_cache (
+                    url TEXT PRIMARY KEY,
+                    status INTEGER NOT NULL,
+                    data TEXT,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_metadata_cache_accessed ON metadata_cache (accessed_at)')
+            conn.commit()
+            self._disk_entries = conn.execute('SELECT COUNT(*) FROM metadata_cache').fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    # Kaydı bellekteki LRU'ya ekler, sınır aşılırsa en eski kaydı atar
+    def _remember(self, url: str, entry: tuple):
+        self._memory[url] = entry
+        self._memory.move_to_end(url)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    # URL için geçerli bir kayıt varsa (durum kodu, veri) döndürür, yoksa None
+    def get(self, url: str):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(url)
+                    self.hits += 1
+                    return entry[1], entry[2]
+                del self._memory[url]
+
+            if self.db_file:
+                conn = self._connection()
+                row = conn.execute('SELECT status, data, expires_at, accessed_at FROM metadata_cache WHERE url = ?',
+                                   (url,)).fetchone()
+                if row and row[2] > now:
+                    data = json.loads(row[1]) if row[1] is not None else None
+                    self._remember(url, (row[2], row[0], data))
+                    if now - row[3] >= self.touch_interval:
+                        conn.execute('UPDATE metadata_cache SET accessed_at = ? WHERE url = ?', (now, url))
+                        conn.commit()
+                    self.hits += 1
+                    return row[0], data
+
+            self.misses += 1
+            return None
+
+    # Cevabı önbelleğe yazar; yalnızca 200 ve 404 cevapları saklanır
+    def set(self, url: str, status: int, data=None):
+        if status == 200:
+            ttl = self.ttl
+        elif status == 404:
+            ttl = self.negative_ttl
+            data = None
+        else:
+            return
+
+        now = time.time()
+        expires_at = now + ttl
+        with self._lock:
+            self._remember(url, (expires_at, status, data))
+            if self.db_file:
+                conn = self._connection()
+                if conn.execute('SELECT 1 FROM metadata_cache WHERE url = ?', (url,)).fetchone() is None:
+                    self._disk_entries += 1
+                conn.execute('INSERT OR REPLACE INTO metadata_cache VALUES (?, ?, ?, ?, ?)',
+                             (url, status, json.dumps(data, ensure_ascii=False) if data is not None else None,
+                              expires_at, now))
+                self._evict(conn)
+                conn.commit()
+
+    # Disk kayıt sayısı sınırı aşarsa en uzun süredir kullanılmayan kayıtları siler; kayıtlar sayılmaz
+    def _evict(self, conn):
+        if self._disk_entries <= self.max_entries:
+            return
+        # Her yazmada silme yapmamak için sınırın %10'u kadar fazladan yer açılır
+        excess = self._disk_entries - self.max_entries + max(1, self.max_entries // 10)
+        deleted = conn.execute('''
+            DELETE FROM metadata_cache WHERE url IN (
+                SELECT url FROM metadata_cache ORDER BY accessed_at LIMIT ?
+            )
+        ''', (excess,)).rowcount
+        self._disk_entries -= deleted
+        self.evictions += deleted
+
+    # Tüm kayıtları siler
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self.db_file:
+                conn = self._connection()
+                conn.execute('DELETE FROM metadata_cache')
+                conn.commit()
+                self._disk_entries = 0
+
+    # İsabet/ıskalama sayaçlarını döndürür
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "evictions": self.evictions,
+            "memory_entries": len(self._memory),
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
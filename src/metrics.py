@@ -0,0 +1,221 @@
+"""
+Süreç içi ölçümler: sayaçlar ve gecikme histogramları, Prometheus metin biçiminde dışa aktarılır.
+
+Ölçümler üretimde açık bırakılacak kadar ucuzdur: bir gözlem iki perf_counter çağrısı, kova için ikili arama
+ve ölçüm başına bir kilitten oluşur; etiket değerleri yalnızca /metrics isteğinde metne çevrilir.
+Her süreç kendi ölçümlerini tutar (uvicorn --workers N ile her worker ayrı değer raporlar).
+
+Tanımlı ölçümler:
+    library_operation_seconds{operation}               Library metodlarının süresi (arama, değişiklik, yükleme)
+    library_operation_failures_total{operation}        False döndüren ya da hata fırlatan çağrılar
+    storage_write_seconds{backend, operation}          arka ucun diske/veritabanına yazma süresi
+    storage_write_failures_total{backend, operation}   başarısız yazmalar
+    openlibrary_requests_total{status}                 OpenLibrary HTTP istekleri (durum kodu ya da "error")
+    openlibrary_request_seconds                        OpenLibrary istek süresi
+    http_requests_total{method, path, status}          API istekleri (path rota şablonudur, ör. /books/{isbn})
+    http_request_seconds{method, path}                 API istek süresi
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+# Gecikme histogramlarının kova üst sınırları (saniye); 10 µs'lik aramalardan saniyeler süren isteklere kadar
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str):
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+# Etiket adları ve değerlerinden {ad="değer",...} metnini oluşturur
+def _labels(names, values, extra: str = ""):
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Etiket değerleri başına artan sayaç."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, label_names=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._values = {}  # etiket değerleri -> sayı
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: int = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def collect(self):
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, labels)} {value}" for labels, value in sorted(values)]
+
+
+class Histogram:
+    """
+    Sabit kovalı gecikme histogramı. Her etiket değeri için kova sayıları, toplam süre ve gözlem sayısı tutulur;
+    kovalar gözlem sırasında değil dışa aktarılırken kümülatif hale getirilir.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}  # etiket değerleri -> [kova sayıları, toplam süre, gözlem sayısı]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *labels):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    # Gözlem sayısı ve toplam süre
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def total(self, *labels):
+        series = self._series.get(labels)
+        return series[1] if series else 0.0
+
+    def collect(self):
+        with self._lock:
+            snapshot = [(labels, list(series[0]), series[1], series[2]) for labels, series in self._series.items()]
+        lines = []
+        for labels, counts, total, count in sorted(snapshot):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Registry:
+    """Ölçümleri adlarıyla tutar; aynı adla ikinci kez istenen ölçüm mevcut nesneyi döndürür."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help: str, label_names, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, label_names, **kwargs)
+            return metric
+
+    def counter(self, name: str, help: str, label_names=()):
+        return self._get(Counter, name, help, label_names)
+
+    def histogram(self, name: str, help: str, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, help, label_names, buckets=buckets)
+
+    # Tüm ölçümleri Prometheus metin biçiminde (text/plain; version=0.0.4) döndürür
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+OPERATION_SECONDS = REGISTRY.histogram("library_operation_seconds", "Library işlem süresi", ("operation",))
+OPERATION_FAILURES = REGISTRY.counter("library_operation_failures_total", "Başarısız Library işlemleri",
+                                      ("operation",))
+STORAGE_WRITE_SECONDS = REGISTRY.histogram("storage_write_seconds", "Depolama arka ucu yazma süresi",
+                                           ("backend", "operation"))
+STORAGE_WRITE_FAILURES = REGISTRY.counter("storage_write_failures_total", "Başarısız depolama yazmaları",
+                                          ("backend", "operation"))
+OPENLIBRARY_REQUESTS = REGISTRY.counter("openlibrary_requests_total", "OpenLibrary HTTP istekleri", ("status",))
+OPENLIBRARY_SECONDS = REGISTRY.histogram("openlibrary_request_seconds", "OpenLibrary istek süresi")
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "API istekleri", ("method", "path", "status"))
+HTTP_SECONDS = REGISTRY.histogram("http_request_seconds", "API istek süresi", ("method", "path"))
+
+
+# Library metodunun süresini ölçer; False döndüren ya da hata fırlatan çağrılar başarısız sayılır
+def timed(operation: str):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                OPERATION_FAILURES.inc(operation)
+                raise
+            finally:
+                OPERATION_SECONDS.observe(time.perf_counter() - start, operation)
+            if result is False:
+                OPERATION_FAILURES.inc(operation)
+            return result
+        return wrapper
+    return decorator
+
+
+# Yazma fonksiyonunu süre ölçümüyle sarar; arka plan yazıcısında çalışan yazmaların gerçek süresi ölçülür
+def timed_write(backend: str, func):
+    operation = func.__name__.lstrip("_")
+
+    def wrapper(*args):
+        start = time.perf_counter()
+        try:
+            result = func(*args)
+        except Exception:
+            STORAGE_WRITE_FAILURES.inc(backend, operation)
+            raise
+        finally:
+            STORAGE_WRITE_SECONDS.observe(time.perf_counter() - start, backend, operation)
+        if result is False:
+            STORAGE_WRITE_FAILURES.inc(backend, operation)
+        return result
+    return wrapper
+
+
+# OpenLibrary isteğini kaydeder; status None ise istek bir bağlantı hatası ya da zaman aşımıyla bitti
+def record_openlibrary_request(start: float, status: int = None):
+    OPENLIBRARY_SECONDS.observe(time.perf_counter() - start)
+    OPENLIBRARY_REQUESTS.inc(str(status) if status is not None else "error")
+
+
+# FastAPI/Starlette HTTP ara katmanı: app.middleware("http")(timing_middleware)
+# Yol etiketi rota şablonundan alınır, böylece her ISBN ayrı bir seri oluşturmaz
+async def timing_middleware(request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", "bilinmeyen")
+        HTTP_SECONDS.observe(time.perf_counter() - start, request.method, path)
+        HTTP_REQUESTS.inc(request.method, path, str(status))
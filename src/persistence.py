@@ -0,0 +1,62 @@
+import atexit
+import queue
+import threading
+
+
+class BackgroundWriter:
+    """
+    Disk yazma işlemlerini tek bir arka plan thread'inde sırayla çalıştırır.
+    - İstekleri işleyen kod yazmanın bitmesini beklemez
+    - İşlemler gönderildikleri sırayla uygulanır (günlük kayıtları ve sıkıştırma karışmaz)
+    - flush() kuyruktaki tüm işlemler bitene kadar bekler
+    Süreç kapanırken kuyrukta kalan işlemler de yazılır.
+    """
+
+    def __init__(self, name: str = "persistence-writer"):
+        self._queue = queue.Queue()
+        self._closed = False
+        self.failures = 0                # hata ile sonuçlanan işlem sayısı
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                func, args = item
+                # Bir işlemin hatası sonraki yazmaları durdurmasın
+                if func(*args) is False:
+                    self.failures += 1
+            except Exception:
+                self.failures += 1
+            finally:
+                self._queue.task_done()
+
+    # İşlemi kuyruğa ekler; yazıcı kapatılmışsa doğrudan çalıştırır
+    def submit(self, func, *args):
+        if self._closed:
+            return func(*args)
+        self._queue.put((func, args))
+        return True
+
+    # Henüz yazılmamış işlem sayısı
+    @property
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    # Kuyruktaki tüm işlemlerin tamamlanmasını bekler
+    def flush(self):
+        if not self._closed:
+            self._queue.join()
+
+    # Kuyruğu boşaltır ve thread'i durdurur
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+        atexit.unregister(self.close)
@@ -0,0 +1,82 @@
+"""
+İade tarihi zamanlayıcısı: ödünçleri iade tarihine göre bir min-heap'te tutar ve zamanı gelenleri gecikmiş olarak ayırır.
+
+- schedule()/cancel() ödünç açılıp kapandıkça çağrılır; iptal edilen kayıtlar heap'ten hemen silinmez, sıraları
+  geldiğinde atlanır (lazy deletion). Atlanan kayıtlar çoğalınca heap yeniden kurulur.
+- advance(now) iade tarihi now'a kadar olan ödünçleri heap'ten çıkarır (her biri O(log n)) ve gecikenlere ekler;
+  yalnızca yeni gecikenleri döndürür. Kitaplar taranmaz.
+- Gecikenler heap'ten çıkış sırasıyla tutulur (iade tarihi geçmişte verilen yeni ödünçler dışında bu iade tarihi
+  sırasıdır); overdue() sıralama yapmaz.
+- rebuild() yeniden başlatmada kalıcı ödünçlerden heap'i O(n) ile kurar.
+"""
+import heapq
+import threading
+
+
+class DueScheduler:
+    def __init__(self):
+        self._heap = []                  # (iade tarihi, barkod); tek nüshalı kitaplarda barkod ISBN'dir
+        self._pending = {}               # barkod -> henüz gecikmemiş ödünç
+        self._overdue = {}               # barkod -> gecikmiş ödünç, iade tarihi sırasıyla
+        self._lock = threading.Lock()
+
+    # Ödüncü iade tarihine göre sıraya koyar
+    def schedule(self, loan):
+        with self._lock:
+            self._overdue.pop(loan.barcode, None)
+            self._pending[loan.barcode] = loan
+            heapq.heappush(self._heap, (loan.due_at, loan.barcode))
+
+    # Kapanan ödüncü zamanlayıcıdan çıkarır; heap'teki kaydı sırası gelince atlanır
+    def cancel(self, barcode: str):
+        with self._lock:
+            self._pending.pop(barcode, None)
+            self._overdue.pop(barcode, None)
+            if len(self._heap) > 2 * len(self._pending) + 64:
+                self._heap = [(loan.due_at, loan.barcode) for loan in self._pending.values()]
+                heapq.heapify(self._heap)
+
+    # Tüm ödünçlerden yeniden kurar ve now'a kadar gecikenleri ayırır
+    def rebuild(self, loans, now: float):
+        with self._lock:
+            self._pending = {loan.barcode: loan for loan in loans}
+            self._overdue = {}
+            self._heap = [(loan.due_at, loan.barcode) for loan in self._pending.values()]
+            heapq.heapify(self._heap)
+        return self.advance(now)
+
+    # İade tarihi now'dan önce olan ödünçleri gecikenlere taşır; yeni gecikenleri iade tarihi sırasıyla döndürür
+    def advance(self, now: float):
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] < now:
+                due_at, barcode = heapq.heappop(self._heap)
+                loan = self._pending.get(barcode)
+                if loan is None or loan.due_at != due_at:
+                    continue  # iptal edilmiş ya da yeniden planlanmış kayıt
+                del self._pending[barcode]
+                self._overdue[barcode] = loan
+                due.append(loan)
+        return due
+
+    # Gecikmiş ödünçler, gecikmeye girdikleri sırayla
+    def overdue(self, limit: int = None):
+        with self._lock:
+            loans = self._overdue.values()
+            if limit is None:
+                return list(loans)
+            return [loan for _, loan in zip(range(limit), loans)]
+
+    # Sıradaki (henüz gecikmemiş) en erken iade tarihi; ödünç yoksa None
+    def next_due(self):
+        with self._lock:
+            while self._heap:
+                due_at, barcode = self._heap[0]
+                loan = self._pending.get(barcode)
+                if loan is not None and loan.due_at == due_at:
+                    return due_at
+                heapq.heappop(self._heap)
+            return None
+
+    def __len__(self):
+        return len(self._pending) + len(self._overdue)
@@ -0,0 +1,146 @@
+import heapq
+import math
+import re
+import unicodedata
+from bisect import bisect_left, insort
+
+# Türkçe'de "I" küçültüldüğünde "ı", "İ" küçültüldüğünde "i" olur; standart casefold bunu bilmez.
+# Aramada ikisini aynı harf saymak hem Türkçe hem İngilizce yazımı yakalar.
+_TURKISH_I = str.maketrans({"İ": "i", "I": "i", "ı": "i"})
+_TOKEN_RE = re.compile(r"\w+")
+
+
+# Türkçe İ/ı harflerini dikkate alarak büyük/küçük harf duyarsız karşılaştırma anahtarı üretir
+def casefold_tr(text: str) -> str:
+    return text.translate(_TURKISH_I).casefold()
+
+
+# casefold_tr'ye ek olarak aksanları da atar (ç -> c, ş -> s, ğ -> g, ö -> o, ü -> u)
+def fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", casefold_tr(text))
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+# Metni normalize edilmiş kelimelere ayırır
+def tokenize(text: str):
+    return _TOKEN_RE.findall(fold(text))
+
+
+# Kelimenin üçlü harf gruplarını (trigram) döndürür; kelime başı ve sonu boşlukla işaretlenir
+def trigrams(token: str):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    Başlık ve yazar alanları üzerinde artımlı olarak güncellenen ters (inverted) indeks.
+    - Tam kelime eşleşmesi: kelime -> belgeler sözlüğü
+    - Önek araması: sıralı kelime listesi üzerinde ikili arama
+    - Hatalı yazım: kelimelerin trigram indeksi üzerinden benzerlik
+    Belgeler ISBN ile tanımlanır.
+    """
+
+    FIELD_WEIGHTS = {"title": 2.0, "author": 1.0}
+    PREFIX_WEIGHT = 0.8        # önek eşleşmesi tam eşleşmeye göre bu oranda puan alır
+    FUZZY_WEIGHT = 0.6         # hatalı yazım eşleşmesi benzerlik ile çarpılarak bu oranda puan alır
+    FUZZY_THRESHOLD = 0.5      # trigram Dice benzerliği alt sınırı
+    MAX_EXPANSIONS = 50        # bir sorgu kelimesinin genişletilebileceği en fazla kelime
+
+    def __init__(self):
+        self._postings = {}    # kelime -> {isbn: alan ağırlığı}
+        self._documents = {}   # isbn -> belgedeki kelimeler
+        self._vocabulary = []  # önek araması için sıralı kelime listesi
+        self._trigrams = {}    # trigram -> kelimeler
+
+    def __len__(self):
+        return len(self._documents)
+
+    # Belgeyi indekse ekler; aynı ISBN tekrar eklenirse önce eskisi çıkarılır
+    def add(self, isbn: str, title: str, author: str):
+        if isbn in self._documents:
+            self.remove(isbn)
+
+        weights = {}
+        for field_name, text in (("title", title), ("author", author)):
+            for token in tokenize(text):
+                weights[token] = weights.get(token, 0.0) + self.FIELD_WEIGHTS[field_name]
+
+        self._documents[isbn] = list(weights)
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                insort(self._vocabulary, token)
+                for gram in trigrams(token):
+                    self._trigrams.setdefault(gram, set()).add(token)
+            postings[isbn] = weight
+
+    # Belgeyi indeksten çıkarır; artık hiçbir belgede geçmeyen kelimeler de silinir
+    def remove(self, isbn: str):
+        for token in self._documents.pop(isbn, ()):
+            postings = self._postings[token]
+            postings.pop(isbn, None)
+            if postings:
+                continue
+            del self._postings[token]
+            del self._vocabulary[bisect_left(self._vocabulary, token)]
+            for gram in trigrams(token):
+                tokens = self._trigrams[gram]
+                tokens.discard(token)
+                if not tokens:
+                    del self._trigrams[gram]
+
+    # Sorgu kelimesinin eşleştiği indeks kelimelerini ve eşleşme ağırlıklarını döndürür
+    def _expand(self, query_token: str, prefix: bool, fuzzy: bool):
+        matches = {}
+        if query_token in self._postings:
+            matches[query_token] = 1.0
+
+        if prefix:
+            start = bisect_left(self._vocabulary, query_token)
+            for token in self._vocabulary[start:start + self.MAX_EXPANSIONS]:
+                if not token.startswith(query_token):
+                    break
+                if token not in matches:
+                    matches[token] = self.PREFIX_WEIGHT * len(query_token) / len(token)
+
+        if fuzzy and not matches and len(query_token) >= 3:
+            query_grams = trigrams(query_token)
+            shared = {}
+            for gram in query_grams:
+                for token in self._trigrams.get(gram, ()):
+                    shared[token] = shared.get(token, 0) + 1
+            best = heapq.nlargest(self.MAX_EXPANSIONS, shared.items(), key=lambda item: item[1])
+            for token, common in best:
+                similarity = 2 * common / (len(query_grams) + len(trigrams(token)))
+                if similarity >= self.FUZZY_THRESHOLD:
+                    matches[token] = self.FUZZY_WEIGHT * similarity
+
+        return matches
+
+    # Sorguya en uygun belgeleri puanlarına göre sıralı (isbn, puan) listesi olarak döndürür
+    def search(self, query: str, limit: int = 10, prefix: bool = True, fuzzy: bool = True):
+        query_tokens = list(dict.fromkeys(tokenize(query)))
+        if not query_tokens or limit <= 0:
+            return []
+
+        total_documents = len(self._documents)
+        scores = {}
+        matched = {}
+        for query_token in query_tokens:
+            best_for_token = {}
+            for token, match_weight in self._expand(query_token, prefix, fuzzy).items():
+                postings = self._postings[token]
+                idf = math.log(1 + total_documents / len(postings))
+                for isbn, field_weight in postings.items():
+                    score = match_weight * field_weight * idf
+                    if score > best_for_token.get(isbn, 0.0):
+                        best_for_token[isbn] = score
+            for isbn, score in best_for_token.items():
+                scores[isbn] = scores.get(isbn, 0.0) + score
+                matched[isbn] = matched.get(isbn, 0) + 1
+
+        # Sorgudaki kelimelerin daha fazlasını içeren belgeler önce gelir
+        ranked = heapq.nlargest(limit, scores.items(), key=lambda item: (matched[item[0]], item[1]))
+        return [(isbn, round(score, 4)) for isbn, score in ranked]
@@ -0,0 +1,210 @@
+"""
+Kütüphane için sıkıştırılmış binary anlık görüntü (snapshot) biçimi.
+
+Dosya düzeni (tüm sayılar little-endian):
+    başlık      : sihirli değer, sürüm, kitap sayısı, ödünç/tür/yazar sayaçları, kütüphane adı
+    kayıtlar    : kitap başına sabit uzunlukta kayıt (ekleme sırasıyla)
+    ISBN indeksi: ISBN'e göre sıralı kayıt numaraları (ikili arama ve sayfalama için)
+    string tablosu: başlık, yazar, ISBN ve dosya biçimi metinleri (UTF-8, tekrarlar bir kez saklanır)
+
+Dosya mmap ile açılır; açılış sırasında yalnızca başlık okunur, kitaplar ihtiyaç anında çözülür.
+Kayıtlar Library._book_to_dict'in ürettiği JSON şemasıyla aynı sözlüklere dönüştürülür.
+
+Kullanım:
+    python src/snapshot.py library.json library.snap   # JSON -> binary
+    python src/snapshot.py library.snap library.json   # binary -> JSON
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"LIBSNAP\0"
+VERSION = 1
+
+# sihirli değer, sürüm, kitap sayısı, ödünç, Book, EBook, AudioBook, yazar sayısı, ad konumu, ad uzunluğu
+HEADER = struct.Struct("<8sHIIIIIIII")
+# isbn, başlık, yazar (konum, uzunluk), tür, bayraklar, dosya biçimi (konum, uzunluk), dosya boyutu, süre
+RECORD = struct.Struct("<IIIIIIBBIIdI")
+INDEX = struct.Struct("<I")
+ISBN_FIELDS = struct.Struct("<II")
+
+BOOK_TYPES = ("Book", "EBook", "AudioBook")
+FLAG_BORROWED = 1
+
+
+# Kitap sözlüklerini binary anlık görüntü olarak yazar; yarım kalan yazma eski dosyayı bozmaz
+def write_snapshot(path: str, name: str, books):
+    strings = bytearray()
+    offsets = {}
+
+    def add_string(text: str):
+        data = text.encode("utf-8")
+        offset = offsets.get(data)
+        if offset is None:
+            offset = offsets[data] = len(strings)
+            strings.extend(data)
+        return offset, len(data)
+
+    records = bytearray()
+    isbn_keys = []
+    type_counts = dict.fromkeys(BOOK_TYPES, 0)
+    authors = set()
+    borrowed = 0
+    for book in books:
+        book_type = book.get("type", "Book")
+        if book_type not in type_counts:
+            raise ValueError(f"Bilinmeyen kitap türü: {book_type}")
+        isbn = add_string(book["isbn"])
+        title = add_string(book["title"])
+        author = add_string(book["author"])
+        file_format = add_string(book.get("file_format") or "")
+        flags = FLAG_BORROWED if book.get("is_borrowed") else 0
+        records.extend(RECORD.pack(*isbn, *title, *author, BOOK_TYPES.index(book_type), flags, *file_format,
+                                   float(book.get("file_size") or 0.0), int(book.get("duration_minutes") or 0)))
+        isbn_keys.append(book["isbn"].encode("utf-8"))
+        type_counts[book_type] += 1
+        authors.add(book["author"])
+        borrowed += bool(flags)
+
+    # Aynı ISBN birden fazla kez geçerse ilk eklenen önce gelir (sıralama kararlıdır)
+    order = sorted(range(len(isbn_keys)), key=isbn_keys.__getitem__)
+    index = struct.pack(f"<{len(order)}I", *order)
+    name_offset, name_length = add_string(name)
+    header = HEADER.pack(MAGIC, VERSION, len(isbn_keys), borrowed, *type_counts.values(), len(authors),
+                         name_offset, name_length)
+
+    temp_file = f"{path}.tmp"
+    with open(temp_file, "wb") as f:
+        f.write(header)
+        f.write(records)
+        f.write(index)
+        f.write(strings)
+    os.replace(temp_file, path)
+
+
+class SnapshotReader:
+    """
+    Binary anlık görüntüyü mmap ile okur. Açılış yalnızca başlığı okur; kayıtlar istendiğinde çözülür.
+    Sayaçlar (kitap, ödünç, tür, yazar) kitaplar okunmadan başlıktan alınır.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, version, count, borrowed, books, ebooks, audiobooks, authors,
+             name_offset, name_length) = HEADER.unpack_from(self._mmap, 0)
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} geçerli bir anlık görüntü dosyası değil")
+            self._count = count
+            self.borrowed_count = borrowed
+            self.type_counts = dict(zip(BOOK_TYPES, (books, ebooks, audiobooks)))
+            self.author_count = authors
+            self._records_start = HEADER.size
+            self._index_start = self._records_start + count * RECORD.size
+            self._strings_start = self._index_start + count * INDEX.size
+            self.name = self._string(name_offset, name_length)
+        except Exception:
+            self._mmap.close()
+            raise
+
+    def __len__(self):
+        return self._count
+
+    # Kayıtları ekleme sırasıyla sözlük olarak döndürür
+    def __iter__(self):
+        for number in range(self._count):
+            yield self.record(number)
+
+    def _string(self, offset: int, length: int):
+        start = self._strings_start + offset
+        return self._mmap[start:start + length].decode("utf-8")
+
+    def _isbn_at(self, position: int):
+        number = INDEX.unpack_from(self._mmap, self._index_start + position * INDEX.size)[0]
+        offset, length = ISBN_FIELDS.unpack_from(self._mmap, self._records_start + number * RECORD.size)
+        start = self._strings_start + offset
+        return number, self._mmap[start:start + length]
+
+    # İndekste ISBN'den büyük/büyük-eşit ilk konumu ikili arama ile bulur
+    def _bisect(self, isbn: str, right: bool):
+        key = isbn.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            current = self._isbn_at(middle)[1]
+            if current < key or (right and current == key):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    # Kayıt numarasındaki kitabı _book_to_dict şemasında sözlük olarak döndürür
+    def record(self, number: int):
+        (isbn_offset, isbn_length, title_offset, title_length, author_offset, author_length, book_type, flags,
+         format_offset, format_length, file_size, duration) = RECORD.unpack_from(
+            self._mmap, self._records_start + number * RECORD.size)
+        book = {
+            "title": self._string(title_offset, title_length),
+            "author": self._string(author_offset, author_length),
+            "isbn": self._string(isbn_offset, isbn_length),
+            "is_borrowed": bool(flags & FLAG_BORROWED),
+            "type": BOOK_TYPES[book_type]
+        }
+        if book["type"] == "EBook":
+            book["file_format"] = self._string(format_offset, format_length)
+            book["file_size"] = file_size
+        elif book["type"] == "AudioBook":
+            book["duration_minutes"] = duration
+        return book
+
+    # ISBN ile kitabı bulur, yoksa None döndürür
+    def find(self, isbn: str):
+        position = self._bisect(isbn, right=False)
+        if position < self._count:
+            number, current = self._isbn_at(position)
+            if current == isbn.encode("utf-8"):
+                return self.record(number)
+        return None
+
+    # ISBN sırasıyla, verilen ISBN'den sonraki en fazla limit kitabı döndürür
+    def page(self, after: str = "", limit: int = 500):
+        start = self._bisect(after, right=True) if after else 0
+        return [self.record(self._isbn_at(position)[0])
+                for position in range(start, min(start + limit, self._count))]
+
+    def close(self):
+        self._mmap.close()
+
+
+# JSON dosyasını binary anlık görüntüye dönüştürür
+def json_to_snapshot(json_file: str, snapshot_file: str):
+    with open(json_file, "r", encoding="utf-8") as f:
+        library_data = json.load(f)
+    write_snapshot(snapshot_file, library_data.get("name", ""), library_data.get("books", []))
+
+
+# Binary anlık görüntüyü JSON dosyasına dönüştürür
+def snapshot_to_json(snapshot_file: str, json_file: str):
+    reader = SnapshotReader(snapshot_file)
+    try:
+        library_data = {"name": reader.name, "books": list(reader)}
+    finally:
+        reader.close()
+    with open(json_file, "w", encoding="utf-8") as f:
+        json.dump(library_data, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    source, target = sys.argv[1], sys.argv[2]
+    if source.endswith(".json"):
+        json_to_snapshot(source, target)
+    else:
+        snapshot_to_json(source, target)
+    print(f"{source} -> {target}")
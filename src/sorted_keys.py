@@ -0,0 +1,76 @@
+from bisect import bisect_left, bisect_right, insort
+
+
+class SortedKeys:
+    """
+    Sıralı anahtar kümesi (ör. ISBN'ler), imleç tabanlı sayfalama için.
+    Anahtarlar tek bir büyük liste yerine en fazla 2 * load elemanlı sıralı parçalarda tutulur; her parçanın en büyük
+    anahtarı ayrı bir listededir. Ekleme ve silme yalnızca ilgili parçayı kaydırır (O(load)); tek listedeki gibi her
+    değişiklikte tüm anahtarlar (O(n)) kaydırılmaz. Aralık okuması parçalar üzerinde ikili arama yapar.
+    Kilitleme çağırana bırakılır.
+    """
+
+    def __init__(self, keys=(), load: int = 1000):
+        self._load = load
+        keys = sorted(keys)
+        self._chunks = [keys[start:start + load] for start in range(0, len(keys), load)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]   # her parçanın en büyük anahtarı
+        self._len = len(keys)
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        for chunk in self._chunks:
+            yield from chunk
+
+    def add(self, key):
+        if not self._chunks:
+            self._chunks.append([key])
+            self._maxes.append(key)
+        else:
+            index = min(bisect_left(self._maxes, key), len(self._maxes) - 1)
+            chunk = self._chunks[index]
+            insort(chunk, key)
+            self._maxes[index] = chunk[-1]
+            # Parça büyüdüyse ikiye bölünür; parça boyutları load ile 2 * load arasında kalır
+            if len(chunk) > 2 * self._load:
+                self._chunks[index:index + 1] = [chunk[:self._load], chunk[self._load:]]
+                self._maxes[index:index + 1] = [chunk[self._load - 1], chunk[-1]]
+        self._len += 1
+
+    # Anahtar kümede olmalıdır
+    def remove(self, key):
+        index = bisect_left(self._maxes, key)
+        chunk = self._chunks[index]
+        del chunk[bisect_left(chunk, key)]
+        if chunk:
+            self._maxes[index] = chunk[-1]
+        else:
+            del self._chunks[index]
+            del self._maxes[index]
+        self._len -= 1
+
+    # start <= anahtar < stop olan anahtarlar, sırasıyla (üreteç); ilk parça ikili aramayla bulunur
+    def irange(self, start, stop):
+        index = bisect_left(self._maxes, start)
+        position = bisect_left(self._chunks[index], start) if index < len(self._chunks) else 0
+        while index < len(self._chunks):
+            chunk = self._chunks[index]
+            for position in range(position, len(chunk)):
+                if chunk[position] >= stop:
+                    return
+                yield chunk[position]
+            index += 1
+            position = 0
+
+    # after'dan büyük ilk limit anahtar, sırasıyla; after boşsa baştan başlanır
+    def after(self, after, limit: int):
+        index = bisect_right(self._maxes, after) if after else 0
+        keys = []
+        position = bisect_right(self._chunks[index], after) if after and index < len(self._chunks) else 0
+        while len(keys) < limit and index < len(self._chunks):
+            keys.extend(self._chunks[index][position:position + limit - len(keys)])
+            index += 1
+            position = 0
+        return keys
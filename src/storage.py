@@ -0,0 +1,1063 @@
+"""
+Kütüphane verileri için depolama arka uçları.
+
+Library kitapları bellekte tutar ve indeksler; kalıcılık arka uca bırakılır (SQLiteStorage pushdown modunda
+kitaplar belleğe yüklenmez, sorgular veritabanında çalışır). Arka uçlar kitapları Library._book_to_dict
+şemasındaki sözlükler olarak alır ve döndürür:
+    JsonStorage   : JSON anlık görüntü, isteğe bağlı günlük (journal) ve binary (.snap) anlık görüntü
+    SQLiteStorage : SQLite veritabanı (WAL)
+    MemoryStorage : yalnızca bellek, hiçbir şey kaydedilmez (testler ve karşılaştırmalar için)
+
+Değişiklikler kayıt (record) listeleri olarak iletilir; bir commit() çağrısındaki tüm kayıtlar tek bir
+yazma işlemiyle kaydedilir:
+    {"op": "add", "book": {...}}                           kitabı ekler
+    {"op": "upsert", "book": {...}}                        kitabı ekler, varsa tüm alanlarını günceller
+    {"op": "remove", "isbn": "..."}                        kitabı siler
+    {"op": "status", "isbn": "...", "is_borrowed": bool}   ödünç durumunu değiştirir
+    {"op": "member", "member": {...}}                      üyeyi ekler ya da günceller
+    {"op": "member_remove", "member_id": "..."}            üyeyi siler
+    {"op": "loan", "loan": {...}}                          nüshayı üyeye ödünç verir (nüsha başına tek aktif ödünç)
+    {"op": "loan_end", "isbn": "...", "barcode": "..."}    ödüncü kapatır
+    {"op": "hold", "hold": {...}}                          üyeyi kitabın ayırtma sırasının sonuna ekler
+    {"op": "hold_remove", "isbn": "...", "member_id": "..."}  ayırtmayı sıradan çıkarır
+    {"op": "copy", "copy": {...}}                          kitaba nüsha ekler
+    {"op": "copy_remove", "isbn": "...", "barcode": "..."}  nüshayı siler
+    {"op": "copy_status", "isbn": "...", "barcode": "...", "on_loan": bool}  nüshanın ödünç durumunu değiştirir
+
+Üyeler, ödünçler, ayırtmalar ve nüshalar (defter, ledger) {"members": [...], "loans": [...], "holds": [...],
+"copies": [...]} sözlüğü olarak yüklenir ve yazılır:
+    üye      : {"member_id", "name", "email"}
+    ödünç    : {"isbn", "member_id", "borrowed_at", "due_at", "barcode"} (zamanlar Unix zamanı, saniye)
+    ayırtma  : {"isbn", "member_id", "placed_at"}; liste sırası her kitabın ayırtma sırasıdır (ilk gelen ilk alır)
+    nüsha    : {"barcode", "isbn", "on_loan"}
+Nüshası kaydedilmemiş kitap tek bir fiziksel nüshadır; ödüncünün barkodu ISBN'dir (barkodsuz eski ödünç kayıtları da
+böyle okunur).
+
+Birden fazla süreç (ör. uvicorn --workers 4) aynı veriyi paylaşabilir (shared):
+    JsonStorage(shared=True)     : yazmalar <json_file>.lock üzerinde flock ile sıraya girer; diğer süreçlerin
+                                   değişiklikleri günlüğün yeni satırlarından okunur (poll)
+    SQLiteStorage(pushdown=True) : veritabanı tek doğru kaynaktır; PRAGMA data_version değişince
+                                   Library'nin bellekteki kitap önbelleği temizlenir
+"""
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager, nullcontext
+from itertools import groupby
+from pathlib import Path
+from message_display import UnicodeDisplay
+from metrics import timed_write
+from persistence import BackgroundWriter
+from search import casefold_tr, tokenize
+from snapshot import SnapshotReader, write_snapshot
+
+try:
+    import fcntl
+except ImportError:  # Windows: dosya kilidi yok, paylaşımlı JSON modu kullanılamaz
+    fcntl = None
+
+LEDGER_KEYS = ("members", "loans", "holds", "copies")
+
+
+def empty_ledger():
+    return {key: [] for key in LEDGER_KEYS}
+
+
+# Ödüncün ya da loan_end kaydının nüsha barkodu; tek nüshalı kitaplarda ISBN
+def loan_barcode(record: dict):
+    return record.get("barcode") or record["isbn"]
+
+
+# Defter kayıtlarını (üye, ödünç, ayırtma ve nüsha) sırayla uygular; kitap kayıtları atlanır
+def replay_ledger(ledger: dict, records: list):
+    members = {member["member_id"]: member for member in ledger["members"]}
+    loans = {loan_barcode(loan): loan for loan in ledger["loans"]}
+    holds = {(hold["isbn"], hold["member_id"]): hold for hold in ledger["holds"]}  # ekleme sırası korunur
+    copies = {copy["barcode"]: copy for copy in ledger["copies"]}
+    for record in records:
+        op = record.get("op")
+        if op == "member":
+            members[record["member"]["member_id"]] = record["member"]
+        elif op == "member_remove":
+            members.pop(record["member_id"], None)
+        elif op == "loan":
+            loans[loan_barcode(record["loan"])] = record["loan"]
+        elif op == "loan_end":
+            loans.pop(loan_barcode(record), None)
+        elif op == "hold":
+            holds.setdefault((record["hold"]["isbn"], record["hold"]["member_id"]), record["hold"])
+        elif op == "hold_remove":
+            holds.pop((record["isbn"], record["member_id"]), None)
+        elif op == "copy":
+            copies[record["copy"]["barcode"]] = record["copy"]
+        elif op == "copy_remove":
+            copies.pop(record["barcode"], None)
+        elif op == "copy_status" and record["barcode"] in copies:
+            copies[record["barcode"]] = {**copies[record["barcode"]], "on_loan": record["on_loan"]}
+    return {"members": list(members.values()), "loans": list(loans.values()), "holds": list(holds.values()),
+            "copies": list(copies.values())}
+
+
+# poll() dönüş değeri: başka bir süreç verinin tamamını değiştirdi, kütüphane yeniden yüklenmeli
+RELOAD = "reload"
+
+
+class StorageBackend:
+    """
+    Depolama arka uçlarının ortak arayüzü. Alt sınıflar load(), commit() ve save() metodlarını uygular.
+    background_writer açıksa yazmalar ayrı bir thread'de yapılır; veriler çağıran thread'de hazırlanır,
+    böylece sonraki değişiklikler bekleyen yazmayı etkilemez.
+    """
+
+    path = None  # OpenLibrary önbelleği bu dosyanın yanında tutulur; None ise önbellek yalnızca bellektedir
+    serves_queries = False  # True ise Library kitapları belleğe yüklemez, sorguları arka uca yönlendirir
+    shared = False  # True ise başka süreçler de aynı veriyi değiştirebilir; Library değişiklikleri poll() ile izler
+
+    def __init__(self, background_writer: bool = False):
+        self._writer = BackgroundWriter() if background_writer else None
+        self.display = UnicodeDisplay()
+
+    # Kütüphaneyi yükler; (kütüphane adı, kitap sözlükleri) döndürür
+    # Kitaplar bir liste ya da henüz çözülmemiş bir SnapshotReader olabilir
+    def load(self, name: str):
+        raise NotImplementedError
+
+    # Kayıtları tek bir yazma işlemiyle uygular; başarılıysa True döndürür
+    def commit(self, records: list):
+        raise NotImplementedError
+
+    # Kütüphanenin tamamını (kitaplar ve defter) yazar (JSON'da anlık görüntü ve sıkıştırma)
+    def save(self, name: str, books: list, ledger: dict = None):
+        raise NotImplementedError
+
+    # load() ile birlikte okunan üye, ödünç ve ayırtma kayıtlarını döndürür
+    def load_ledger(self):
+        return empty_ledger()
+
+    # commit() sonrası Library'nin save() ile tüm kütüphaneyi yazması gerekiyorsa True
+    @property
+    def needs_snapshot(self):
+        return False
+
+    # İşlemi arka plan yazıcısına verir, yazıcı yoksa hemen çalıştırır
+    # Yazmanın süresi yazma gerçekten çalıştığında ölçülür (storage_write_seconds)
+    def _submit(self, func, *args):
+        func = timed_write(type(self).__name__, func)
+        if self._writer is not None:
+            return self._writer.submit(func, *args)
+        return func(*args)
+
+    # Son çağrıdan bu yana başka süreçlerin yaptığı değişiklikleri döndürür:
+    # None (değişiklik yok), uygulanacak kayıt listesi ya da RELOAD
+    def poll(self):
+        return None
+
+    # Değişiklik bölümü boyunca diğer süreçlerin yazmasını engelleyen kilit
+    def exclusive(self):
+        return nullcontext()
+
+    # poll() ve yeniden yükleme sırasında tutulan kilit; yazan süreç bitene kadar bekler
+    def shared_lock(self):
+        return nullcontext()
+
+    # Arka planda bekleyen yazmaların diske ulaşmasını bekler
+    def flush(self):
+        if self._writer is not None:
+            self._writer.flush()
+
+    # Bekleyen yazmaları tamamlar
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+class MemoryStorage(StorageBackend):
+    """Hiçbir şey kaydetmeyen arka uç; kütüphane her açılışta boş başlar."""
+
+    def load(self, name: str):
+        return name, []
+
+    def commit(self, records: list):
+        return True
+
+    def save(self, name: str, books: list, ledger: dict = None):
+        return True
+
+
+class JsonStorage(StorageBackend):
+    """
+    JSON dosyası arka ucu.
+    - Günlük kapalıyken her değişiklikte anlık görüntünün tamamı yeniden yazılır (needs_snapshot)
+    - Günlük modunda değişiklikler <json_file>.journal dosyasına satır satır eklenir, compact_after
+      kayıttan sonra anlık görüntüye sıkıştırılır
+    - binary_snapshot açıksa anlık görüntü JSON yerine mmap ile açılan .snap dosyasına yazılır; üyeler ve ödünçler
+      yanındaki .ledger.json dosyasında tutulur (JSON anlık görüntüde "members", "loans" ve "holds"
+      anahtarlarındadır)
+    - shared açıksa dosyalar süreçler arasında flock ile korunur; anlık görüntünün değiştiği dosya kimliğinden
+      (inode, mtime, boyut), günlüğe eklenen kayıtlar okunan bayt konumundan anlaşılır
+    """
+
+    def __init__(self, json_file: str = "library.json", journal: bool = False, compact_after: int = 1000,
+                 background_writer: bool = False, binary_snapshot: bool = False, shared: bool = False):
+        if shared and background_writer:
+            raise ValueError("Paylaşımlı modda arka plan yazıcısı kullanılamaz")
+        if shared and fcntl is None:
+            raise ValueError("Paylaşımlı JSON modu bu platformda desteklenmiyor")
+        super().__init__(background_writer)
+        self.json_file = json_file       # verileri kaydetmek için JSON dosyası
+        self.path = json_file
+        self.journal = journal           # değişiklikleri günlük dosyasına ekleme modu
+        self.journal_file = f"{json_file}.journal"
+        self.compact_after = compact_after  # bu kadar kayıttan sonra günlük anlık görüntüye sıkıştırılır
+        self._journal_records = 0
+        self.binary_snapshot = binary_snapshot
+        self.snapshot_file = str(Path(json_file).with_suffix(".snap"))
+        self.ledger_file = str(Path(json_file).with_suffix(".ledger.json"))
+        self._ledger = empty_ledger()    # son load() ile okunan defter
+        self.shared = shared
+        self.lock_file = f"{json_file}.lock"
+        self._lock_fd = None
+        self._lock_depth = 0
+        self._process_lock = threading.RLock()  # flock dosya tanımlayıcısı başına tutulur, thread'ler sıraya girer
+        self._journal_offset = 0    # günlükte okunmuş/yazılmış bayt sayısı
+        self._seen_snapshot = None  # son yüklenen anlık görüntünün dosya kimliği
+
+    # Bekleyen yazmaları tamamlar ve kilit dosyasını kapatır
+    def close(self):
+        super().close()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    @property
+    def needs_snapshot(self):
+        return not self.journal or self._journal_records >= self.compact_after
+
+    # Paylaşımlı modda dosya kilidini alır; iç içe çağrılar kilidi yeniden almaz
+    @contextmanager
+    def _file_lock(self, mode):
+        if not self.shared:
+            yield
+            return
+        with self._process_lock:
+            if self._lock_depth == 0:
+                if self._lock_fd is None:
+                    self._lock_fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._lock_fd, mode)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def exclusive(self):
+        return self._file_lock(fcntl.LOCK_EX if self.shared else None)
+
+    def shared_lock(self):
+        return self._file_lock(fcntl.LOCK_SH if self.shared else None)
+
+    # Anlık görüntü dosyalarının kimliği; başka bir süreç dosyayı yeniden yazınca değişir
+    def _snapshot_identity(self):
+        identity = []
+        for path in (self.json_file, self.snapshot_file, self.ledger_file):
+            try:
+                stat = os.stat(path)
+                identity.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                identity.append(None)
+        return tuple(identity)
+
+    # Anlık görüntüyü yükler, günlük modunda günlüğü de yeniden oynatır
+    def load(self, name: str):
+        with self.shared_lock():
+            name, books = self._load_snapshot(name)
+            self._seen_snapshot = self._snapshot_identity()
+            self._journal_records = self._journal_offset = 0
+            if not self.journal:
+                return name, books
+
+            records, self._journal_offset = self._read_journal()
+            self._journal_records = len(records)
+        if records:
+            books = self._replay(books, records)
+            self._ledger = replay_ledger(self._ledger, records)
+            self.display.success(f"{len(records)} günlük kaydı {self.journal_file} dosyasından uygulandı.")
+            # Paylaşımlı modda sıkıştırma bir sonraki değişiklikte, dosya kilidi altında yapılır
+            if len(records) >= self.compact_after and not self.shared:
+                self.save(name, books, self._ledger)
+        return name, books
+
+    # Defter bir kez verilir; bellekteki kopya bırakılır
+    def load_ledger(self):
+        ledger, self._ledger = self._ledger, empty_ledger()
+        return ledger
+
+    # Diğer süreçlerin değişikliklerini döndürür; shared_lock() altında çağrılmalıdır
+    # Anlık görüntü yeniden yazıldıysa ya da günlük kısaldıysa (sıkıştırma) RELOAD, yoksa yeni günlük kayıtları
+    def poll(self):
+        if not self.shared:
+            return None
+        if self._snapshot_identity() != self._seen_snapshot:
+            return RELOAD
+        if not self.journal:
+            return None
+        try:
+            size = os.path.getsize(self.journal_file)
+        except FileNotFoundError:
+            size = 0
+        if size == self._journal_offset:
+            return None
+        if size < self._journal_offset:
+            return RELOAD
+        records, self._journal_offset = self._read_journal(self._journal_offset)
+        self._journal_records += len(records)
+        return records
+
+    # Anlık görüntü (library.json) dosyasını okur
+    # Binary modda .snap dosyası varsa o açılır; yoksa JSON dosyası okunur ve ilk kayıtta .snap yazılır
+    def _load_snapshot(self, name: str):
+        self._ledger = empty_ledger()
+        try:
+            if self.binary_snapshot and Path(self.snapshot_file).exists():
+                snapshot = SnapshotReader(self.snapshot_file)
+                self.display.success(f"{len(snapshot)} kitap {self.snapshot_file} dosyasından açıldı.")
+                if Path(self.ledger_file).exists():
+                    with open(self.ledger_file, 'r', encoding='utf-8') as f:
+                        ledger = json.load(f)
+                    self._ledger = {key: ledger.get(key, []) for key in LEDGER_KEYS}
+                return snapshot.name, snapshot
+
+            if not Path(self.json_file).exists():
+                self.display.warning(f" JSON dosyası {self.json_file} bulunamadı. Boş kütüphane ile başlanıyor.")
+                return name, []
+
+            with open(self.json_file, 'r', encoding='utf-8') as f:
+                library_data = json.load(f)
+
+            books = library_data.get("books", [])
+            self._ledger = {key: library_data.get(key, []) for key in LEDGER_KEYS}
+            self.display.success(f"{len(books)} kitap {self.json_file} dosyasından yüklendi.")
+            return library_data.get("name", name), books
+        except Exception as e:
+            self.display.error(f"JSON dosyasından yüklerken hata oluştu: {e}")
+            return name, []
+
+    # Günlük dosyasındaki kayıtları verilen bayt konumundan itibaren okur; (kayıtlar, yeni konum) döndürür
+    # Satır sonu henüz yazılmamış son satır okunmaz
+    def _read_journal(self, offset: int = 0):
+        if not Path(self.journal_file).exists():
+            return [], 0
+
+        with open(self.journal_file, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        records = []
+        for line in data[:end].splitlines():
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # Çökme sırasında yarım yazılmış satır ve sonrası atlanır
+                self.display.warning(f" {self.journal_file} dosyasında bozuk kayıt atlandı.")
+                break
+        return records, offset + end
+
+    # Günlük kayıtlarını kitap sözlüklerine sırayla uygular
+    # Kayıtlar idempotenttir; sıkıştırma sırasında kesilen bir günlük tekrar uygulanabilir
+    def _replay(self, books, records: list):
+        if isinstance(books, SnapshotReader):
+            snapshot, books = books, list(books)
+            snapshot.close()
+        by_isbn = {}
+        for book in books:
+            by_isbn.setdefault(book["isbn"], book)
+        for record in records:
+            op = record.get("op")
+            if op == "add":
+                by_isbn.setdefault(record["book"]["isbn"], record["book"])
+            elif op == "upsert":
+                by_isbn[record["book"]["isbn"]] = record["book"]
+            elif op == "remove":
+                by_isbn.pop(record["isbn"], None)
+            elif op == "status" and record["isbn"] in by_isbn:
+                by_isbn[record["isbn"]]["is_borrowed"] = record["is_borrowed"]
+        return list(by_isbn.values())
+
+    # Günlük modunda kayıtları günlüğe ekler; günlük kapalıyken değişiklikler anlık görüntüyle yazılır
+    def commit(self, records: list):
+        if not self.journal:
+            return True
+        lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        self._journal_records += len(records)
+        return self._submit(self._append_journal, lines)
+
+    # Satırları günlük dosyasının sonuna ekler
+    def _append_journal(self, lines: str):
+        try:
+            data = lines.encode('utf-8')
+            with open(self.journal_file, 'ab') as f:
+                f.write(data)
+            self._journal_offset += len(data)
+            return True
+        except Exception as e:
+            self.display.error(f"Günlük dosyasına yazarken hata oluştu: {e}")
+            return False
+
+    # Anlık görüntüyü yazar; günlük modunda bu işlem sıkıştırmadır ve günlük boşaltılır
+    def save(self, name: str, books: list, ledger: dict = None):
+        if self.journal:
+            self._journal_records = 0
+        ledger = ledger or empty_ledger()
+        return self._submit(self._write_snapshot, {"name": name, "books": books, **ledger})
+
+    # Anlık görüntüyü diske yazar, günlük modunda günlüğü boşaltır
+    def _write_snapshot(self, library_data: dict):
+        try:
+            if self.binary_snapshot:
+                write_snapshot(self.snapshot_file, library_data["name"], library_data["books"])
+                temp_file = f"{self.ledger_file}.tmp"
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump({key: library_data[key] for key in LEDGER_KEYS}, f, ensure_ascii=False)
+                os.replace(temp_file, self.ledger_file)
+                target = self.snapshot_file
+            else:
+                # Yarım kalan yazma eski dosyayı bozmasın diye geçici dosya üzerinden değiştirilir
+                temp_file = f"{self.json_file}.tmp"
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(library_data, f, indent=2, ensure_ascii=False)
+                os.replace(temp_file, self.json_file)
+                target = self.json_file
+
+            if self.journal:
+                open(self.journal_file, 'w', encoding='utf-8').close()
+            self._journal_offset = 0
+            self._seen_snapshot = self._snapshot_identity()
+
+            self.display.success(f"Kütüphane verileri {target} dosyasına kaydedildi.")
+            return True
+        except Exception as e:
+            self.display.error(f"JSON dosyasına kaydederken hata oluştu: {e}")
+            return False
+
+
+# Sık kullanılan SQL ifadeleri; sabit metinler sqlite3'ün hazır ifade önbelleğinden yararlanır
+# title_key/author_key sütunları casefold_tr ile normalize edilmiş başlık ve yazarı tutar (Türkçe İ/ı dahil);
+# COLLATE NOCASE yalnızca ASCII harfleri katladığı için aramalar bu indeksli sütunlar üzerinden yapılır
+CREATE_BOOKS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS books (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT NOT NULL,
+        author TEXT NOT NULL,
+        isbn TEXT UNIQUE NOT NULL,
+        is_borrowed INTEGER DEFAULT 0,
+        book_type TEXT DEFAULT 'Book',
+        file_format TEXT,
+        file_size REAL,
+        duration_minutes INTEGER,
+        title_key TEXT,
+        author_key TEXT
+    )
+'''
+CREATE_LIBRARY_INFO_TABLE = '''
+    CREATE TABLE IF NOT EXISTS library_info (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL
+    )
+'''
+CREATE_MEMBERS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS members (
+        member_id TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        email TEXT NOT NULL
+    )
+'''
+# Aktif ödünçler; bir nüshanın aynı anda tek ödüncü olabilir (barkod tekildir). id (AUTOINCREMENT) ödünçlerin
+# eklenme sırasıdır ve yeniden kullanılmaz; gecikme kontrolü son kontrolden sonra eklenen ödünçleri onunla bulur
+CREATE_LOANS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS loans (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        barcode TEXT NOT NULL UNIQUE,
+        isbn TEXT NOT NULL,
+        member_id TEXT NOT NULL,
+        borrowed_at REAL NOT NULL,
+        due_at REAL NOT NULL
+    )
+'''
+# Kitapların fiziksel nüshaları; nüshası kaydedilmemiş kitap tek nüshadır
+CREATE_COPIES_TABLE = '''
+    CREATE TABLE IF NOT EXISTS copies (
+        barcode TEXT PRIMARY KEY,
+        isbn TEXT NOT NULL,
+        on_loan INTEGER NOT NULL DEFAULT 0
+    )
+'''
+# Ayırtma sıraları; id (AUTOINCREMENT) her kitabın sırasını verir, üye bir kitabı bir kez ayırtabilir
+CREATE_HOLDS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS holds (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        isbn TEXT NOT NULL,
+        member_id TEXT NOT NULL,
+        placed_at REAL NOT NULL,
+        UNIQUE (isbn, member_id)
+    )
+'''
+CREATE_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_books_title_key ON books (title_key)',
+    'CREATE INDEX IF NOT EXISTS idx_books_author_key ON books (author_key)',
+    'CREATE INDEX IF NOT EXISTS idx_books_author ON books (author)',
+    'CREATE INDEX IF NOT EXISTS idx_books_type ON books (book_type, isbn)',
+    # Kısmi indeks: yalnızca ödünç verilmiş kitaplar, ISBN sırasıyla (ödünç sayısı ve ödünç listesi için)
+    'CREATE INDEX IF NOT EXISTS idx_books_borrowed ON books (isbn) WHERE is_borrowed = 1',
+    # Üyenin ödünçleri ve iade tarihine göre sıralı ödünçler
+    'CREATE INDEX IF NOT EXISTS idx_loans_member ON loans (member_id, due_at)',
+    'CREATE INDEX IF NOT EXISTS idx_loans_due ON loans (due_at)',
+    'CREATE INDEX IF NOT EXISTS idx_loans_isbn ON loans (isbn)',
+    # Kitabın ayırtma sırası (sıradaki üye tek bir indeks aramasıdır) ve üyenin ayırtmaları
+    'CREATE INDEX IF NOT EXISTS idx_holds_queue ON holds (isbn, id)',
+    'CREATE INDEX IF NOT EXISTS idx_holds_member ON holds (member_id)',
+    # Kitabın nüshaları ve kısmi indeksle boştaki nüshalar (serbest liste): boştaki bir nüsha tek indeks aramasıdır
+    'CREATE INDEX IF NOT EXISTS idx_copies_isbn ON copies (isbn)',
+    'CREATE INDEX IF NOT EXISTS idx_copies_free ON copies (isbn) WHERE on_loan = 0',
+)
+# Başlık ve yazar için FTS5 tam metin indeksi; içerik books tablosundan okunur (external content)
+# Normalize edilmiş anahtar sütunları indekslenir, remove_diacritics ile ç/ş/ğ/ö/ü de katlanır;
+# böylece "ışık", "IŞIK" ve "isik" aynı kelimeye karşılık gelir
+CREATE_BOOKS_FTS = '''
+    CREATE VIRTUAL TABLE books_fts USING fts5(
+        title_key, author_key,
+        content='books', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+'''
+# books tablosundaki her değişiklik tetikleyicilerle FTS indeksine yansıtılır
+CREATE_FTS_TRIGGERS = (
+    '''CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts (rowid, title_key, author_key) VALUES (new.id, new.title_key, new.author_key);
+    END''',
+    '''CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts (books_fts, rowid, title_key, author_key)
+        VALUES ('delete', old.id, old.title_key, old.author_key);
+    END''',
+    # Ödünç durumu değişiklikleri indeksi etkilemez, yalnızca başlık/yazar güncellemeleri yansıtılır
+    '''CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF title_key, author_key ON books BEGIN
+        INSERT INTO books_fts (books_fts, rowid, title_key, author_key)
+        VALUES ('delete', old.id, old.title_key, old.author_key);
+        INSERT INTO books_fts (rowid, title_key, author_key) VALUES (new.id, new.title_key, new.author_key);
+    END''',
+)
+# /stats sayaçları; tetikleyicilerle books ve copies tablolarıyla aynı işlemde güncellenir, böylece
+# sayım her çağrıda tabloları taramaz ve başka süreçlerin yazmaları da sayaçlara yansır
+# library_stats tek satırlıktır; kitap türü, yazar ve ISBN başına sayımlar ayrı küçük tablolarda tutulur
+CREATE_STATS_TABLES = (
+    '''CREATE TABLE IF NOT EXISTS library_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total INTEGER NOT NULL,
+        borrowed INTEGER NOT NULL,
+        authors INTEGER NOT NULL,
+        copy_titles INTEGER NOT NULL,
+        copies INTEGER NOT NULL,
+        free_copies INTEGER NOT NULL,
+        titles_with_free INTEGER NOT NULL
+    )''',
+    'CREATE TABLE IF NOT EXISTS type_counts (book_type TEXT PRIMARY KEY, count INTEGER NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS author_counts (author TEXT PRIMARY KEY, count INTEGER NOT NULL)',
+    # Kitabı kalmayan yazarın satırı silinir; en çok kitabı olan yazarlar indeksten okunur
+    'CREATE INDEX IF NOT EXISTS idx_author_counts_top ON author_counts (count DESC, author)',
+    # Nüshası kaydedilmiş kitaplar için nüsha ve boştaki nüsha sayısı
+    '''CREATE TABLE IF NOT EXISTS title_copies (
+        isbn TEXT PRIMARY KEY,
+        total INTEGER NOT NULL,
+        free INTEGER NOT NULL
+    )''',
+)
+# Sayaçlar ilk kez oluşturulurken mevcut tablolardan bir kez hesaplanır
+FILL_STATS = (
+    "INSERT INTO type_counts SELECT COALESCE(book_type, 'Book'), COUNT(*) FROM books GROUP BY 1",
+    'INSERT INTO author_counts SELECT author, COUNT(*) FROM books GROUP BY author',
+    'INSERT INTO title_copies SELECT isbn, COUNT(*), COUNT(*) FILTER (WHERE on_loan = 0) FROM copies GROUP BY isbn',
+    '''INSERT INTO library_stats SELECT 1,
+        (SELECT COUNT(*) FROM books), (SELECT COUNT(*) FROM books WHERE is_borrowed = 1),
+        (SELECT COUNT(*) FROM author_counts), (SELECT COUNT(*) FROM title_copies),
+        (SELECT COALESCE(SUM(total), 0) FROM title_copies), (SELECT COALESCE(SUM(free), 0) FROM title_copies),
+        (SELECT COUNT(*) FROM title_copies WHERE free > 0)''',
+)
+# Kitabı sayaçlara ekleyen ve çıkaran tetikleyici gövdeleri; yazar sayısı yalnızca yazarın ilk kitabı
+# eklendiğinde ya da son kitabı silindiğinde değişir
+_COUNT_BOOK = '''
+    INSERT INTO type_counts (book_type, count) VALUES (COALESCE(new.book_type, 'Book'), 1)
+        ON CONFLICT(book_type) DO UPDATE SET count = count + 1;
+    INSERT INTO author_counts (author, count) VALUES (new.author, 1)
+        ON CONFLICT(author) DO UPDATE SET count = count + 1;
+    UPDATE library_stats SET authors = authors + (SELECT count = 1 FROM author_counts WHERE author = new.author);
+'''
+_UNCOUNT_BOOK = '''
+    UPDATE type_counts SET count = count - 1 WHERE book_type = COALESCE(old.book_type, 'Book');
+    UPDATE author_counts SET count = count - 1 WHERE author = old.author;
+    UPDATE library_stats SET authors = authors - (SELECT count = 0 FROM author_counts WHERE author = old.author);
+    DELETE FROM type_counts WHERE book_type = COALESCE(old.book_type, 'Book') AND count = 0;
+    DELETE FROM author_counts WHERE author = old.author AND count = 0;
+'''
+# Nüsha için aynısı; kitap sayısı ve boştaki nüshası olan kitap sayısı yalnızca ISBN'in sayımı 0 ile 1 arasında
+# geçtiğinde değişir
+_COUNT_COPY = '''
+    INSERT INTO title_copies (isbn, total, free) VALUES (new.isbn, 1, new.on_loan = 0)
+        ON CONFLICT(isbn) DO UPDATE SET total = total + 1, free = free + (new.on_loan = 0);
+    UPDATE library_stats SET copies = copies + 1, free_copies = free_copies + (new.on_loan = 0),
+        copy_titles = copy_titles + (SELECT total = 1 FROM title_copies WHERE isbn = new.isbn),
+        titles_with_free = titles_with_free
+            + (new.on_loan = 0 AND (SELECT free = 1 FROM title_copies WHERE isbn = new.isbn));
+'''
+_UNCOUNT_COPY = '''
+    UPDATE title_copies SET total = total - 1, free = free - (old.on_loan = 0) WHERE isbn = old.isbn;
+    UPDATE library_stats SET copies = copies - 1, free_copies = free_copies - (old.on_loan = 0),
+        copy_titles = copy_titles - (SELECT total = 0 FROM title_copies WHERE isbn = old.isbn),
+        titles_with_free = titles_with_free
+            - (old.on_loan = 0 AND (SELECT free = 0 FROM title_copies WHERE isbn = old.isbn));
+    DELETE FROM title_copies WHERE isbn = old.isbn AND total = 0;
+'''
+# INSERT OR REPLACE'ın sildiği satırlar için DELETE tetikleyicisi çalışmaz; nüshalar bu yüzden UPSERT ile yazılır
+CREATE_STATS_TRIGGERS = (
+    f'CREATE TRIGGER IF NOT EXISTS books_stats_insert AFTER INSERT ON books BEGIN {_COUNT_BOOK}'
+    f'    UPDATE library_stats SET total = total + 1, borrowed = borrowed + (new.is_borrowed = 1);\nEND',
+    f'CREATE TRIGGER IF NOT EXISTS books_stats_delete AFTER DELETE ON books BEGIN {_UNCOUNT_BOOK}'
+    f'    UPDATE library_stats SET total = total - 1, borrowed = borrowed - (old.is_borrowed = 1);\nEND',
+    '''CREATE TRIGGER IF NOT EXISTS books_stats_borrowed AFTER UPDATE OF is_borrowed ON books
+    WHEN old.is_borrowed IS NOT new.is_borrowed BEGIN
+        UPDATE library_stats SET borrowed = borrowed + (new.is_borrowed = 1) - (old.is_borrowed = 1);
+    END''',
+    f'''CREATE TRIGGER IF NOT EXISTS books_stats_update AFTER UPDATE OF author, book_type ON books
+    WHEN old.author IS NOT new.author OR old.book_type IS NOT new.book_type BEGIN {_UNCOUNT_BOOK} {_COUNT_BOOK}END''',
+    f'CREATE TRIGGER IF NOT EXISTS copies_stats_insert AFTER INSERT ON copies BEGIN {_COUNT_COPY}END',
+    f'CREATE TRIGGER IF NOT EXISTS copies_stats_delete AFTER DELETE ON copies BEGIN {_UNCOUNT_COPY}END',
+    f'''CREATE TRIGGER IF NOT EXISTS copies_stats_update AFTER UPDATE OF isbn, on_loan ON copies
+    WHEN old.isbn IS NOT new.isbn OR old.on_loan IS NOT new.on_loan BEGIN {_UNCOUNT_COPY} {_COUNT_COPY}END''',
+)
+SELECT_STATS = '''
+    SELECT total, borrowed, authors, copy_titles, copies, free_copies, titles_with_free,
+           (SELECT json_group_object(book_type, count) FROM type_counts)
+    FROM library_stats
+'''
+BOOK_COLUMNS = 'title, author, isbn, is_borrowed, book_type, file_format, file_size, duration_minutes'
+SELECT_BOOKS = f'SELECT {BOOK_COLUMNS} FROM books ORDER BY id'
+SELECT_BOOK = f'SELECT {BOOK_COLUMNS} FROM books WHERE isbn = ?'
+INSERT_BOOK = f'''
+    INSERT INTO books ({BOOK_COLUMNS}, title_key, author_key)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+UPSERT_BOOK = INSERT_BOOK + '''
+    ON CONFLICT(isbn) DO UPDATE SET
+        title = excluded.title, author = excluded.author, is_borrowed = excluded.is_borrowed,
+        book_type = excluded.book_type, file_format = excluded.file_format,
+        file_size = excluded.file_size, duration_minutes = excluded.duration_minutes,
+        title_key = excluded.title_key, author_key = excluded.author_key
+'''
+UPDATE_BOOK_STATUS = 'UPDATE books SET is_borrowed = ? WHERE isbn = ?'
+# Yalnızca kitap beklenen durumdaysa değiştirir; başka bir süreç araya girdiyse hiçbir satır değişmez
+UPDATE_BOOK_STATUS_IF = 'UPDATE books SET is_borrowed = ? WHERE isbn = ? AND is_borrowed = ?'
+DELETE_BOOK = 'DELETE FROM books WHERE isbn = ?'
+MEMBER_COLUMNS = 'member_id, name, email'
+LOAN_COLUMNS = 'isbn, member_id, borrowed_at, due_at, barcode'
+UPSERT_MEMBER = f'''
+    INSERT INTO members ({MEMBER_COLUMNS}) VALUES (?, ?, ?)
+    ON CONFLICT(member_id) DO UPDATE SET name = excluded.name, email = excluded.email
+'''
+DELETE_MEMBER = 'DELETE FROM members WHERE member_id = ?'
+# pushdown modunda ödünç yalnızca nüshanın aktif ödüncü yoksa eklenir (barkod birincil anahtarı)
+INSERT_LOAN = f'INSERT INTO loans ({LOAN_COLUMNS}) VALUES (?, ?, ?, ?, ?)'
+REPLACE_LOAN = f'INSERT OR REPLACE INTO loans ({LOAN_COLUMNS}) VALUES (?, ?, ?, ?, ?)'
+DELETE_LOAN = 'DELETE FROM loans WHERE barcode = ?'
+HOLD_COLUMNS = 'isbn, member_id, placed_at'
+# Aynı üyenin ikinci ayırtması UNIQUE kısıtına takılır ve commit geri alınır
+INSERT_HOLD = f'INSERT INTO holds ({HOLD_COLUMNS}) VALUES (?, ?, ?)'
+DELETE_HOLD = 'DELETE FROM holds WHERE isbn = ? AND member_id = ?'
+COPY_COLUMNS = 'barcode, isbn, on_loan'
+INSERT_COPY = f'INSERT INTO copies ({COPY_COLUMNS}) VALUES (?, ?, ?)'
+# Barkod zaten varsa satır güncellenir (REPLACE'ın aksine sayaç tetikleyicileri çalışır)
+UPSERT_COPY = INSERT_COPY + ' ON CONFLICT(barcode) DO UPDATE SET isbn = excluded.isbn, on_loan = excluded.on_loan'
+DELETE_COPY = 'DELETE FROM copies WHERE barcode = ?'
+UPDATE_COPY_STATUS = 'UPDATE copies SET on_loan = ? WHERE barcode = ?'
+UPDATE_COPY_STATUS_IF = 'UPDATE copies SET on_loan = ? WHERE barcode = ? AND on_loan = ?'
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    SQLite arka ucu. Tüm işlemler tek bir uzun ömürlü bağlantıyı paylaşır; bir commit() çağrısındaki
+    kayıtlar tek bir işlem (transaction) içinde executemany ile yazılır.
+
+    pushdown açıksa kitaplar belleğe yüklenmez: Library aramaları, listelemeleri ve sayımları indeksli
+    SQL sorgularıyla doğrudan veritabanından yapar. Bu modda
+    - bellek kullanımı katalog boyutuyla büyümez
+    - birden fazla süreç aynı veritabanını paylaşabilir; ekleme, silme ve durum değişiklikleri yalnızca
+      veritabanındaki satır beklenen durumdaysa uygulanır, aksi halde tüm commit geri alınır; başka bir
+      bağlantının yazdığı PRAGMA data_version ile fark edilir ve Library kitap önbelleğini temizler
+    - yazmalar okumalardan önce veritabanına ulaşmalıdır, arka plan yazıcısı kullanılamaz
+    """
+
+    def __init__(self, db_file: str = "library.db", background_writer: bool = False, pushdown: bool = False):
+        if pushdown and background_writer:
+            raise ValueError("pushdown modunda arka plan yazıcısı kullanılamaz")
+        super().__init__(background_writer)
+        self.db_file = db_file           # verileri kaydetmek için SQLite dosyası
+        self.path = db_file
+        self.serves_queries = pushdown   # sorgular veritabanında çalışır, kitaplar belleğe yüklenmez
+        self.shared = pushdown           # diğer süreçlerin yazmaları data_version ile izlenir
+        self._data_version = None
+        self._conn = None                # tüm işlemlerde paylaşılan bağlantı
+        self._db_lock = threading.RLock()  # bağlantıyı thread'ler arasında sıralar
+
+    # Uzun ömürlü veritabanı bağlantısını döndürür, ilk çağrıda açar
+    # WAL modu okuyucuların yazıcıyı beklemesini önler; synchronous=NORMAL WAL ile güvenlidir
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_file, check_same_thread=False, cached_statements=128)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.create_function("casefold_tr", 1, casefold_tr, deterministic=True)
+            self._conn = conn
+        return self._conn
+
+    # Tabloları ve indeksleri oluşturur; pushdown kapalıysa kitapları yükler
+    def load(self, name: str):
+        try:
+            with self._db_lock:
+                conn = self._connection()
+                with conn:
+                    for sql in (CREATE_BOOKS_TABLE, CREATE_LIBRARY_INFO_TABLE, CREATE_MEMBERS_TABLE,
+                                CREATE_LOANS_TABLE, CREATE_HOLDS_TABLE, CREATE_COPIES_TABLE):
+                        conn.execute(sql)
+                    self._migrate(conn)
+                    for sql in CREATE_INDEXES + CREATE_FTS_TRIGGERS + CREATE_STATS_TRIGGERS:
+                        conn.execute(sql)
+                    # Kütüphane adını kontrol et ve ekle
+                    if conn.execute('SELECT COUNT(*) FROM library_info').fetchone()[0] == 0:
+                        conn.execute('INSERT INTO library_info (name) VALUES (?)', (name,))
+                self.display.success(f"SQLite veritabanı başarıyla başlatıldı: {self.db_file}")
+
+                name = conn.execute('SELECT name FROM library_info LIMIT 1').fetchone()[0]
+                self._data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+                if self.serves_queries:
+                    return name, []
+                books = [self._row_to_dict(row) for row in conn.execute(SELECT_BOOKS)]
+            self.display.success(f"{len(books)} kitap veritabanından yüklendi.")
+            return name, books
+        except Exception as e:
+            self.display.error(f"Veritabanından yüklerken hata oluştu: {e}")
+            return name, []
+
+    # Eski veritabanlarına normalize edilmiş anahtar sütunlarını ekler ve doldurur
+    def _migrate(self, conn):
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(books)')}
+        for column in ("title_key", "author_key"):
+            if column not in columns:
+                conn.execute(f'ALTER TABLE books ADD COLUMN {column} TEXT')
+        conn.execute('UPDATE books SET title_key = casefold_tr(title), author_key = casefold_tr(author) '
+                     'WHERE title_key IS NULL OR author_key IS NULL')
+        # Nüshalardan önceki veritabanlarında ödünçler ISBN ile, sonrakilerde id'siz tutulur; tablo barkod anahtarı
+        # ve eklenme sırası (id) ile yeniden kurulur
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(loans)')}
+        if 'id' not in columns:
+            conn.execute('ALTER TABLE loans RENAME TO loans_old')
+            conn.execute(CREATE_LOANS_TABLE)
+            barcode = 'barcode' if 'barcode' in columns else 'isbn'
+            conn.execute(f'INSERT INTO loans ({LOAN_COLUMNS}) '
+                         f'SELECT isbn, member_id, borrowed_at, due_at, {barcode} FROM loans_old')
+            conn.execute('DROP TABLE loans_old')
+        # FTS indeksi ilk kez oluşturuluyorsa mevcut kitaplar indekslenir
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'books_fts'").fetchone():
+            conn.execute(CREATE_BOOKS_FTS)
+            conn.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+        # Sayaç tabloları ilk kez oluşturuluyorsa mevcut kitaplardan ve nüshalardan doldurulur
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'library_stats'").fetchone():
+            for sql in CREATE_STATS_TABLES + FILL_STATS:
+                conn.execute(sql)
+
+    # Veritabanı satırını kitap sözlüğüne dönüştürür
+    def _row_to_dict(self, row):
+        title, author, isbn, is_borrowed, book_type, file_format, file_size, duration_minutes = row
+        book = {"title": title, "author": author, "isbn": isbn, "is_borrowed": bool(is_borrowed),
+                "type": book_type or "Book"}
+        if book["type"] == "EBook":
+            book["file_format"] = file_format or ""
+            book["file_size"] = file_size or 0.0
+        elif book["type"] == "AudioBook":
+            book["duration_minutes"] = duration_minutes or 0
+        return book
+
+    # Kitap sözlüğünü INSERT_BOOK/UPSERT_BOOK parametrelerine dönüştürür
+    def _dict_to_row(self, book: dict):
+        return (book["title"], book["author"], book["isbn"], int(book.get("is_borrowed", False)),
+                book.get("type", "Book"), book.get("file_format"), book.get("file_size"),
+                book.get("duration_minutes"), casefold_tr(book["title"]), casefold_tr(book["author"]))
+
+    # Üyeleri, ödünçleri, ayırtmaları ve nüshaları okur; pushdown modunda defter de veritabanından sorgulanır,
+    # belleğe yüklenmez
+    def load_ledger(self):
+        if self.serves_queries:
+            return empty_ledger()
+        return {"members": [self._member_dict(row) for row in self._query(f'SELECT {MEMBER_COLUMNS} FROM members')],
+                "loans": [self._loan_dict(row) for row in self._query(f'SELECT {LOAN_COLUMNS} FROM loans')],
+                "holds": [self._hold_dict(row)
+                          for row in self._query(f'SELECT {HOLD_COLUMNS} FROM holds ORDER BY id')],
+                "copies": [self._copy_dict(row) for row in self._query(f'SELECT {COPY_COLUMNS} FROM copies')]}
+
+    def _member_dict(self, row):
+        return dict(zip(("member_id", "name", "email"), row))
+
+    def _loan_dict(self, row):
+        return dict(zip(("isbn", "member_id", "borrowed_at", "due_at", "barcode"), row))
+
+    def _loan_row(self, loan: dict):
+        return loan["isbn"], loan["member_id"], loan["borrowed_at"], loan["due_at"], loan_barcode(loan)
+
+    def _copy_dict(self, row):
+        barcode, isbn, on_loan = row
+        return {"barcode": barcode, "isbn": isbn, "on_loan": bool(on_loan)}
+
+    def _copy_row(self, copy: dict):
+        return copy["barcode"], copy["isbn"], int(copy["on_loan"])
+
+    def _hold_dict(self, row):
+        return dict(zip(("isbn", "member_id", "placed_at"), row))
+
+    def _hold_row(self, hold: dict):
+        return hold["isbn"], hold["member_id"], hold["placed_at"]
+
+    # Kaydı SQL ifadesine ve parametrelerine dönüştürür
+    # pushdown modunda veritabanı tek doğru kaynaktır: ekleme var olan kitabın üzerine yazmaz,
+    # silme ve durum değişikliği satır beklenen durumda değilse başarısız olur
+    def _statement(self, record: dict):
+        op = record["op"]
+        if op == "member":
+            member = record["member"]
+            return UPSERT_MEMBER, (member["member_id"], member["name"], member["email"])
+        if op == "member_remove":
+            return DELETE_MEMBER, (record["member_id"],)
+        if op == "loan":
+            return (INSERT_LOAN if self.serves_queries else REPLACE_LOAN), self._loan_row(record["loan"])
+        if op == "loan_end":
+            return DELETE_LOAN, (loan_barcode(record),)
+        if op == "hold":
+            return INSERT_HOLD, self._hold_row(record["hold"])
+        if op == "hold_remove":
+            return DELETE_HOLD, (record["isbn"], record["member_id"])
+        if op == "copy":
+            return (INSERT_COPY if self.serves_queries else UPSERT_COPY), self._copy_row(record["copy"])
+        if op == "copy_remove":
+            return DELETE_COPY, (record["barcode"],)
+        if op == "copy_status":
+            on_loan = int(record["on_loan"])
+            if self.serves_queries:
+                return UPDATE_COPY_STATUS_IF, (on_loan, record["barcode"], 1 - on_loan)
+            return UPDATE_COPY_STATUS, (on_loan, record["barcode"])
+        if op == "add":
+            return (INSERT_BOOK if self.serves_queries else UPSERT_BOOK), self._dict_to_row(record["book"])
+        if op == "upsert":
+            return UPSERT_BOOK, self._dict_to_row(record["book"])
+        if op == "remove":
+            return DELETE_BOOK, (record["isbn"],)
+        if self.serves_queries:
+            borrowed = int(record["is_borrowed"])
+            return UPDATE_BOOK_STATUS_IF, (borrowed, record["isbn"], 1 - borrowed)
+        return UPDATE_BOOK_STATUS, (int(record["is_borrowed"]), record["isbn"])
+
+    # Ardışık aynı türdeki kayıtlar tek bir executemany çağrısında birleştirilir
+    def commit(self, records: list):
+        statements = [(sql, [params for _, params in group], True)
+                      for sql, group in groupby(map(self._statement, records), key=lambda item: item[0])]
+        return self._submit(self._execute, statements)
+
+    # Kütüphanenin tamamını tek bir işlemde yeniden yazar
+    def save(self, name: str, books: list, ledger: dict = None):
+        ledger = ledger or empty_ledger()
+        statements = [('DELETE FROM books', [()], False),
+                      (UPSERT_BOOK, [self._dict_to_row(book) for book in books], False),
+                      ('UPDATE library_info SET name = ?', [(name,)], False),
+                      ('DELETE FROM members', [()], False),
+                      (UPSERT_MEMBER, [(m["member_id"], m["name"], m["email"]) for m in ledger["members"]], False),
+                      ('DELETE FROM loans', [()], False),
+                      (REPLACE_LOAN, [self._loan_row(loan) for loan in ledger["loans"]], False),
+                      ('DELETE FROM holds', [()], False),
+                      (INSERT_HOLD, [self._hold_row(hold) for hold in ledger["holds"]], False),
+                      ('DELETE FROM copies', [()], False),
+                      (UPSERT_COPY, [self._copy_row(copy) for copy in ledger["copies"]], False)]
+        return self._submit(self._execute, statements)
+
+    # İfadeleri tek bir işlem içinde çalıştırır
+    # Kontrol edilen ifadelerde her parametre satırı tam bir satırı değiştirmelidir, aksi halde işlem geri alınır
+    def _execute(self, statements: list):
+        try:
+            with self._db_lock:
+                conn = self._connection()
+                with conn:
+                    for sql, rows, checked in statements:
+                        cursor = conn.executemany(sql, rows)
+                        if checked and cursor.rowcount != len(rows):
+                            raise sqlite3.IntegrityError("kayıt başka bir işlem tarafından değiştirilmiş")
+            return True
+        except Exception as e:
+            self.display.error(f"Veritabanına yazarken hata oluştu: {e}")
+            return False
+
+    def _query(self, sql: str, params=()):
+        with self._db_lock:
+            return self._connection().execute(sql, params).fetchall()
+
+    # ISBN ile kitabı bulur, yoksa None döndürür
+    def find(self, isbn: str):
+        rows = self._query(SELECT_BOOK, (isbn,))
+        return self._row_to_dict(rows[0]) if rows else None
+
+    # Başlığı (büyük/küçük harf duyarsız) eşleşen kitapları ekleme sırasıyla döndürür; limit -1 ise sınırsız
+    def find_by_title(self, title: str, limit: int = -1):
+        rows = self._query(f'SELECT {BOOK_COLUMNS} FROM books WHERE title_key = ? ORDER BY id LIMIT ?',
+                           (casefold_tr(title), limit))
+        return [self._row_to_dict(row) for row in rows]
+
+    # Yazarı (büyük/küçük harf duyarsız) eşleşen kitapları ekleme sırasıyla döndürür; limit -1 ise sınırsız
+    def find_by_author(self, author: str, limit: int = -1):
+        rows = self._query(f'SELECT {BOOK_COLUMNS} FROM books WHERE author_key = ? ORDER BY id LIMIT ?',
+                           (casefold_tr(author), limit))
+        return [self._row_to_dict(row) for row in rows]
+
+    # ISBN sırasıyla, verilen ISBN'den sonraki en fazla limit kitabı döndürür; filtreler sorguda uygulanır
+    def page(self, after: str = "", limit: int = 500, borrowed: bool = None, book_type: str = None):
+        conditions, params = ["isbn > ?"], [after]
+        if borrowed is not None:
+            # Sabit değer yazılır, böylece ödünç kitaplarda kısmi indeks kullanılabilir
+            conditions.append(f"is_borrowed = {int(borrowed)}")
+        if book_type:
+            conditions.append("book_type = ?")
+            params.append(book_type)
+        rows = self._query(f'SELECT {BOOK_COLUMNS} FROM books WHERE {" AND ".join(conditions)} '
+                           f'ORDER BY isbn LIMIT ?', (*params, limit))
+        return [self._row_to_dict(row) for row in rows]
+
+    # FTS5 ile tam metin araması: tüm kelimeler başlıkta ya da yazarda (önek olarak) geçmelidir
+    # Sonuçlar bm25 ile sıralanır, başlık eşleşmeleri yazar eşleşmelerinden daha ağırdır
+    def search(self, query: str, limit: int = 10, offset: int = 0):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        match = " ".join(f'"{term}"*' for term in terms)
+        rows = self._query(f'SELECT {BOOK_COLUMNS} FROM books_fts JOIN books ON books.id = books_fts.rowid '
+                           f'WHERE books_fts MATCH ? ORDER BY bm25(books_fts, 2.0, 1.0), books.id LIMIT ? OFFSET ?',
+                           (match, limit, offset))
+        return [self._row_to_dict(row) for row in rows]
+
+    # Kitap sayısı (sayaç satırından)
+    def count(self):
+        return self._query('SELECT total FROM library_stats')[0][0]
+
+    # İstatistik sayaçları; tetikleyicilerin güncel tuttuğu tek satırlık library_stats tablosundan okunur
+    def counts(self):
+        total, borrowed, authors, *copies, types = self._query(SELECT_STATS)[0]
+        return {"total": total, "borrowed": borrowed, "authors": authors, "types": json.loads(types),
+                "copies": dict(zip(("titles", "total", "free", "titles_with_free"), copies))}
+
+    # data_version yalnızca başka bir bağlantı işlem tamamladığında artar; sorgu diske gitmez
+    # Kitaplar zaten veritabanından okunduğu için değişiklik olduğunda yalnızca önbellek temizlenir (RELOAD)
+    def poll(self):
+        if not self.shared:
+            return None
+        version = self._query('PRAGMA data_version')[0][0]
+        if version == self._data_version:
+            return None
+        self._data_version = version
+        return RELOAD
+
+    # Üyeyi bulur, yoksa None döndürür
+    def find_member(self, member_id: str):
+        rows = self._query(f'SELECT {MEMBER_COLUMNS} FROM members WHERE member_id = ?', (member_id,))
+        return self._member_dict(rows[0]) if rows else None
+
+    # Nüshanın aktif ödüncü (birincil anahtar ile)
+    def find_loan(self, barcode: str):
+        rows = self._query(f'SELECT {LOAN_COLUMNS} FROM loans WHERE barcode = ?', (barcode,))
+        return self._loan_dict(rows[0]) if rows else None
+
+    # Kitabın tüm nüshalarının ödünçleri, iade tarihi sırasıyla (idx_loans_isbn)
+    def title_loans(self, isbn: str):
+        return [self._loan_dict(row) for row in self._query(
+            f'SELECT {LOAN_COLUMNS} FROM loans WHERE isbn = ? ORDER BY due_at, barcode', (isbn,))]
+
+    # Kitabın nüshaları, barkod sırasıyla
+    def copies(self, isbn: str):
+        return [self._copy_dict(row) for row in self._query(
+            f'SELECT {COPY_COLUMNS} FROM copies WHERE isbn = ? ORDER BY barcode', (isbn,))]
+
+    def find_copy(self, barcode: str):
+        rows = self._query(f'SELECT {COPY_COLUMNS} FROM copies WHERE barcode = ?', (barcode,))
+        return self._copy_dict(rows[0]) if rows else None
+
+    # Kitabın ödünçte olan ya da boştaki (idx_copies_free) herhangi bir nüshası, yoksa None
+    def pick_copy(self, isbn: str, on_loan: bool):
+        rows = self._query(f'SELECT {COPY_COLUMNS} FROM copies WHERE isbn = ? AND on_loan = {int(on_loan)} LIMIT 1',
+                           (isbn,))
+        return self._copy_dict(rows[0]) if rows else None
+
+    # Nüshası kaydedilmiş kitaplar için ISBN -> (nüsha sayısı, boştaki nüsha sayısı); nüshalar sayılmaz,
+    # tetikleyicilerin güncel tuttuğu title_copies satırları birincil anahtarla okunur
+    def copy_counts(self, isbns: list):
+        counts = {}
+        for start in range(0, len(isbns), 500):
+            chunk = isbns[start:start + 500]
+            rows = self._query(f'SELECT isbn, total, free FROM title_copies '
+                               f'WHERE isbn IN ({", ".join("?" * len(chunk))})', chunk)
+            counts.update((isbn, (total, free)) for isbn, total, free in rows)
+        return counts
+
+    # Üyenin ödünçleri, iade tarihi sırasıyla (idx_loans_member)
+    def member_loans(self, member_id: str):
+        return [self._loan_dict(row) for row in self._query(
+            f'SELECT {LOAN_COLUMNS} FROM loans WHERE member_id = ? ORDER BY due_at, barcode', (member_id,))]
+
+    # İade tarihi [start, end) aralığındaki ödünçler, iade tarihi sırasıyla (idx_loans_due)
+    def loans_due(self, start: float, end: float, limit: int = -1):
+        return [self._loan_dict(row) for row in self._query(
+            f'SELECT {LOAN_COLUMNS} FROM loans WHERE due_at >= ? AND due_at < ? ORDER BY due_at, barcode LIMIT ?',
+            (start, end, limit))]
+
+    # Son kontrolden bu yana geciken ödünçler ve yeni kontrol noktası (en büyük id), iade tarihi sırasıyla.
+    # İade tarihi [since, now) aralığına girenlerin yanında, id'si seen'den büyük (son kontrolden sonra eklenmiş) ve
+    # iade tarihi since'ten önce olan ödünçler de döner. İki sorgu da kontrol başında okunan id ile sınırlanır;
+    # sonra eklenen ödünçler sonraki kontrolde bulunur, hiçbir ödünç iki kez dönmez
+    def overdue_since(self, since: float, now: float, seen: int):
+        row = self._query("SELECT seq FROM sqlite_sequence WHERE name = 'loans'")
+        last = row[0][0] if row else 0
+        rows = self._query(f'SELECT {LOAN_COLUMNS} FROM loans WHERE due_at >= ? AND due_at < ? AND id <= ? '
+                           f'UNION ALL SELECT {LOAN_COLUMNS} FROM loans WHERE id > ? AND id <= ? AND due_at < ? '
+                           'ORDER BY due_at, barcode', (since, now, last, seen, last, since))
+        return [self._loan_dict(row) for row in rows], last
+
+    # Kitabın ayırtma sırası, sıradaki üye ilk (idx_holds_queue); limit -1 ise sınırsız
+    def holds(self, isbn: str, limit: int = -1):
+        return [self._hold_dict(row) for row in self._query(
+            f'SELECT {HOLD_COLUMNS} FROM holds WHERE isbn = ? ORDER BY id LIMIT ?', (isbn, limit))]
+
+    # Üyenin kitabın sırasındaki yeri (1'den başlar); ayırtması yoksa 0
+    def hold_position(self, isbn: str, member_id: str):
+        return self._query('SELECT COUNT(*) FROM holds WHERE isbn = ? AND id <= '
+                           '(SELECT id FROM holds WHERE isbn = ? AND member_id = ?)',
+                           (isbn, isbn, member_id))[0][0]
+
+    # Üyenin ayırtmaları, ayırtma sırasıyla (idx_holds_member)
+    def member_holds(self, member_id: str):
+        return [self._hold_dict(row) for row in self._query(
+            f'SELECT {HOLD_COLUMNS} FROM holds WHERE member_id = ? ORDER BY id', (member_id,))]
+
+    # En çok kitabı bulunan yazarlar
+    def top_authors(self, limit: int = 10):
+        return [tuple(row) for row in self._query(
+            'SELECT author, count FROM author_counts ORDER BY count DESC, author LIMIT ?',
+            (limit,))]
+
+    # Bekleyen yazmaları tamamlar ve bağlantıyı kapatır
+    def close(self):
+        super().close()
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
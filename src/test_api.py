@@ -1,9 +1,32 @@
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import time
+import httpx
 import pytest
 from fastapi.testclient import TestClient
-from api import app
+
+# API kütüphanesi modül içe aktarılırken oluşturulur; dosyaları ve olay günlüğü çalışma dizini yerine geçici
+# bir dizinde tutulur
+DATA_DIR = tempfile.mkdtemp()
+os.environ["LIBRARY_JSON"] = os.path.join(DATA_DIR, "library.json")
+os.environ["LIBRARY_EVENTS"] = os.path.join(DATA_DIR, "library.events")
+
+from api import app, library
+import message_display
+from metadata_cache import MetadataCache
 
 client = TestClient(app)
 
+
+@pytest.fixture(scope="module", autouse=True)
+def data_dir():
+    yield DATA_DIR
+    library.close()
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
+
 test_book = {
     "title": "Test Kitabı",
     "author": "Test Yazarı", 
@@ -19,6 +42,10 @@ test_book_2 = {
 }
 
 class TestAPI:
+    # Sunucu günlüğü modül içe aktarılırken değil, uygulama başlarken (lifespan) açılır
+    def test_logging_not_configured_on_import(self):
+        assert message_display._sink is None
+
     def test_root_endpoint(self):
         response = client.get("/")
         assert response.status_code == 200
@@ -76,6 +103,39 @@ class TestAPI:
             assert "isbn" in book
             assert "borrowed" in book
 
+    # Sayfalama ve alan seçimi testi
+    def test_get_books_paginated(self):
+        client.post("/books", json=test_book)
+        client.post("/books", json=test_book_2)
+
+        response = client.get("/books", params={"limit": 1, "fields": "isbn,type"})
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["kitaplar"]) == 1
+        assert set(page["kitaplar"][0]) == {"isbn", "type"}
+
+        seen = [book["isbn"] for book in page["kitaplar"]]
+        while page["sonraki_imleç"]:
+            page = client.get("/books", params={"limit": 1, "cursor": page["sonraki_imleç"]}).json()
+            seen.extend(book["isbn"] for book in page["kitaplar"])
+        assert seen == sorted(seen)
+        assert len(seen) == len(client.get("/books").json())
+
+    # NDJSON akış testi
+    def test_get_books_ndjson(self):
+        client.post("/books", json=test_book)
+
+        response = client.get("/books", params={"format": "ndjson", "fields": "isbn"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [line for line in response.text.splitlines() if line]
+        assert {"isbn": test_book["isbn"]} in [json.loads(line) for line in lines]
+
+    # Geçersiz alan seçimi testi
+    def test_get_books_invalid_fields(self):
+        response = client.get("/books", params={"fields": "title,password"})
+        assert response.status_code == 400
+
     # Başlık ile arama testi
     def test_search_books_by_title(self):
         client.post("/books", json=test_book)
@@ -103,6 +163,18 @@ class TestAPI:
         book = response.json()
         assert book["isbn"] == test_book["isbn"]
     
+    # Serbest metin araması testi
+    def test_search_books_query(self):
+        client.post("/books", json=test_book)
+
+        response = client.get("/books/search", params={"q": "test kitab", "limit": 5})
+        assert response.status_code == 200
+        page = response.json()
+        assert page["kitaplar"][0]["isbn"] == test_book["isbn"]
+        offset = page["sonraki_offset"] or len(page["kitaplar"])
+        rest = client.get("/books/search", params={"q": "test kitab", "limit": 5, "offset": offset}).json()
+        assert test_book["isbn"] not in [book["isbn"] for book in rest["kitaplar"]]
+
     # Arama kriteri olmadan arama
     def test_search_books_no_criteria(self):
         response = client.get("/books/search")
@@ -180,6 +252,31 @@ class TestAPI:
         assert response.status_code == 404
         assert "Kitap bulunamadı" in response.json()["detail"]
 
+    # ISBN listesi olmadan toplu ekleme testi
+    def test_add_books_by_isbn_bulk_no_isbns(self):
+        response = client.post("/books/isbn/bulk", json={"isbns": []})
+        assert response.status_code == 400
+        assert "En az bir ISBN gerekli" in response.json()["detail"]
+
+    # Önbellek istatistikleri testi
+    def test_get_cache_stats(self):
+        response = client.get("/cache/stats")
+        assert response.status_code == 200
+        stats = response.json()
+        assert "hits" in stats
+        assert "misses" in stats
+
+    # Ölçümler Prometheus metin biçiminde döner; yollar ISBN yerine rota şablonuyla etiketlenir
+    def test_metrics(self):
+        client.patch("/books/0000000000/borrow")
+        client.get("/books/search", params={"isbn": "0000000000"})
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert 'http_requests_total{method="PATCH",path="/books/{isbn}/borrow",status="404"}' in response.text
+        assert 'library_operation_seconds_count{operation="find_book_by_isbn"}' in response.text
+        assert "# TYPE http_request_seconds histogram" in response.text
+
     # İstatistikleri çekme testi
     def test_get_stats(self):
         response = client.get("/stats")
@@ -197,6 +294,209 @@ class TestAPI:
         assert stats["mevcut_kitap"] >= 0
         assert stats["ödünç_kitap"] >= 0
         assert stats["mevcut_kitap"] + stats["ödünç_kitap"] == stats["toplam_kitap"]
+        assert sum(stats["tür_dağılımı"].values()) == stats["toplam_kitap"]
+
+    # Ödünç alma işleminin istatistiklere yansıması testi
+    def test_stats_follow_borrow(self):
+        client.post("/books", json=test_book)
+        client.patch(f"/books/{test_book['isbn']}/return")
+        before = client.get("/stats").json()["ödünç_kitap"]
+
+        client.patch(f"/books/{test_book['isbn']}/borrow")
+        assert client.get("/stats").json()["ödünç_kitap"] == before + 1
+
+        client.patch(f"/books/{test_book['isbn']}/return")
+        assert client.get("/stats").json()["ödünç_kitap"] == before
+
+    # Yazar istatistikleri testi
+    def test_get_author_stats(self):
+        client.post("/books", json=test_book)
+        response = client.get("/stats/authors", params={"limit": 5})
+        assert response.status_code == 200
+        assert any(row["yazar"] == test_book["author"] for row in response.json())
+
+    # Toplu ekleme ve ödünç verme testi
+    def test_batch_add_and_borrow(self):
+        books = [
+            {"title": "Toplu Kitap 1", "author": "Toplu Yazar", "isbn": "8888888881", "publication_year": 2020},
+            {"title": "Toplu Kitap 2", "author": "Toplu Yazar", "isbn": "8888888882", "publication_year": 2021},
+        ]
+        isbns = [book["isbn"] for book in books]
+        client.delete(f"/books/{isbns[0]}")
+        client.delete(f"/books/{isbns[1]}")
+
+        response = client.post("/books/batch", json={"books": books})
+        assert response.status_code == 200
+        assert [r["success"] for r in response.json()["sonuçlar"]] == [True, True]
+
+        # Tekrar eklemek tüm işlemi geri çevirir
+        response = client.post("/books/batch", json={"books": books})
+        assert response.status_code == 400
+        assert response.json()["detail"]["sonuçlar"][0]["message"] == "Kitap zaten mevcut"
+
+        response = client.patch("/books/batch/borrow", json={"isbns": isbns})
+        assert response.status_code == 200
+        response = client.patch("/books/batch/borrow", json={"isbns": isbns + ["0000000000"]})
+        assert response.status_code == 400
+        assert [r["success"] for r in response.json()["detail"]["sonuçlar"]] == [False, False, False]
+
+        response = client.patch("/books/batch/return", json={"isbns": isbns})
+        assert response.status_code == 200
+        assert client.get("/books/search", params={"isbn": isbns[0]}).json()["borrowed"] is False
+
+        assert client.patch("/books/batch/borrow", json={"isbns": []}).status_code == 400
+        for isbn in isbns:
+            client.delete(f"/books/{isbn}")
+
+    # Üyeye ödünç verme, kitabın ödüncü ve üyenin ödünçleri
+    def test_member_loans(self):
+        client.post("/books", json=test_book)
+        member = {"name": "Ayşe", "member_id": "api-uye", "email": "ayse@example.com"}
+        assert client.post("/members", json=member).status_code == 200
+        assert client.post("/members", json=member).status_code == 400
+        assert client.get("/members/api-uye").json()["name"] == "Ayşe"
+        assert client.patch(f"/books/{test_book['isbn']}/borrow", params={"member_id": "yok"}).status_code == 404
+
+        response = client.patch(f"/books/{test_book['isbn']}/borrow", params={"member_id": "api-uye"})
+        assert response.status_code == 200
+        [loan] = client.get(f"/books/{test_book['isbn']}/loan").json()
+        assert loan["member_id"] == "api-uye" and loan["due_at"] > loan["borrowed_at"]
+        assert [l["isbn"] for l in client.get("/members/api-uye/loans").json()] == [test_book["isbn"]]
+        response = client.delete("/members/api-uye")
+        assert response.status_code == 400 and response.json()["detail"] == "Üyenin iade etmediği kitaplar var"
+        response = client.delete(f"/books/{test_book['isbn']}")
+        assert response.status_code == 400 and response.json()["detail"] == "Kitap bir üyede, silinemez"
+        response = client.patch(f"/books/{test_book['isbn']}/borrow", params={"member_id": "api-uye"})
+        assert response.status_code == 400
+
+        response = client.patch(f"/books/{test_book['isbn']}/return", params={"member_id": "api-uye"})
+        assert response.status_code == 200
+        assert client.get(f"/books/{test_book['isbn']}/loan").status_code == 404
+        assert client.get("/members/api-uye/loans").json() == []
+        assert client.delete("/members/api-uye").status_code == 200
+        assert client.get("/members/api-uye/loans").status_code == 404
+
+    # İade tarihi geçmiş ödünç gecikmiş ödünçler listesinde görünür, iade edilince çıkar
+    def test_overdue_loans(self):
+        client.post("/books", json=test_book_2)
+        client.post("/members", json={"name": "Mehmet", "member_id": "gecikme-uye", "email": "mehmet@example.com"})
+        response = client.patch(f"/books/{test_book_2['isbn']}/borrow",
+                                params={"member_id": "gecikme-uye", "due_at": "2020-01-01T00:00:00Z"})
+        assert response.status_code == 200
+        overdue = [loan for loan in client.get("/loans/overdue").json() if loan["isbn"] == test_book_2["isbn"]]
+        assert overdue[0]["member_id"] == "gecikme-uye" and overdue[0]["days_overdue"] > 365
+
+        client.patch(f"/books/{test_book_2['isbn']}/return")
+        assert all(loan["isbn"] != test_book_2["isbn"] for loan in client.get("/loans/overdue").json())
+        client.delete(f"/books/{test_book_2['isbn']}")
+        client.delete("/members/gecikme-uye")
+
+    # Ayırtma sırası: iade edilen kitap sıradaki üyeye ödünç verilir, sıradakilerin yeri ilerler
+    def test_holds(self):
+        isbn = test_book_2["isbn"]
+        client.post("/books", json=test_book_2)
+        for member_id in ("sira-1", "sira-2", "sira-3"):
+            client.post("/members", json={"name": member_id, "member_id": member_id, "email": f"{member_id}@example.com"})
+        assert client.post(f"/books/{isbn}/holds", params={"member_id": "sira-2"}).status_code == 400
+        client.patch(f"/books/{isbn}/borrow", params={"member_id": "sira-1"})
+        assert client.post(f"/books/{isbn}/holds", params={"member_id": "sira-2"}).json()["position"] == 1
+        assert client.post(f"/books/{isbn}/holds", params={"member_id": "sira-3"}).json()["position"] == 2
+        assert client.post(f"/books/{isbn}/holds", params={"member_id": "sira-3"}).status_code == 400
+        assert [hold["member_id"] for hold in client.get(f"/books/{isbn}/holds").json()] == ["sira-2", "sira-3"]
+        assert client.get("/members/sira-3/holds").json()[0]["position"] == 2
+        assert client.delete("/members/sira-2").status_code == 400
+
+        response = client.patch(f"/books/{isbn}/return", params={"member_id": "sira-1"})
+        assert response.status_code == 200 and response.json()["loan"]["member_id"] == "sira-2"
+        assert client.get(f"/books/{isbn}/loan").json()[0]["member_id"] == "sira-2"
+        assert client.get(f"/books/{isbn}/holds/sira-3").json()["position"] == 1
+        assert client.delete(f"/books/{isbn}/holds/sira-3").status_code == 200
+        assert client.get(f"/books/{isbn}/holds/sira-3").status_code == 404
+
+        assert "loan" not in client.patch(f"/books/{isbn}/return").json()
+        client.delete(f"/books/{isbn}")
+        for member_id in ("sira-1", "sira-2", "sira-3"):
+            client.delete(f"/members/{member_id}")
+
+    # Nüshalar: kitap son boş nüsha verilince ödünçte görünür; listeler ve /stats nüsha sayılarını içerir
+    def test_copies(self):
+        isbn = test_book_2["isbn"]
+        client.post("/books", json=test_book_2)
+        for member_id in ("nusha-1", "nusha-2"):
+            client.post("/members", json={"name": member_id, "member_id": member_id, "email": f"{member_id}@example.com"})
+        response = client.post(f"/books/{isbn}/copies", json={"barcodes": ["NS-1"]})
+        assert response.status_code == 200 and response.json()["barcodes"] == ["NS-1"]
+        assert client.post(f"/books/{isbn}/copies", json={"barcodes": ["NS-1"]}).status_code == 400
+        assert client.post(f"/books/{isbn}/copies", json={}).status_code == 400
+
+        client.patch(f"/books/{isbn}/borrow", params={"member_id": "nusha-1"})
+        book = client.get("/books", params={"fields": "isbn,borrowed,copies,available"}).json()
+        assert {"isbn": isbn, "borrowed": False, "copies": 2, "available": 1} in book
+        client.patch(f"/books/{isbn}/borrow", params={"member_id": "nusha-2"})
+        copies = client.get(f"/books/{isbn}/copies").json()
+        assert (copies["copies"], copies["available"]) == (2, 0)
+        assert sorted(item["loan"]["member_id"] for item in copies["items"]) == ["nusha-1", "nusha-2"]
+        assert sorted(loan["member_id"] for loan in client.get(f"/books/{isbn}/loan").json()) == ["nusha-1", "nusha-2"]
+        assert client.get("/stats").json()["ödünç_nüsha"] >= 2
+        assert client.delete("/copies/NS-1").status_code == 400
+        assert client.delete(f"/books/{isbn}").status_code == 400
+
+        barcode = next(item["barcode"] for item in copies["items"] if item["loan"]["member_id"] == "nusha-2")
+        assert client.patch(f"/books/{isbn}/return", params={"barcode": barcode}).status_code == 200
+        client.patch(f"/books/{isbn}/return", params={"member_id": "nusha-1"})
+        assert client.get(f"/books/{isbn}/copies").json()["available"] == 2
+        assert client.delete("/copies/NS-1").status_code == 200
+        client.delete(f"/books/{isbn}")
+        for member_id in ("nusha-1", "nusha-2"):
+            client.delete(f"/members/{member_id}")
+
+    # Dolaşım geçmişi zaman aralığı ve ISBN ile sorgulanır, ndjson ile dışa aktarılır
+    def test_events(self):
+        start = time.time()
+        client.post("/books", json=test_book_2)
+        client.patch(f"/books/{test_book_2['isbn']}/borrow")
+        client.patch(f"/books/{test_book_2['isbn']}/return")
+        client.delete(f"/books/{test_book_2['isbn']}")
+
+        response = client.get("/events", params={"from": start, "isbn": test_book_2["isbn"]})
+        assert response.status_code == 200
+        assert [e["type"] for e in response.json()] == ["add", "borrow", "return", "remove"]
+        assert client.get("/events", params={"from": start, "isbn": test_book_2["isbn"], "limit": 1}).json()[0]["type"] == "add"
+        borrowed_at = response.json()[1]["time"]
+        assert [e["type"] for e in client.get("/events", params={"from": start, "to": borrowed_at,
+                                                                  "isbn": test_book_2["isbn"]}).json()] == ["add"]
+
+        response = client.get("/events", params={"from": start, "isbn": test_book_2["isbn"], "format": "ndjson"})
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert len(response.text.splitlines()) == 4
+
+    # Yavaş bir OpenLibrary isteği diğer istekleri bekletmemeli
+    @pytest.mark.asyncio
+    async def test_slow_isbn_lookup_does_not_block(self, monkeypatch):
+        async def slow_openlibrary(request):
+            await asyncio.sleep(0.5)
+            if request.url.path.startswith("/isbn/"):
+                return httpx.Response(200, json={"title": "Yavaş Kitap", "authors": [{"key": "/authors/OL1A"}]})
+            return httpx.Response(200, json={"name": "Yavaş Yazar"})
+
+        openlibrary = httpx.AsyncClient(transport=httpx.MockTransport(slow_openlibrary))
+        monkeypatch.setattr(library, "_async_http_client", openlibrary)
+        monkeypatch.setattr(library, "metadata_cache", MetadataCache())
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as api_client:
+            start = time.perf_counter()
+            slow = asyncio.create_task(api_client.post("/books/isbn", json={"isbn": "9781111111111"}))
+            await asyncio.sleep(0.05)
+            response = await api_client.get("/stats")
+            fast_elapsed = time.perf_counter() - start
+
+            slow_response = await slow
+            assert response.status_code == 200
+            assert slow_response.status_code == 200
+            assert fast_elapsed < 0.5 < time.perf_counter() - start
+            await api_client.delete("/books/9781111111111")
+        await openlibrary.aclose()
+        library.flush()
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])
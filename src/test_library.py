@@ -1,8 +1,27 @@
+import asyncio
+import json
+import multiprocessing
 import pytest
+import random
+import sqlite3
+import sys
 import tempfile
+import threading
+import time
 import os
-from library import Book, EBook, AudioBook, Library, PydanticBook
+import httpx
+import io
+import benchmark
+from library import PERSIST_ERROR, Book, EBook, AudioBook, Library, Member, PydanticBook, error_status
+import message_display
 from message_display import UnicodeDisplay
+from metadata_cache import MetadataCache
+from metrics import OPERATION_FAILURES, OPERATION_SECONDS, STORAGE_WRITE_SECONDS, Registry
+from locks import RWLock
+from snapshot import SnapshotReader, json_to_snapshot, snapshot_to_json
+from sorted_keys import SortedKeys
+from storage import JsonStorage, MemoryStorage, SQLiteStorage
+from events import EventLog
 
 
 def create_temp_file():
@@ -37,6 +56,17 @@ def test_audiobook_creation():
     assert audiobook.duration_minutes == 120
     assert isinstance(audiobook, Book)
 
+# Kitap sınıfları __slots__ kullanır; nesnelerde __dict__ bulunmaz
+def test_book_slots():
+    for book in (Book("Test Book", "Test Author", "1"),
+                 EBook("Test EBook", "Test Author", "2", "PDF", 2.5),
+                 AudioBook("Test AudioBook", "Test Author", "3", 120)):
+        assert not hasattr(book, "__dict__")
+        with pytest.raises(AttributeError):
+            book.publisher = "Yayınevi"
+    # Aynı yazar adı tek bir string nesnesi olarak paylaşılır
+    assert Book("A", "Ortak" + " Yazar", "4").author is Book("B", "Ortak Yazar", "5").author
+
 # Kitap ödünç alma ve iade etme testi
 def test_book_borrow_return():
     book = Book("Test Book", "Test Author", "1234567890")
@@ -139,6 +169,104 @@ def test_find_book_methods():
     finally:
         cleanup_temp_file(temp_file)
 
+# İndekslerin ekleme, silme ve yükleme sonrası tutarlılığı testi
+def test_indexes_consistent_after_mutations():
+    temp_file = create_temp_file()
+    try:
+        library = Library("Test Library", temp_file)
+        book1 = Book("Ortak Başlık", "Yazar Bir", "1234567890")
+        book2 = Book("ortak başlık", "Yazar İki", "1234567891")
+        library.add_book(book1)
+        library.add_book(book2)
+
+        # Aynı başlıklı kitaplar eklenme sırasıyla döner
+        assert library.find_book_by_title("ORTAK BAŞLIK") is book1
+        assert library.find_books_by_title("Ortak Başlık") == [book1, book2]
+
+        library.remove_book("1234567890")
+        assert library.find_book_by_isbn("1234567890") is None
+        assert library.find_book_by_title("Ortak Başlık") is book2
+        assert library.find_book_by_author("Yazar Bir") is None
+
+        # Dosyadan yüklenen kütüphanede indeksler yeniden oluşturulur
+        reloaded = Library("Test Library", temp_file)
+        assert reloaded.find_book_by_isbn("1234567891").title == "ortak başlık"
+        assert reloaded.find_book_by_author("Yazar İki").isbn == "1234567891"
+    finally:
+        cleanup_temp_file(temp_file)
+
+# Serbest metin araması testi (önek, hatalı yazım, Türkçe karakterler, sıralama)
+def test_search_books():
+    temp_file = create_temp_file()
+    try:
+        library = Library("Test Library", temp_file)
+        library.add_book(Book("İstanbul Hatırası", "Ahmet Ümit", "1234567890"))
+        library.add_book(Book("Kürk Mantolu Madonna", "Sabahattin Ali", "1234567891"))
+        library.add_book(Book("Istanbul: Memories and the City", "Orhan Pamuk", "1234567892"))
+        library.add_book(Book("Madonna Biyografisi", "Test Author", "1234567893"))
+
+        # Türkçe İ/ı ve aksanlar fark etmeksizin eşleşir
+        assert {b.isbn for b in library.search_books("istanbul")} == {"1234567890", "1234567892"}
+        assert library.search_books("ISTANBUL HATIRASI")[0].isbn == "1234567890"
+        assert library.search_books("kurk")[0].isbn == "1234567891"
+
+        # Önek araması
+        assert library.search_books("sabah")[0].isbn == "1234567891"
+
+        # Hatalı yazım
+        assert library.search_books("Pamk")[0].isbn == "1234567892"
+
+        # Tüm kelimeleri içeren kitap önce gelir, limit uygulanır
+        results = library.search_books("kürk madonna")
+        assert [b.isbn for b in results] == ["1234567891", "1234567893"]
+        assert len(library.search_books("madonna", limit=1)) == 1
+
+        # Silinen kitap aramadan da çıkar
+        library.remove_book("1234567891")
+        assert [b.isbn for b in library.search_books("madonna")] == ["1234567893"]
+        assert library.search_books("sabahattin") == []
+    finally:
+        cleanup_temp_file(temp_file)
+
+# İmleç tabanlı sayfalama ve filtre testi
+def test_page_books():
+    temp_file = create_temp_file()
+    try:
+        library = Library("Test Library", temp_file)
+        for i in (5, 1, 4, 2, 3):
+            library.add_book(Book(f"Kitap {i}", "Yazar", f"123456789{i}"))
+        library.add_book(EBook("E-Kitap", "Yazar", "1234567896", "PDF", 1.0))
+        library.borrow_book("1234567892")
+
+        books, cursor = library.page_books(2)
+        assert [b.isbn for b in books] == ["1234567891", "1234567892"]
+        books, cursor = library.page_books(2, cursor)
+        assert [b.isbn for b in books] == ["1234567893", "1234567894"]
+
+        # Sayfalar arasında kitap silinmesi sonraki sayfayı etkilemez
+        library.remove_book("1234567895")
+        books, cursor = library.page_books(2, cursor)
+        assert [b.isbn for b in books] == ["1234567896"]
+        assert cursor is None
+
+        assert [b.isbn for b in library.iter_books(borrowed=True)] == ["1234567892"]
+        assert [b.isbn for b in library.iter_books(book_type="EBook")] == ["1234567896"]
+    finally:
+        cleanup_temp_file(temp_file)
+
+# Sıralı anahtarlar küçük parçalarda tutulur; parça bölünmesi ve boşalması sırayı bozmaz
+def test_sorted_keys():
+    keys = SortedKeys(["c", "a"], load=2)
+    for key in ("e", "b", "d", "f", "g"):
+        keys.add(key)
+    assert list(keys) == ["a", "b", "c", "d", "e", "f", "g"] and len(keys._chunks) > 1
+    assert keys.after("", 3) == ["a", "b", "c"] and keys.after("c", 10) == ["d", "e", "f", "g"]
+    assert keys.after("cc", 2) == ["d", "e"] and keys.after("g", 2) == []
+    assert list(keys.irange("b", "f")) == ["b", "c", "d", "e"] and list(keys.irange("cc", "d")) == []
+    for key in ("a", "b", "g"):
+        keys.remove(key)
+    assert list(keys) == ["c", "d", "e", "f"] and len(keys) == 4 and keys.after("", 2) == ["c", "d"]
+
 # Ödünç alma ve iade etme testi
 def test_borrow_return_books():
     temp_file = create_temp_file()
@@ -167,6 +295,43 @@ def test_borrow_return_books():
         cleanup_temp_file(temp_file)
 
 
+# Artımlı istatistik sayaçları testi
+def test_stats_counters():
+    temp_file = create_temp_file()
+    try:
+        library = Library("Test Library", temp_file)
+        library.add_book(Book("Test Book", "Test Author", "1234567890"))
+        library.add_book(EBook("Test EBook", "Test Author", "1234567891", "PDF", 2.5))
+        library.add_book(AudioBook("Test AudioBook", "Başka Yazar", "1234567892", 120))
+        library.borrow_book("1234567890")
+        library.borrow_book("1234567891")
+        library.return_book("1234567891")
+        library.borrow_book("1234567890")  # zaten ödünç verilmiş, sayılmaz
+
+        stats = library.stats()
+        assert stats["toplam_kitap"] == 3
+        assert stats["ödünç_kitap"] == 1
+        assert stats["mevcut_kitap"] == 2
+        assert stats["tür_dağılımı"] == {"Book": 1, "EBook": 1, "AudioBook": 1}
+        assert stats["yazar_sayısı"] == 2
+        assert stats["ödünç_işlemi"] == 2
+        assert stats["iade_işlemi"] == 1
+        assert library.top_authors(1) == [("Test Author", 2)]
+
+        library.remove_book("1234567890")
+        stats = library.stats()
+        assert stats["ödünç_kitap"] == 0
+        assert stats["tür_dağılımı"]["Book"] == 0
+        assert library.top_authors(1) == [("Test Author", 1)]
+
+        # Yüklemede sayaçlar yeniden oluşturulur
+        library.borrow_book("1234567892")
+        reloaded = Library("Test Library", temp_file)
+        assert reloaded.stats()["ödünç_kitap"] == 1
+        assert reloaded.stats()["toplam_kitap"] == 2
+    finally:
+        cleanup_temp_file(temp_file)
+
 # JSON kaydetme ve yükleme testi
 def test_json_persistence():
     temp_file = create_temp_file()
@@ -204,8 +369,816 @@ def test_json_persistence():
         assert loaded_book.is_borrowed is True
         assert loaded_ebook.is_borrowed is False
         assert loaded_audiobook.is_borrowed is False
+
+        # Eski save_to_json/load_from_json adları da çalışır
+        assert library1.save_to_json() is True and library2.load_from_json() is True
+        assert library2.total_books == 3
+    finally:
+        cleanup_temp_file(temp_file)
+
+# Günlük (journal) modunda kaydetme, yeniden oynatma ve sıkıştırma testi
+def test_journal_persistence_and_compaction():
+    temp_file = create_temp_file()
+    journal_file = f"{temp_file}.journal"
+    try:
+        library1 = Library("Test Library", temp_file, journal=True, compact_after=100)
+        library1.add_book(Book("Test Book", "Test Author", "1234567890"))
+        library1.add_book(EBook("Test EBook", "Test Author", "1234567891", "PDF", 2.5))
+        library1.borrow_book("1234567890")
+        library1.remove_book("1234567891")
+
+        # Anlık görüntü değişmez, değişiklikler günlüğe eklenir
+        assert os.path.getsize(temp_file) == 0
+        with open(journal_file, encoding="utf-8") as f:
+            assert len(f.readlines()) == 4
+
+        library2 = Library("Test Library", temp_file, journal=True)
+        assert library2.total_books == 1
+        assert library2.find_book_by_isbn("1234567890").is_borrowed is True
+        assert library2.find_book_by_isbn("1234567891") is None
+
+        # Eşik aşılınca günlük anlık görüntüye sıkıştırılır
+        library3 = Library("Test Library", temp_file, journal=True, compact_after=2)
+        library3.return_book("1234567890")
+        library3.add_book(AudioBook("Test AudioBook", "Test Author", "1234567892", 120))
+        assert os.path.getsize(journal_file) == 0
+
+        library4 = Library("Test Library", temp_file, journal=True)
+        assert library4.total_books == 2
+        assert library4.find_book_by_isbn("1234567890").is_borrowed is False
+        assert isinstance(library4.find_book_by_isbn("1234567892"), AudioBook)
+    finally:
+        cleanup_temp_file(temp_file)
+        cleanup_temp_file(journal_file)
+
+# Arka plan yazıcısı ile kaydetme testi; flush sonrası tüm değişiklikler diskte olmalı
+def test_background_writer_persistence():
+    temp_file = create_temp_file()
+    journal_file = f"{temp_file}.journal"
+    try:
+        library1 = Library("Test Library", temp_file, journal=True, compact_after=3, background_writer=True)
+        for i in range(5):
+            library1.add_book(Book(f"Test Book {i}", "Test Author", f"123456789{i}"))
+        library1.borrow_book("1234567890")
+        library1.remove_book("1234567891")
+        library1.flush()
+
+        library2 = Library("Test Library", temp_file, journal=True)
+        assert library2.total_books == 4
+        assert library2.find_book_by_isbn("1234567890").is_borrowed is True
+        assert library2.find_book_by_isbn("1234567891") is None
+
+        # close() bekleyen yazmaları tamamlar
+        library1.return_book("1234567890")
+        library1.close()
+        library3 = Library("Test Library", temp_file, journal=True)
+        assert library3.find_book_by_isbn("1234567890").is_borrowed is False
     finally:
         cleanup_temp_file(temp_file)
+        cleanup_temp_file(journal_file)
+
+# Okuyucular birbirini beklemez, yazıcı okuyucuların bitmesini bekler
+def test_rwlock():
+    lock = RWLock()
+    readers_inside = threading.Barrier(2, timeout=5)
+    events = []
+
+    def reader():
+        with lock.read():
+            readers_inside.wait()  # iki okuyucu aynı anda kilidin içinde olmalı
+            events.append("read")
+
+    def writer():
+        with lock.write():
+            events.append("write")
+
+    with lock.read():
+        threads = [threading.Thread(target=reader) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer_thread = threading.Thread(target=writer)
+        writer_thread.start()
+        writer_thread.join(0.1)
+        assert writer_thread.is_alive()  # okuma kilidi bırakılana kadar yazıcı bekler
+    writer_thread.join(5)
+    assert events == ["read", "read", "write"]
+
+# Çok thread'li yük altında ödünç/iade/ekleme/silme tutarlılık testi
+def test_concurrent_operations_stress():
+    temp_file = create_temp_file()
+    journal_file = f"{temp_file}.journal"
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # thread geçişlerini sıklaştırarak yarış durumlarını zorla
+    try:
+        library = Library("Test Library", temp_file, journal=True, compact_after=200)
+        library.display = UnicodeDisplay()
+        for name in ("success", "error", "warning", "info"):
+            setattr(library.display, name, lambda message: None)
+        isbns = [f"12345678{i:02d}" for i in range(10)]
+        for isbn in isbns[:5]:
+            library.add_book(Book(f"Kitap {isbn}", "Stres Yazarı", isbn))
+
+        successes = {"borrow": 0, "return": 0}
+        counter_lock = threading.Lock()
+        errors = []
+
+        def worker(seed: int):
+            rng = random.Random(seed)
+            try:
+                for _ in range(300):
+                    isbn = rng.choice(isbns)
+                    op = rng.random()
+                    if op < 0.35:
+                        if library.borrow_book(isbn):
+                            with counter_lock:
+                                successes["borrow"] += 1
+                    elif op < 0.7:
+                        if library.return_book(isbn):
+                            with counter_lock:
+                                successes["return"] += 1
+                    elif op < 0.8:
+                        library.add_book(Book(f"Kitap {isbn}", "Stres Yazarı", isbn))
+                    elif op < 0.85:
+                        library.remove_book(isbn)
+                    else:
+                        stats = library.stats()
+                        assert 0 <= stats["ödünç_kitap"] <= stats["toplam_kitap"]
+                        list(library.iter_books())
+                        library.search_books("kitap")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        books = list(library.iter_books())
+        # Aynı ISBN iki kez eklenmemeli
+        assert len({book.isbn for book in books}) == len(books) == library.total_books
+        # Sayaçlar kitapların gerçek durumuyla tutarlı olmalı
+        stats = library.stats()
+        assert stats["ödünç_kitap"] == sum(book.is_borrowed for book in books)
+        assert stats["ödünç_işlemi"] == successes["borrow"]
+        assert stats["iade_işlemi"] == successes["return"]
+        # Diskteki durum bellekteki durumla aynı olmalı
+        reloaded = Library("Test Library", temp_file, journal=True)
+        assert {(b.isbn, b.is_borrowed) for b in reloaded.iter_books()} == {(b.isbn, b.is_borrowed) for b in books}
+    finally:
+        sys.setswitchinterval(switch_interval)
+        cleanup_temp_file(temp_file)
+        cleanup_temp_file(journal_file)
+
+# Binary anlık görüntü: tembel (lazy) açılış, JSON dönüştürücüleri ve değişikliklerin kaydı
+def test_binary_snapshot():
+    temp_file = create_temp_file()
+    snapshot_file = temp_file.replace(".json", ".snap")
+    export_file = temp_file.replace(".json", ".export.json")
+    try:
+        library1 = Library("Binary Kütüphane", temp_file, binary_snapshot=True)
+        library1.add_book(Book("Kürk Mantolu Madonna", "Sabahattin Ali", "1234567892"))
+        library1.add_book(EBook("İçimizdeki Şeytan", "Sabahattin Ali", "1234567890", "EPUB", 1.5))
+        library1.add_book(AudioBook("Tutunamayanlar", "Oğuz Atay", "1234567891", 900))
+        library1.borrow_book("1234567891")
+        assert os.path.getsize(temp_file) == 0  # JSON yerine .snap yazılır
+
+        # Açılışta kitaplar oluşturulmaz; sayılar başlıktan, aramalar dosyadan yapılır
+        library2 = Library("Test Library", temp_file, binary_snapshot=True)
+        assert library2._snapshot is not None and library2._books == {}
+        assert library2.name == "Binary Kütüphane"
+        stats = library2.stats()
+        assert (stats["toplam_kitap"], stats["ödünç_kitap"], stats["yazar_sayısı"]) == (3, 1, 2)
+        assert stats["tür_dağılımı"] == {"Book": 1, "EBook": 1, "AudioBook": 1}
+        assert library2.find_book_by_isbn("1234567890").file_format == "EPUB"
+        assert library2.find_book_by_isbn("9999999999") is None
+        books, cursor = library2.page_books(2)
+        assert [b.isbn for b in books] == ["1234567890", "1234567891"] and cursor == "1234567891"
+        assert [b.isbn for b in library2.iter_books(cursor)] == ["1234567892"]
+        assert library2._snapshot is not None
+
+        # İlk değişiklikte kitaplar belleğe alınır ve anlık görüntü yeniden yazılır
+        library2.return_book("1234567891")
+        assert library2._snapshot is None
+        assert library2.find_book_by_author("Oğuz Atay").is_borrowed is False
+        library2.close()
+
+        library3 = Library("Test Library", temp_file, binary_snapshot=True)
+        assert library3.find_book_by_isbn("1234567891").is_borrowed is False
+        assert library3.find_book_by_title("Tutunamayanlar").duration_minutes == 900
+        library3.close()
+
+        # JSON <-> binary dönüştürücüler _book_to_dict şemasını korur
+        snapshot_to_json(snapshot_file, export_file)
+        json_library = Library("Test Library", export_file)
+        assert [json_library._book_to_dict(b) for b in json_library._books] == \
+            [library3._book_to_dict(b) for b in library3._books]
+        json_to_snapshot(export_file, snapshot_file)
+        reader = SnapshotReader(snapshot_file)
+        assert list(reader) == [json_library._book_to_dict(b) for b in json_library._books]
+        reader.close()
+        library1.close()
+    finally:
+        cleanup_temp_file(temp_file)
+        cleanup_temp_file(snapshot_file)
+        cleanup_temp_file(export_file)
+
+# Toplu işlemler: ya hep ya hiç, tek yazma
+def test_batch_operations():
+    temp_file = create_temp_file()
+    journal_file = f"{temp_file}.journal"
+    try:
+        library = Library("Test Library", temp_file, journal=True)
+        books = [Book(f"Kitap {i}", "Test Author", f"123456789{i}") for i in range(3)]
+        results = library.add_books(books)
+        assert all(r["success"] for r in results) and library.total_books == 3
+
+        # Bir öğe geçersizse hiçbiri eklenmez
+        results = library.add_books([Book("Yeni", "Test Author", "1234567899"), Book("Kopya", "X", "1234567890")])
+        assert [r["success"] for r in results] == [False, False]
+        assert results[1]["message"] == "Kitap zaten mevcut"
+        assert library.find_book_by_isbn("1234567899") is None
+
+        results = library.borrow_books(["1234567890", "1234567891"])
+        assert all(r["success"] for r in results)
+        assert library.stats()["ödünç_kitap"] == 2
+
+        # Zaten ödünç verilmiş kitap ve aynı ISBN'in tekrarı tüm işlemi geri çevirir
+        assert not any(r["success"] for r in library.borrow_books(["1234567892", "1234567890"]))
+        assert not any(r["success"] for r in library.borrow_books(["1234567892", "1234567892"]))
+        assert library.find_book_by_isbn("1234567892").is_borrowed is False
+
+        assert all(r["success"] for r in library.return_books(["1234567890"]))
+        assert not any(r["success"] for r in library.remove_books(["1234567892", "9999999999"]))
+        assert all(r["success"] for r in library.remove_books(["1234567892"]))
+
+        # Her toplu işlem günlüğe tek seferde eklenir; durum yeniden yüklemede korunur
+        with open(journal_file, encoding="utf-8") as f:
+            assert len(f.readlines()) == 3 + 2 + 1 + 1
+        reloaded = Library("Test Library", temp_file, journal=True)
+        assert sorted((b.isbn, b.is_borrowed) for b in reloaded.iter_books()) == \
+            [("1234567890", False), ("1234567891", True)]
+        assert reloaded.stats()["ödünç_kitap"] == 1
+    finally:
+        cleanup_temp_file(temp_file)
+        cleanup_temp_file(journal_file)
+
+# Aynı işlemler tüm depolama arka uçlarında aynı sonucu vermeli
+@pytest.mark.parametrize("backend", ["json", "journal", "sqlite", "pushdown", "memory"])
+def test_storage_backends(backend):
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "library.db" if backend in ("sqlite", "pushdown") else "library.json")
+
+    def make_storage():
+        if backend in ("sqlite", "pushdown"):
+            return SQLiteStorage(path, pushdown=backend == "pushdown")
+        if backend == "memory":
+            return MemoryStorage()
+        return JsonStorage(path, journal=backend == "journal")
+
+    try:
+        library = Library("Depo Testi", storage=make_storage())
+        library.add_book(Book("Test Book", "Test Author", "1234567890"))
+        library.add_book(EBook("Test EBook", "Test Author", "1234567891", "PDF", 2.5))
+        library.add_books([AudioBook("Test AudioBook", "Other Author", "1234567892", 120),
+                           Book("Silinecek", "Other Author", "1234567893")])
+        library.borrow_books(["1234567890", "1234567892"])
+        library.return_book("1234567892")
+        library.remove_book("1234567893")
+        expected = [library._book_to_dict(book) for book in library.iter_books()]
+        assert len(expected) == 3 and library.stats()["ödünç_kitap"] == 1
+        library.close()
+
+        reloaded = Library("Depo Testi", storage=make_storage())
+        if backend == "memory":
+            assert reloaded.total_books == 0
+        else:
+            assert [reloaded._book_to_dict(book) for book in reloaded.iter_books()] == expected
+            assert reloaded.stats()["ödünç_kitap"] == 1
+            assert isinstance(reloaded.find_book_by_isbn("1234567891"), EBook)
+        reloaded.close()
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+# pushdown modunda sorgular veritabanında çalışır; aynı veritabanını paylaşan kütüphaneler birbirini ezmez
+def test_sqlite_pushdown():
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "library.db")
+    try:
+        library1 = Library("Test Library", storage=SQLiteStorage(path, pushdown=True), book_cache_size=2)
+        library1.add_books([Book("İnce Memed", "Yaşar Kemal", "1234567890"),
+                            EBook("Kuyucaklı Yusuf", "Sabahattin Ali", "1234567891", "EPUB", 1.2),
+                            AudioBook("Kürk Mantolu Madonna", "Sabahattin Ali", "1234567892", 420)])
+        assert library1._books == {}
+        for isbn in ("1234567890", "1234567891", "1234567892"):
+            assert library1.find_book_by_isbn(isbn) is library1.find_book_by_isbn(isbn)
+        assert list(library1._hot_books) == ["1234567891", "1234567892"]
+        assert library1.find_book_by_title("ince memed").isbn == "1234567890"
+        assert [b.isbn for b in library1.find_books_by_author("SABAHATTİN ALİ")] == ["1234567891", "1234567892"]
+        assert [b.isbn for b in library1.search_books("madonna sabah")] == ["1234567892"]
+        assert library1.top_authors(1) == [("Sabahattin Ali", 2)]
+
+        library2 = Library("Test Library", storage=SQLiteStorage(path, pushdown=True))
+        assert library2.find_book_by_isbn("1234567890").is_borrowed is False
+        assert library1.borrow_book("1234567890") is True
+        # library2'nin önbelleğindeki eski kopya data_version değişince atılır; ikinci ödünç verme reddedilir
+        assert library2.borrow_book("1234567890") is False
+        assert library2.find_book_by_isbn("1234567890").is_borrowed is True
+        assert library2.stats()["ödünç_kitap"] == 1
+        assert [b.isbn for b in library2.iter_books(borrowed=True)] == ["1234567890"]
+        books, cursor = library2.page_books(1, book_type="EBook")
+        assert [b.isbn for b in books] == ["1234567891"] and cursor is None
+        assert library2.add_book(Book("Kopya", "X", "1234567891")) is False
+
+        # Ödünç sayısı kısmi indeksten okunur
+        plan = library2.storage._query("EXPLAIN QUERY PLAN SELECT COUNT(*) FROM books WHERE is_borrowed = 1")
+        assert any("idx_books_borrowed" in row[-1] for row in plan)
+
+        # Sayaçlar tetikleyicilerle güncellenir; sayaç tabloları olmayan eski veritabanında yeniden hesaplanır
+        assert library1.remove_book("1234567891") is True
+        assert library2.stats()["toplam_kitap"] == 2 and library2.top_authors() == [
+            ("Sabahattin Ali", 1), ("Yaşar Kemal", 1)]
+        counts = library2.storage.counts()
+        library1.close()
+        library2.close()
+        conn = sqlite3.connect(path)
+        with conn:
+            for table in ("library_stats", "type_counts", "author_counts", "title_copies"):
+                conn.execute(f"DROP TABLE {table}")
+        conn.close()
+        library2 = Library("Test Library", storage=SQLiteStorage(path, pushdown=True))
+        assert library2.storage.counts() == counts and counts["types"] == {"Book": 1, "AudioBook": 1}
+        assert library2.top_authors() == [("Sabahattin Ali", 1), ("Yaşar Kemal", 1)]
+        library2.close()
+
+        with pytest.raises(ValueError):
+            SQLiteStorage(path, background_writer=True, pushdown=True)
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+# Paylaşımlı JSON modunda iki kütüphane (iki worker gibi) aynı dosyaları kullanır; her biri diğerinin
+# değişikliklerini görür ve eski bir kopya üzerinden yazmaz
+@pytest.mark.parametrize("journal", [False, True])
+def test_shared_json_storage(journal):
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "library.json")
+    try:
+        library1 = Library("Test Library", path, journal=journal, shared=True)
+        library2 = Library("Test Library", path, journal=journal, shared=True)
+        library1.add_book(Book("İnce Memed", "Yaşar Kemal", "1234567890"))
+        assert library2.find_book_by_isbn("1234567890").title == "İnce Memed"
+        assert library2.borrow_book("1234567890") is True
+        assert library1.borrow_book("1234567890") is False
+        assert library1.stats()["ödünç_kitap"] == 1
+        library1.add_books([Book("Kuyucaklı Yusuf", "Sabahattin Ali", "1234567891")])
+        library2.remove_book("1234567890")
+        assert [b.isbn for b in library1.iter_books()] == ["1234567891"]
+        assert library2.save() is True
+        assert library1.find_books_by_author("sabahattin ali")[0].isbn == "1234567891"
+        library1.close()
+        library2.close()
+
+        with pytest.raises(ValueError):
+            JsonStorage(path, journal=True, background_writer=True, shared=True)
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+# Üyeler ve ödünçler tüm kalıcı arka uçlarda saklanır; üye, ISBN ve iade tarihi indeksleri yeniden yüklemede kurulur
+@pytest.mark.parametrize("backend", ["json", "journal", "binary", "sqlite", "pushdown"])
+def test_member_loans(backend):
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "library.db" if backend in ("sqlite", "pushdown") else "library.json")
+
+    def make_library():
+        if backend in ("sqlite", "pushdown"):
+            return Library("Defter Testi", storage=SQLiteStorage(path, pushdown=backend == "pushdown"))
+        return Library("Defter Testi", path, journal=backend == "journal", binary_snapshot=backend == "binary")
+
+    try:
+        library = make_library()
+        library.add_books([Book(f"Kitap {i}", "Yazar", f"123456789{i}") for i in range(4)])
+        assert library.add_member(Member("Ayşe", "m1", "ayse@example.com")) is True
+        assert library.add_member(Member("Ayşe", "m1", "ayse@example.com")) is False
+        library.add_member(Member("Mehmet", "m2", "mehmet@example.com"))
+
+        assert library.borrow_book("1234567890", "yok") is False and library.last_error == "Üye bulunamadı"
+        assert library.borrow_book("1234567890", "m1", due_at=300.0) is True
+        assert library.borrow_book("1234567890", "m2") is False
+        assert [r["success"] for r in library.borrow_books(["1234567891", "1234567892"], "m1", due_at=100.0)] == [True, True]
+        assert library.borrow_book("1234567893", "m2", due_at=200.0) is True
+        assert library.find_loan("1234567890").member_id == "m1"
+        assert [loan.isbn for loan in library.member_loans("m1")] == ["1234567891", "1234567892", "1234567890"]
+        assert [loan.isbn for loan in library.loans_due(250.0)] == ["1234567891", "1234567892", "1234567893"]
+        assert [loan.isbn for loan in library.loans_due(250.0, since=150.0, limit=1)] == ["1234567893"]
+
+        # Başka üyedeki kitap iade edilemez; üyesi ödünçlü kitaplar silinemez
+        assert library.return_book("1234567890", "m2") is False
+        assert library.remove_member("m1") is False
+        assert library.remove_book("1234567890") is False and library.last_error == "Kitap bir üyede, silinemez"
+        assert library.remove_member("yok") is False and error_status(library.last_error) == 404
+        assert error_status(PERSIST_ERROR) == 503 and error_status("Kitap bir üyede, silinemez") == 400
+        assert library.return_book("1234567891", "m1") is True
+        assert library.find_loan("1234567891") is None
+        library.close()
+
+        reloaded = make_library()
+        assert reloaded.find_member("m1") == Member("Ayşe", "m1", "ayse@example.com")
+        assert [loan.isbn for loan in reloaded.member_loans("m1")] == ["1234567892", "1234567890"]
+        assert reloaded.find_loan("1234567893").due_at == 200.0
+        assert reloaded.find_book_by_isbn("1234567891").is_borrowed is False
+        # Üye belirtilmeden iade edilen kitabın ödüncü de kapanır
+        assert reloaded.return_books(["1234567892", "1234567890"])[0]["success"] is True
+        assert reloaded.member_loans("m1") == []
+        assert reloaded.remove_member("m1") is True
+        assert reloaded.find_member("m1") is None
+
+        # Çok nüshalı kitapta find_loan yalnızca barkodu ISBN olan nüshayı bulur; title_loans tüm nüshaları döndürür
+        reloaded.add_member(Member("Zeynep", "m3", "zeynep@example.com"))
+        reloaded.add_copies("1234567893", count=1)
+        assert reloaded.borrow_book("1234567893", "m3", due_at=100.0) is True
+        assert reloaded.find_loan("1234567893").member_id == "m2"
+        assert [(loan.member_id, loan.barcode) for loan in reloaded.title_loans("1234567893")] == \
+            [("m3", "1234567893-2"), ("m2", "1234567893")]
+        assert [loan.barcode for loan in reloaded.member_loans("m3")] == ["1234567893-2"]
+        if backend == "pushdown":
+            plan = reloaded.storage._query("EXPLAIN QUERY PLAN SELECT * FROM loans WHERE member_id = ? ORDER BY due_at",
+                                           ("m2",))
+            assert any("idx_loans_member" in row[-1] for row in plan)
+        reloaded.close()
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+# Paylaşımlı modda bir sürecin açtığı ödünç diğerinin defterine de uygulanır
+def test_member_loans_shared():
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "library.json")
+    try:
+        library1 = Library("Test Library", path, journal=True, shared=True)
+        library2 = Library("Test Library", path, journal=True, shared=True)
+        library1.add_book(Book("İnce Memed", "Yaşar Kemal", "1234567890"))
+        library1.add_member(Member("Ayşe", "m1", "ayse@example.com"))
+        assert library2.borrow_book("1234567890", "m1") is True
+        assert library1.find_loan("1234567890").member_id == "m1"
+        assert library1.remove_member("m1") is False
+        assert library1.return_book("1234567890", "m1") is True
+        assert library2.member_loans("m1") == [] and library2.loans_due(float("inf")) == []
+        library1.close()
+        library2.close()
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+# Olaylar segmentlere yazılır; zaman aralığı sorguları seyrek indeksle, saklama süresi dolan segmentler silinir
+@pytest.mark.parametrize("persistent", [False, True])
+def test_event_log(persistent):
+    temp_dir = tempfile.mkdtemp()
+    directory = os.path.join(temp_dir, "events") if persistent else None
+    try:
+        log = EventLog(directory, segment_events=10, index_every=3, flush_interval=60)
+        for i in range(25):
+            log._pending.append((1000.0 + i, "borrow" if i % 2 else "add", f"isbn-{i % 5}", None))
+        log.flush()
+        assert log.stats() == {"segment_sayısı": 3, "olay_sayısı": 25}
+        assert [e["ts"] for e in log.query(1012.0, 1015.0)] == [1012.0, 1013.0, 1014.0]
+        assert [e["ts"] for e in log.query(start=1008.0, isbn="isbn-3")] == [1008.0, 1013.0, 1018.0, 1023.0]
+        assert len(log.query(limit=7)) == 7 and log.query(2000.0) == []
+        assert [json.loads(line)["ts"] for line in log.export(end=1002.0)] == [1000.0, 1001.0]
+
+        # Library işlemleri olay üretir; başarısız işlemler üretmez
+        library = Library("Olay Testi", storage=MemoryStorage(), event_log=log)
+        library.add_member(Member("Ayşe", "m1", "ayse@example.com"))
+        library.add_book(Book("İnce Memed", "Yaşar Kemal", "1234567890"))
+        library.borrow_book("1234567890", "m1")
+        library.borrow_book("1234567890")
+        library.return_book("1234567890")
+        library.remove_books(["1234567890"])
+        events = log.query(start=1100.0, isbn="1234567890")
+        assert [(e["type"], e["member_id"]) for e in events] == \
+            [("add", None), ("borrow", "m1"), ("return", "m1"), ("remove", None)]
+        assert events == sorted(events, key=lambda e: e["ts"])
+
+        # Son olayı saklama süresinden eski segmentler silinir, etkin segment kalır
+        assert log.prune(cutoff=1020.0) == 2
+        assert [e["ts"] for e in log.query(end=1100.0)][0] == 1020.0
+        log.close()
+        # Kapatılmış günlüğe gelen olaylar atılır, tampon büyümez
+        log.record("add", "1234567890")
+        log.record_many([("add", "1234567891", None)])
+        assert log._pending == []
+        if persistent:
+            reopened = EventLog(directory)
+            assert len(reopened.query()) == 9
+            reopened.close()
+            # Dizin ve yazıcı thread'i ilk olayda oluşturulur
+            lazy = EventLog(os.path.join(temp_dir, "lazy"))
+            assert not os.path.exists(lazy.directory) and lazy._thread is None
+            lazy.record("add", "1234567890")
+            assert lazy._thread is not None
+            lazy.close()
+            assert len(os.listdir(lazy.directory)) == 1
+        else:
+            # Yazıcı yokken tampon kaydederken boşaltılır, yalnızca en yeni segmentler bellekte kalır
+            bounded = EventLog(segment_events=10, batch_size=5, memory_segments=2)
+            for i in range(50):
+                bounded.record("add", f"isbn-{i}")
+                assert len(bounded._pending) < 5
+            assert bounded.stats() == {"segment_sayısı": 2, "olay_sayısı": 20}
+    finally:
+        for root, dirs, files in os.walk(temp_dir, topdown=False):
+            for name in files:
+                os.unlink(os.path.join(root, name))
+            for name in dirs:
+                os.rmdir(os.path.join(root, name))
+        os.rmdir(temp_dir)
+
+# Gecikmiş ödünçler iade tarihi heap'inden bulunur; iade edilenler çıkar, yeniden yüklemede heap yeniden kurulur
+@pytest.mark.parametrize("backend", ["journal", "pushdown"])
+def test_due_scheduler(backend):
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "library.db" if backend == "pushdown" else "library.json")
+
+    def make_library():
+        if backend == "pushdown":
+            return Library("Gecikme Testi", storage=SQLiteStorage(path, pushdown=True))
+        return Library("Gecikme Testi", path, journal=True)
+
+    try:
+        library = make_library()
+        library.add_books([Book(f"Kitap {i}", "Yazar", f"123456789{i}") for i in range(4)])
+        library.add_member(Member("Ayşe", "m1", "ayse@example.com"))
+        for i, due_at in enumerate((300.0, 100.0, 200.0, 5000.0)):
+            library.borrow_book(f"123456789{i}", "m1", due_at=due_at)
+        assert library.next_due(now=0.0) == 100.0
+        assert [loan.isbn for loan in library.check_overdue(now=250.0)] == ["1234567891", "1234567892"]
+        assert library.check_overdue(now=250.0) == []
+        library.return_book("1234567891")
+        assert [loan.isbn for loan in library.overdue_loans(now=400.0)] == ["1234567892", "1234567890"]
+        assert [loan.isbn for loan in library.overdue_loans(limit=1, now=400.0)] == ["1234567892"]
+        assert library.next_due(now=400.0) == 5000.0
+        library.close()
+
+        reloaded = make_library()
+        assert [loan.isbn for loan in reloaded.overdue_loans()] == ["1234567892", "1234567890", "1234567893"]
+        if backend == "pushdown":
+            # Başka sürecin iadesi sonraki sorguda görünür; yeni gecikenler yalnızca son kontrolden itibaren aranır
+            other = make_library()
+            other.return_book("1234567892")
+            assert [loan.isbn for loan in reloaded.overdue_loans()] == ["1234567890", "1234567893"]
+            assert [loan.isbn for loan in reloaded.check_overdue(now=1000.0)] == ["1234567890"]
+            assert [loan.isbn for loan in reloaded.check_overdue()] == ["1234567893"]
+            assert reloaded.check_overdue() == []
+            # Son kontrolden sonra geçmiş iade tarihiyle açılan ödünç de bir kez bulunur
+            other.borrow_book("1234567891", "m1", due_at=500.0)
+            assert [loan.isbn for loan in reloaded.check_overdue()] == ["1234567891"]
+            assert reloaded.check_overdue() == []
+            other.close()
+        reloaded.close()
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+# watch_overdue arka planda sıradaki iade tarihine kadar bekler ve gecikenleri ayırır
+@pytest.mark.asyncio
+async def test_watch_overdue():
+    library = Library("Gecikme Testi", storage=MemoryStorage())
+    library.add_book(Book("İnce Memed", "Yaşar Kemal", "1234567890"))
+    library.add_member(Member("Ayşe", "m1", "ayse@example.com"))
+    library.borrow_book("1234567890", "m1", due_at=time.time() + 0.05)
+    watcher = asyncio.create_task(library.watch_overdue(max_interval=1.0))
+    try:
+        await asyncio.sleep(0.3)
+        assert [loan.isbn for loan in library.scheduler.overdue()] == ["1234567890"]
+    finally:
+        watcher.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await watcher
+
+# Ayırtma sırası kalıcıdır; iade edilen kitap aynı yazmada sıradaki üyeye ödünç verilir
+@pytest.mark.parametrize("backend", ["json", "journal", "binary", "sqlite", "pushdown"])
+def test_holds(backend):
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "library.db" if backend in ("sqlite", "pushdown") else "library.json")
+
+    def make_library():
+        if backend in ("sqlite", "pushdown"):
+            return Library("Ayırtma Testi", storage=SQLiteStorage(path, pushdown=backend == "pushdown"))
+        return Library("Ayırtma Testi", path, journal=backend == "journal", binary_snapshot=backend == "binary")
+
+    try:
+        library = make_library()
+        library.add_books([Book(f"Kitap {i}", "Yazar", f"123456789{i}") for i in range(2)])
+        for member_id in ("m1", "m2", "m3"):
+            library.add_member(Member("Üye", member_id, f"{member_id}@example.com"))
+        assert library.place_hold("1234567890", "m2") is False  # rafta, doğrudan ödünç alınır
+        library.borrow_book("1234567890", "m1")
+        assert library.place_hold("1234567890", "m1") is False
+        assert library.place_hold("1234567890", "m2") is True
+        assert library.place_hold("1234567890", "m3") is True
+        assert library.place_hold("1234567890", "m3") is False
+        assert library.hold_position("1234567890", "m3") == 2
+        assert library.remove_member("m2") is False and library.remove_book("1234567890") is False
+        library.close()
+
+        library = make_library()
+        assert [hold.member_id for hold in library.hold_queue("1234567890")] == ["m2", "m3"]
+        assert library.return_book("1234567890", "m1") is True
+        assert library.find_book_by_isbn("1234567890").is_borrowed is True
+        assert library.find_loan("1234567890").member_id == "m2"
+        assert library.hold_position("1234567890", "m3") == 1 and library.member_holds("m2") == []
+        assert [r["success"] for r in library.return_books(["1234567890"])] == [True]
+        assert library.find_loan("1234567890").member_id == "m3"
+        library.close()
+
+        library = make_library()
+        assert library.hold_queue("1234567890") == [] and library.find_loan("1234567890").member_id == "m3"
+        library.borrow_book("1234567891", "m1")
+        library.place_hold("1234567891", "m2")
+        assert library.cancel_hold("1234567891", "m2") is True and library.cancel_hold("1234567891", "m2") is False
+        assert library.return_book("1234567891") is True and library.find_loan("1234567891") is None
+        library.close()
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+# Nüshalar: boştaki nüsha O(1) ile verilir, kitap son nüsha verilince ödünç verilmiş sayılır; sayaçlar taranmadan
+# güncellenir. Nüshası kaydedilmemiş kitap, barkodu ISBN'i olan tek nüshadır.
+@pytest.mark.parametrize("backend", ["json", "journal", "binary", "sqlite", "pushdown"])
+def test_copies(backend):
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "library.db" if backend in ("sqlite", "pushdown") else "library.json")
+
+    def make_library():
+        if backend in ("sqlite", "pushdown"):
+            return Library("Nüsha Testi", storage=SQLiteStorage(path, pushdown=backend == "pushdown"))
+        return Library("Nüsha Testi", path, journal=backend == "journal", binary_snapshot=backend == "binary")
+
+    try:
+        library = make_library()
+        library.add_books([Book(f"Kitap {i}", "Yazar", f"123456789{i}") for i in range(2)])
+        for member_id in ("m1", "m2", "m3"):
+            library.add_member(Member("Üye", member_id, f"{member_id}@example.com"))
+        library.borrow_book("1234567890", "m1")
+        library.place_hold("1234567890", "m2")
+        # İlk nüsha kitabın kendisidir; yeni nüsha sıradaki üyeye, diğeri rafa
+        copies = library.add_copies("1234567890", count=2)
+        assert [copy.barcode for copy in copies] == ["1234567890-2", "1234567890-3"]
+        assert library.add_copies("1234567890", ["1234567890-2"]) is False
+        assert library.hold_queue("1234567890") == []
+        assert library.copy_counts(["1234567890", "1234567891"]) == {"1234567890": (3, 1)}
+        assert library.find_book_by_isbn("1234567890").is_borrowed is False
+        assert library.borrow_book("1234567890", "m1") is False  # üyede zaten bir nüsha var
+        assert library.borrow_book("1234567890", "m3") is True
+        assert library.find_book_by_isbn("1234567890").is_borrowed is True
+        assert library.remove_copy("1234567890-3") is False  # ödünçte
+        stats = library.stats()
+        assert (stats["toplam_kitap"], stats["ödünç_kitap"]) == (2, 1)
+        assert (stats["toplam_nüsha"], stats["mevcut_nüsha"], stats["ödünç_nüsha"]) == (4, 1, 3)
+        library.close()
+
+        library = make_library()
+        loans = library.title_loans("1234567890")
+        assert sorted((loan.member_id, loan.barcode) for loan in loans) == \
+            [("m1", "1234567890"), ("m2", "1234567890-2"), ("m3", "1234567890-3")]
+        assert library.return_book("1234567890", barcode="1234567890-2") is True
+        assert library.return_book("1234567890", "m3") is True
+        assert library.find_book_by_isbn("1234567890").is_borrowed is False
+        assert [copy.on_loan for copy in library.copies("1234567890")] == [True, False, False]
+        assert library.remove_copy("1234567890-2") is True
+        stats = library.stats()
+        assert (stats["toplam_nüsha"], stats["mevcut_nüsha"], stats["ödünç_nüsha"]) == (3, 2, 1)
+        assert library.remove_book("1234567890") is False
+        assert library.return_book("1234567890", "m1") is True
+        assert library.remove_book("1234567890") is True and library.copies("1234567890") == []
+        library.close()
+
+        library = make_library()
+        assert library.copy_counts(["1234567890"]) == {} and library.stats()["toplam_nüsha"] == 1
+        library.close()
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+# Barkod sütunu olmayan eski ödünç tablosu açılışta taşınır; kitabın barkodu ISBN'i olur
+def test_sqlite_loans_migration():
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "library.db")
+    try:
+        library = Library("Taşıma Testi", storage=SQLiteStorage(path))
+        library.add_book(Book("Kitap", "Yazar", "1234567890"))
+        library.add_member(Member("Üye", "m1", "m1@example.com"))
+        library.borrow_book("1234567890", "m1")
+        library.close()
+        conn = sqlite3.connect(path)
+        conn.executescript('DROP TABLE loans; CREATE TABLE loans (isbn TEXT PRIMARY KEY, member_id TEXT NOT NULL, '
+                           'borrowed_at REAL NOT NULL, due_at REAL NOT NULL); '
+                           "INSERT INTO loans VALUES ('1234567890', 'm1', 0, 86400);")
+        conn.close()
+
+        library = Library("Taşıma Testi", storage=SQLiteStorage(path, pushdown=True))
+        loan = library.find_loan("1234567890")
+        assert (loan.barcode, loan.member_id) == ("1234567890", "m1")
+        assert library.return_book("1234567890", "m1") is True and library.title_loans("1234567890") == []
+        library.close()
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+def _add_books_in_process(path, start):
+    library = Library("Test Library", path, journal=True, compact_after=7, shared=True)
+    for i in range(start, start + 20):
+        library.add_book(Book(f"Kitap {i}", "Yazar", str(1000000000 + i)))
+        library.borrow_book(str(1000000000 + (i + 1) % 60))
+    library.close()
+
+# Ayrı süreçler aynı günlüğe yazar (ara sıra sıkıştırarak); hiçbir değişiklik kaybolmaz
+def test_shared_json_storage_across_processes():
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "library.json")
+    try:
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=_add_books_in_process, args=(path, start)) for start in (0, 20, 40)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        assert all(process.exitcode == 0 for process in processes)
+
+        library = Library("Test Library", path, journal=True, shared=True)
+        assert library.total_books == 60
+        # Her kitap en fazla bir kez ödünç verilebilir; ödünç sayısı kayıtlardaki durumla tutarlıdır
+        assert library.borrowed_books == sum(book.is_borrowed for book in library.iter_books())
+        library.close()
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+# pushdown modunda serbest metin araması FTS5 indeksinde yapılır; indeks tetikleyicilerle güncel kalır
+def test_sqlite_fts_search():
+    temp_dir = tempfile.mkdtemp()
+    path = os.path.join(temp_dir, "library.db")
+    try:
+        library = Library("Test Library", storage=SQLiteStorage(path, pushdown=True))
+        library.add_books([Book("Işıklı Yol", "Ayşe Kaya", "1234567890"),
+                           Book("Gece Yarısı", "Işık Demir", "1234567891"),
+                           Book("Çalıkuşu", "Reşat Nuri Güntekin", "1234567892"),
+                           Book("Işık ve Gölge", "Mehmet Işık", "1234567893")])
+
+        # Türkçe karakterler ve önekler: "isik" hem "Işık" hem "Işıklı" ile eşleşir
+        assert {b.isbn for b in library.search_books("isik")} == {"1234567890", "1234567891", "1234567893"}
+        assert [b.isbn for b in library.search_books("calikus")] == ["1234567892"]
+        assert [b.isbn for b in library.search_books("IŞIK gölge")] == ["1234567893"]
+        # bm25: hem başlıkta hem yazarda geçen kitap önce, yalnızca yazarda geçen kitap sonra gelir
+        ranked = [b.isbn for b in library.search_books("ışık", limit=10)]
+        assert ranked[0] == "1234567893" and ranked[-1] == "1234567891"
+        assert [b.isbn for b in library.search_books("ışık", limit=2, offset=2)] == ranked[2:]
+        assert library.search_books("\"*(") == []
+
+        library.remove_book("1234567893")
+        library.storage.commit([{"op": "upsert", "book": {"title": "Yeni Başlık", "author": "Ayşe Kaya",
+                                                          "isbn": "1234567890"}}])
+        assert [b.isbn for b in library.search_books("ışık")] == ["1234567891"]
+        assert [b.isbn for b in library.search_books("yeni baslik")] == ["1234567890"]
+        library.close()
+    finally:
+        for name in os.listdir(temp_dir):
+            os.unlink(os.path.join(temp_dir, name))
+        os.rmdir(temp_dir)
+
+# Kayıt başarısız olursa bellekteki değişiklik geri alınır
+def test_failed_persist_is_rolled_back():
+    class FailingStorage(MemoryStorage):
+        def commit(self, records):
+            return False
+
+    library = Library("Test Library", storage=FailingStorage())
+    assert library.add_book(Book("Test Book", "Test Author", "1234567890")) is False
+    assert library.total_books == 0 and library.find_book_by_isbn("1234567890") is None
+    results = library.add_books([Book("Test Book", "Test Author", "1234567890")])
+    assert results[0]["success"] is False and library.stats()["toplam_kitap"] == 0
+
+    library._attach_book(Book("Test Book", "Test Author", "1234567890"))
+    assert library.borrow_book("1234567890") is False
+    assert library.find_book_by_isbn("1234567890").is_borrowed is False
+    assert library.stats()["ödünç_kitap"] == 0 and library.stats()["ödünç_işlemi"] == 0
+    assert library.remove_book("1234567890") is False
+    assert library.find_book_by_title("Test Book") is not None
 
 # Mevcut olmayan JSON dosyası yükleme testi
 def test_load_nonexistent_file():
@@ -278,6 +1251,31 @@ def test_unicode_display():
     assert 'error' in display.symbols
 
 
+# Sunucu modunda mesajlar kuyruk üzerinden JSON satırları olarak toplu yazılır; seviye altındakiler atılır
+def test_json_log_sink():
+    previous = message_display._sink
+    stream = io.StringIO()
+    try:
+        sink = message_display.configure_logging("warning", stream=stream, batch_size=2, max_queue=100)
+        display = UnicodeDisplay()
+        display.success("Kitap eklendi")
+        display.warning(" JSON dosyası bulunamadı")
+        display.error("Kitap bulunamadı")
+        sink.flush()
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        assert [(r["level"], r["event"], r["message"]) for r in records] == [
+            ("warning", "warning", "JSON dosyası bulunamadı"), ("error", "error", "Kitap bulunamadı")]
+        assert records[0]["time"].endswith("+00:00")
+
+        message_display.reset_logging()
+        display.info("konsol")
+        assert stream.getvalue().count("\n") == 2
+        with pytest.raises(ValueError):
+            message_display.JsonLogSink("verbose")
+    finally:
+        message_display._sink = previous
+
+
 # Kütüphane işlemlerinin testi
 def test_complete_workflow():
     temp_file = create_temp_file()
@@ -347,5 +1345,159 @@ def test_add_book_by_isbn_duplicate():
         cleanup_temp_file(temp_file)
 
 
+# Sahte OpenLibrary cevapları ile toplu ISBN ekleme testi
+def test_add_books_by_isbn_bulk():
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.path)
+        editions = {
+            "/isbn/1111111111.json": {"title": "Kitap Bir", "authors": [{"key": "/authors/OL1A"}]},
+            "/isbn/2222222222.json": {"title": "Kitap İki", "authors": [{"key": "/authors/OL1A"},
+                                                                         {"key": "/authors/OL2A"}]},
+        }
+        authors = {"/authors/OL1A.json": {"name": "Ortak Yazar"}, "/authors/OL2A.json": {"name": "İkinci Yazar"}}
+        data = editions.get(request.url.path) or authors.get(request.url.path)
+        if data is None:
+            return httpx.Response(404)
+        return httpx.Response(200, json=data)
+
+    temp_file = create_temp_file()
+    try:
+        library = Library("Test Library", temp_file)
+        library.add_book(Book("Mevcut Kitap", "Test Author", "1234567890"))
+
+        results = library.add_books_by_isbn(
+            ["1111111111", "2222222222", "3333333333", "1234567890", "1111111111"],
+            transport=httpx.MockTransport(handler)
+        )
+
+        assert [r["isbn"] for r in results] == ["1111111111", "2222222222", "3333333333", "1234567890"]
+        assert [r["success"] for r in results] == [True, True, False, False]
+        assert library.find_book_by_isbn("2222222222").author == "Ortak Yazar & İkinci Yazar"
+
+        # Ortak yazar toplu işlem boyunca yalnızca bir kez çekilir
+        assert requests.count("/authors/OL1A.json") == 1
+
+        reloaded = Library("Test Library", temp_file)
+        assert reloaded.total_books == 3
+
+        # Aynı kitaplar tekrar içe aktarılırsa bilgiler disk önbelleğinden gelir
+        reloaded.remove_book("1111111111")
+        requests.clear()
+        results = reloaded.add_books_by_isbn(["1111111111", "3333333333"], transport=httpx.MockTransport(handler))
+        assert [r["success"] for r in results] == [True, False]
+        assert requests == []
+        library.close()
+        reloaded.close()
+    finally:
+        cleanup_temp_file(temp_file)
+        cleanup_temp_file(temp_file.replace(".json", ".cache.db"))
+
+
+# Paylaşılan AsyncClient ile async ISBN ekleme testi
+@pytest.mark.asyncio
+async def test_add_book_by_isbn_async():
+    def handler(request):
+        if request.url.path == "/isbn/1111111111.json":
+            return httpx.Response(200, json={"title": "Kitap Bir", "authors": [{"key": "/authors/OL1A"}]})
+        if request.url.path == "/authors/OL1A.json":
+            return httpx.Response(200, json={"name": "Ortak Yazar"})
+        return httpx.Response(404)
+
+    temp_file = create_temp_file()
+    try:
+        library = Library("Test Library", temp_file, metadata_cache=MetadataCache())
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            assert await library.add_book_by_isbn_async("1111111111", client) is True
+            assert await library.add_book_by_isbn_async("1111111111", client) is False
+            assert await library.add_book_by_isbn_async("3333333333", client) is False
+            results = await library.add_books_by_isbn_async(["1111111111", "3333333333"], client=client)
+        assert library.find_book_by_isbn("1111111111").author == "Ortak Yazar"
+        assert [r["success"] for r in results] == [False, False]
+        assert Library("Test Library", temp_file, metadata_cache=MetadataCache()).total_books == 1
+    finally:
+        cleanup_temp_file(temp_file)
+
+
+# Önbellek süre aşımı, negatif önbellek ve kapasite sınırı testi
+def test_metadata_cache():
+    temp_file = create_temp_file().replace(".json", ".db")
+    try:
+        cache = MetadataCache(temp_file, ttl=60, negative_ttl=0, max_entries=10, memory_entries=2)
+        cache.set("/isbn/1.json", 200, {"title": "Bir"})
+        cache.set("/isbn/2.json", 404)
+        cache.set("/isbn/3.json", 500)
+
+        assert cache.get("/isbn/1.json") == (200, {"title": "Bir"})
+        assert cache.get("/isbn/2.json") is None   # negatif kaydın süresi doldu
+        assert cache.get("/isbn/3.json") is None   # hata cevapları saklanmaz
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 2
+
+        # Bellekten düşen kayıtlar diskten okunur
+        for i in range(20):
+            cache.set(f"/authors/{i}.json", 200, {"name": str(i)})
+        assert cache.get("/authors/19.json") == (200, {"name": "19"})
+        assert cache.stats()["evictions"] > 0
+        cache.set("/authors/19.json", 200, {"name": "19"})  # üzerine yazma kayıt sayısını artırmaz
+        assert cache._disk_entries == cache._connection().execute('SELECT COUNT(*) FROM metadata_cache').fetchone()[0]
+        cache.close()
+
+        reopened = MetadataCache(temp_file)
+        assert reopened.get("/authors/19.json") == (200, {"name": "19"})
+        reopened.close()
+    finally:
+        cleanup_temp_file(temp_file)
+
+
+# Performans ölçümleri küçük bir katalogla çalışır; temel değerden yavaş ölçümler gerileme olarak raporlanır
+def test_benchmark_compare():
+    results = {"200": benchmark.run_size(200, 20, include_api=False)}
+    summary = results["200"]["find_book_by_isbn"]
+    assert summary["samples"] == 20 and summary["p50_us"] <= summary["p99_us"] and summary["ops_per_sec"] > 0
+    assert results["200"]["sqlite_add_books"]["samples"] == 1
+
+    baseline = {"results": json.loads(json.dumps(results))}
+    assert benchmark.compare(results, baseline) == []
+    baseline["results"]["200"]["find_book_by_isbn"]["p50_us"] = summary["p50_us"] / 2
+    regressions = benchmark.compare(results, baseline, tolerance=0.3)
+    assert len(regressions) == 1 and "find_book_by_isbn" in regressions[0]
+    assert benchmark.compare({"1000": results["200"]}, baseline) == []
+
+
+def test_metrics():
+    registry = Registry()
+    histogram = registry.histogram("test_seconds", "Test", ("operation",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "ara")
+    histogram.observe(0.5, "ara")
+    counter = registry.counter("test_total", "Test", ("status",))
+    counter.inc('4"04')
+    text = registry.render()
+    assert 'test_seconds_bucket{operation="ara",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{operation="ara",le="+Inf"} 2' in text
+    assert 'test_seconds_count{operation="ara"} 2' in text
+    assert 'test_total{status="4\\"04"} 1' in text
+    assert registry.counter("test_total", "Test") is counter
+
+    # Library metodları süre ve başarısızlık olarak ölçülür; yazmalar arka uç adıyla ölçülür
+    library = Library("Test Library", storage=MemoryStorage())
+    calls = OPERATION_SECONDS.count("borrow_book")
+    failures = OPERATION_FAILURES.value("borrow_book")
+    library.add_book(Book("İnce Memed", "Yaşar Kemal", "1234567890"))
+    library.borrow_book("1234567890")
+    library.borrow_book("1234567890")
+    assert OPERATION_SECONDS.count("borrow_book") == calls + 2
+    assert OPERATION_FAILURES.value("borrow_book") == failures + 1
+
+    storage = SQLiteStorage(":memory:")
+    writes = STORAGE_WRITE_SECONDS.count("SQLiteStorage", "execute")
+    storage.load("Test Library")
+    storage.commit([{"op": "upsert", "book": {"title": "A", "author": "B", "isbn": "1", "is_borrowed": False,
+                                               "type": "Book"}}])
+    assert STORAGE_WRITE_SECONDS.count("SQLiteStorage", "execute") == writes + 1
+    storage.close()
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
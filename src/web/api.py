@@ -1,15 +1,43 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+from contextlib import asynccontextmanager, suppress
+import json
+import os
+from datetime import datetime
+from typing import List, Optional
+from fastapi import Body, FastAPI, HTTPException, Query
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from web_manager import WebManager
-from library import PydanticBook
-from message_display import UnicodeDisplay
+from library import PydanticBook, PydanticMember, error_status, to_timestamp
+from web.web_manager import WebManager
+from message_display import UnicodeDisplay, configure_logging, reset_logging
+from metrics import CONTENT_TYPE, REGISTRY, timing_middleware
+
+# Uygulama çalışırken gecikmiş ödünçler arka planda izlenir (iade tarihi zamanlayıcısı)
+# Kapanırken izleme durdurulur, bekleyen yazmalar tamamlanır, veritabanı bağlantısı ve HTTP istemcileri kapatılır
+# Sunucu çalışırken mesajlar stdout'a beklemeden, kuyruk üzerinden JSON satırları halinde yazılır; modül içe
+# aktarıldığında (testler, betikler) konsol modu değişmez. Seviye LOG_LEVEL ortam değişkeniyle seçilir
+# (debug, info, warning, error)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_logging(os.environ.get("LOG_LEVEL", "info"))
+    watcher = asyncio.create_task(web_manager.library.watch_overdue())
+    yield
+    watcher.cancel()
+    with suppress(asyncio.CancelledError):
+        await watcher
+    await web_manager.aclose()
+    reset_logging()
 
 app = FastAPI(
     title="Kütüphane API",
     description="Kütüphane Yönetim Sistemi API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Her isteğin süresi ve durum kodu rota şablonuna göre ölçülür (GET /metrics)
+app.middleware("http")(timing_middleware)
+
 # CORS middleware ekle
 app.add_middleware(
     CORSMiddleware,
@@ -19,7 +47,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-web_manager = WebManager("Kütüphane Web Demo", "web_library.db")
+# Kitaplar belleğe yüklenmez; aramalar, listeler ve sayımlar indeksli SQLite sorgularıyla yapılır,
+# böylece birden fazla sunucu süreci (uvicorn --workers N) aynı veritabanını paylaşabilir; bir worker'ın
+# yazdığı değişiklikler diğerlerinde PRAGMA data_version ile fark edilir ve kitap önbellekleri temizlenir
+# Dolaşım olayları web_library.events dizinine yazılır, EVENT_RETENTION_DAYS günden (varsayılan 365) eskiler silinir
+web_manager = WebManager("Kütüphane Web Demo", "web_library.db", pushdown=True, events_dir="web_library.events",
+                         event_retention_days=float(os.environ.get("EVENT_RETENTION_DAYS", "365")))
+
+# Kütüphane çağrıları bloklayıcıdır (okuma/yazma ve ISBN kilitleri, paylaşımlı modda dosya kilidi, SQLite sorguları);
+# bu yüzden işleyiciler düz def ile tanımlanır ve FastAPI tarafından thread havuzunda çalıştırılır, yavaş bir istek
+# olay döngüsünü durdurmaz. Yalnızca OpenLibrary'yi bekleyen işleyiciler async'tir.
 
 # Ana sayfa
 @app.get("/", summary="Ana Sayfa")
@@ -34,16 +71,68 @@ def add_book(book_data: PydanticBook):
         return {"message": result["message"], "kitap": result["book"]}
     raise HTTPException(400, result["message"])
 
-# Tüm kitapları listeleme
-@app.get("/books", summary="Tüm Kitapları Listele")
-def get_books():
-    return web_manager.get_all_books()
+# Başarısız tekil işlemin kütüphaneden gelen hata mesajı; durum kodu error_status ile seçilir (bulunamadı 404,
+# kaydedilemedi 503, diğerleri 400)
+def error_response(result: dict):
+    return HTTPException(error_status(result["message"]), result["message"])
+
+# Toplu işlemler ya hep ya hiç çalışır: bir öğe bile geçersizse hiçbir değişiklik yapılmaz ve 400 döner
+# Cevap her ISBN için sonucu içerir. Bu yollar /books/{isbn} yollarından önce tanımlanmalıdır.
+def batch_response(result: dict):
+    if result["success"]:
+        return {"message": result["message"], "sonuçlar": result["results"]}
+    if not result.get("results"):
+        raise HTTPException(400, result["message"])
+    raise HTTPException(400, {"message": result["message"], "sonuçlar": result["results"]})
+
+# Birden fazla kitabı tek işlemde ekleme
+@app.post("/books/batch", summary="Toplu Kitap Ekle")
+def add_books_batch(books: List[PydanticBook] = Body(..., embed=True)):
+    return batch_response(web_manager.add_books([book.model_dump() for book in books]))
+
+# Birden fazla kitabı tek işlemde ödünç verme
+@app.patch("/books/batch/borrow", summary="Toplu Ödünç Ver")
+def borrow_books_batch(isbns: List[str] = Body(..., embed=True), member_id: Optional[str] = None):
+    return batch_response(web_manager.borrow_books(isbns, member_id))
+
+# Birden fazla kitabı tek işlemde iade etme
+@app.patch("/books/batch/return", summary="Toplu İade Et")
+def return_books_batch(isbns: List[str] = Body(..., embed=True), member_id: Optional[str] = None):
+    return batch_response(web_manager.return_books(isbns, member_id))
+
+# Kitapları listeleme
+# - Parametresiz çağrı tüm kitapları tek bir liste olarak döndürür
+# - limit/cursor ile ISBN sırasına göre sayfalama yapılır, cevap bir sonraki sayfanın imlecini içerir
+# - format=ndjson ile kitaplar satır satır akış (streaming) olarak gönderilir
+@app.get("/books", summary="Kitapları Listele")
+def get_books(limit: Optional[int] = Query(None, ge=1, le=1000), cursor: str = "",
+              borrowed: Optional[bool] = None, book_type: Optional[str] = Query(None, alias="type"),
+              fields: str = "", format: str = Query("json", pattern="^(json|ndjson)$")):
+    try:
+        if format == "ndjson":
+            rows = web_manager.iter_books(cursor, borrowed, book_type, fields, limit)
+            lines = (json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+            return StreamingResponse(lines, media_type="application/x-ndjson")
+
+        if limit or cursor:
+            return web_manager.get_books_page(limit or 100, cursor, borrowed, book_type, fields)
+
+        return web_manager.get_all_books(borrowed, book_type, fields)
+    except ValueError as e:
+        raise HTTPException(400, str(e))
 
 # Kitap bulma
+# q ile serbest metin araması yapılır: başlık/yazarda kelime ve önek araması, uygunluk (bm25) sıralı sayfa döner;
+# sonraki sayfa için cevaptaki sonraki_offset kullanılır
+# title/author/isbn ise tam eşleşen ilk kitabı döndürür
 @app.get("/books/search", summary="Kitap Ara")
-def search_books(title: str = "", author: str = "", isbn: str = ""):
-    if not title and not author and not isbn:
+def search_books(title: str = "", author: str = "", isbn: str = "", q: str = "",
+                 limit: int = Query(10, ge=1, le=100), offset: int = Query(0, ge=0)):
+    if not title and not author and not isbn and not q:
         raise HTTPException(400, "En az bir arama kriteri gerekli")
+
+    if q:
+        return web_manager.search_books_ranked(q, limit, offset)
     
     result = web_manager.search_books(title, author, isbn)
     if result:
@@ -56,41 +145,192 @@ def remove_book(isbn: str):
     result = web_manager.remove_book(isbn)
     if result["success"]:
         return {"message": result["message"]}
-    raise HTTPException(404, result["message"])
+    raise error_response(result)
 
-# Kitap ödünç alma
+# Kitap ödünç alma; member_id verilirse kitap üyeye ödünç verilir ve deftere kaydedilir
+# due_at ile iade tarihi belirlenebilir (varsayılan 14 gün sonra)
 @app.patch("/books/{isbn}/borrow")
-def borrow_book(isbn: str):
-    result = web_manager.borrow_book(isbn)
+def borrow_book(isbn: str, member_id: Optional[str] = None, due_at: Optional[datetime] = None):
+    result = web_manager.borrow_book(isbn, member_id, to_timestamp(due_at))
     if result["success"]:
         return {"message": result["message"]}
-    raise HTTPException(400, result["message"])
+    raise error_response(result)
 
-# Kitap iade etme
+# Kitap iade etme; member_id verilirse kitap o üyede olmalıdır, barcode ile iade edilen nüsha seçilir
+# Ayırtma sırası varsa nüsha sıradaki üyeye ödünç verilir ve yeni ödünç döndürülür
 @app.patch("/books/{isbn}/return")
-def return_book(isbn: str):
-    result = web_manager.return_book(isbn)
+def return_book(isbn: str, member_id: Optional[str] = None, barcode: Optional[str] = None):
+    result = web_manager.return_book(isbn, member_id, barcode)
+    if result["success"]:
+        return {key: value for key, value in result.items() if key != "success"}
+    raise error_response(result)
+
+# Kitabın tüm nüshalarının aktif ödünçleri (kimde oldukları ve iade tarihleri)
+@app.get("/books/{isbn}/loan", summary="Kitabın Ödünçleri")
+def get_book_loan(isbn: str):
+    loans = web_manager.get_book_loans(isbn)
+    if loans:
+        return loans
+    raise HTTPException(404, "Kitap bir üyeye ödünç verilmedi")
+
+# Nüsha ekleme: {"barcodes": [...]} ya da {"count": n}; bekleyen ayırtmalar varsa nüshalar sıradaki üyelere verilir
+@app.post("/books/{isbn}/copies", summary="Nüsha Ekle")
+def add_copies(isbn: str, barcodes: Optional[List[str]] = Body(None),
+               count: Optional[int] = Body(None, ge=1, le=1000)):
+    result = web_manager.add_copies(isbn, barcodes, count)
+    if result["success"]:
+        return {"message": result["message"], "barcodes": result["barcodes"]}
+    raise error_response(result)
+
+# Kitabın nüshaları ve ödünçleri
+@app.get("/books/{isbn}/copies", summary="Kitabın Nüshaları")
+def get_copies(isbn: str):
+    copies = web_manager.get_copies(isbn)
+    if copies is None:
+        raise HTTPException(404, "Kitap bulunamadı")
+    return copies
+
+# Nüsha silme
+@app.delete("/copies/{barcode}", summary="Nüsha Sil")
+def remove_copy(barcode: str):
+    result = web_manager.remove_copy(barcode)
     if result["success"]:
         return {"message": result["message"]}
-    raise HTTPException(400, result["message"])
+    raise error_response(result)
+
+# Ayırtma: ödünçteki kitap için sıraya girilir
+@app.post("/books/{isbn}/holds", summary="Kitabı Ayırt")
+def place_hold(isbn: str, member_id: str):
+    result = web_manager.place_hold(isbn, member_id)
+    if result["success"]:
+        return {"message": result["message"], "position": result["position"]}
+    raise error_response(result)
+
+# Kitabın ayırtma sırası, sıradaki üye ilk
+@app.get("/books/{isbn}/holds", summary="Ayırtma Sırası")
+def get_holds(isbn: str):
+    holds = web_manager.get_holds(isbn)
+    if holds is None:
+        raise HTTPException(404, "Kitap bulunamadı")
+    return holds
+
+# Üyenin sıradaki yeri
+@app.get("/books/{isbn}/holds/{member_id}", summary="Sıradaki Yer")
+def get_hold(isbn: str, member_id: str):
+    hold = web_manager.get_hold(isbn, member_id)
+    if hold:
+        return hold
+    raise HTTPException(404, "Ayırtma bulunamadı")
+
+# Ayırtma iptali
+@app.delete("/books/{isbn}/holds/{member_id}", summary="Ayırtmayı İptal Et")
+def cancel_hold(isbn: str, member_id: str):
+    result = web_manager.cancel_hold(isbn, member_id)
+    if result["success"]:
+        return {"message": result["message"]}
+    raise error_response(result)
+
+# Gecikmiş ödünçler, iade tarihi sırasıyla
+@app.get("/loans/overdue", summary="Gecikmiş Ödünçler")
+def get_overdue_loans(limit: int = Query(100, ge=1, le=10000)):
+    return web_manager.get_overdue_loans(limit)
+
+# Üye ekleme
+@app.post("/members", summary="Üye Ekle")
+def add_member(member_data: PydanticMember):
+    result = web_manager.add_member(member_data)
+    if result["success"]:
+        return {"message": result["message"], "üye": result["member"]}
+    raise error_response(result)
+
+# Üye bilgileri
+@app.get("/members/{member_id}", summary="Üye Bilgileri")
+def get_member(member_id: str):
+    member = web_manager.get_member(member_id)
+    if member:
+        return member
+    raise HTTPException(404, "Üye bulunamadı")
+
+# Üye silme
+@app.delete("/members/{member_id}", summary="Üye Sil")
+def remove_member(member_id: str):
+    result = web_manager.remove_member(member_id)
+    if result["success"]:
+        return {"message": result["message"]}
+    raise error_response(result)
+
+# Üyenin ödünçleri, iade tarihi sırasıyla
+@app.get("/members/{member_id}/loans", summary="Üyenin Ödünçleri")
+def get_member_loans(member_id: str):
+    loans = web_manager.get_member_loans(member_id)
+    if loans is None:
+        raise HTTPException(404, "Üye bulunamadı")
+    return loans
+
+# Üyenin ayırtmaları ve sıradaki yerleri
+@app.get("/members/{member_id}/holds", summary="Üyenin Ayırtmaları")
+def get_member_holds(member_id: str):
+    holds = web_manager.get_member_holds(member_id)
+    if holds is None:
+        raise HTTPException(404, "Üye bulunamadı")
+    return holds
+
+# Dolaşım geçmişi: [from, to) aralığındaki ekleme, silme, ödünç verme ve iade olayları, zaman sırasıyla
+# format=ndjson ile aralıktaki tüm olaylar akış halinde dışa aktarılır (limit uygulanmaz)
+@app.get("/events", summary="Olay Geçmişi")
+def get_events(start: Optional[datetime] = Query(None, alias="from"),
+               end: Optional[datetime] = Query(None, alias="to"), isbn: Optional[str] = None,
+               limit: int = Query(100, ge=1, le=10000), format: str = Query("json", pattern="^(json|ndjson)$")):
+    if format == "ndjson":
+        events = web_manager.iter_events(to_timestamp(start), to_timestamp(end), isbn)
+        lines = (json.dumps(event, ensure_ascii=False) + "\n" for event in events)
+        return StreamingResponse(lines, media_type="application/x-ndjson")
+    return web_manager.get_events(to_timestamp(start), to_timestamp(end), isbn, limit)
 
 # Kütüphane istatistikleri
 @app.get("/stats")
 def get_stats():
     return web_manager.get_stats()
 
+# En çok kitabı bulunan yazarlar
+@app.get("/stats/authors")
+def get_author_stats(limit: int = Query(10, ge=1, le=100)):
+    return web_manager.get_author_stats(limit)
+
+# OpenLibrary önbellek istatistikleri
+@app.get("/cache/stats")
+def get_cache_stats():
+    return web_manager.get_cache_stats()
+
+# Prometheus metin biçiminde ölçümler (istek süreleri, Library işlemleri, yazmalar, OpenLibrary istekleri)
+@app.get("/metrics", summary="Ölçümler", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
 # ISBN ile kitap ekleme
 @app.post("/books/isbn", summary="ISBN ile Kitap Ekle")
-def add_book_by_isbn(isbn_data: dict):
+async def add_book_by_isbn(isbn_data: dict):
     isbn = isbn_data.get("isbn", "").strip()
     if not isbn:
         raise HTTPException(400, detail="ISBN gerekli")
     
-    result = web_manager.add_book_by_isbn(isbn)
+    result = await web_manager.add_book_by_isbn_async(isbn)
     if result["success"]:
         return {"message": result["message"], "kitap": result["book"]}    
     raise HTTPException(400, detail=result["message"])
 
+# ISBN listesi ile toplu kitap ekleme
+@app.post("/books/isbn/bulk", summary="ISBN Listesi ile Toplu Kitap Ekle")
+async def add_books_by_isbn_bulk(isbn_data: dict):
+    isbns = isbn_data.get("isbns", [])
+    if not isinstance(isbns, list) or not any(str(isbn).strip() for isbn in isbns):
+        raise HTTPException(400, detail="En az bir ISBN gerekli")
+
+    result = await web_manager.add_books_by_isbn_async([str(isbn) for isbn in isbns])
+    if result["success"]:
+        return {"message": result["message"], "eklenen": result["added"], "sonuçlar": result["results"]}
+    raise HTTPException(400, detail=result["message"])
+
 if __name__ == "__main__":
     import uvicorn
     display = UnicodeDisplay()
@@ -1,6 +1,12 @@
-from typing import Optional, List, Dict, Any
+import time
+from itertools import islice
+from typing import Optional, List, Dict, Any, Iterator
 from pydantic import ValidationError
-from library import Library, Book, EBook, AudioBook, PydanticBook
+
+from library import (Library, project_event, project_hold, project_loan, Book, Copy, EBook, AudioBook, Member,
+                     PydanticBook, PydanticMember)
+from storage import SQLiteStorage
+from events import EventLog
 from dataclasses import dataclass
 
 
@@ -14,6 +20,12 @@ class BookData:
     is_borrowed: bool = False
 
 
+# Kitap listelerinde seçilebilecek alanlar; copies (nüsha sayısı) ve available (boştaki nüsha) isteğe bağlıdır
+BOOK_FIELDS = ("title", "author", "isbn", "publication_year", "borrowed", "type", "copies", "available")
+DEFAULT_BOOK_FIELDS = ("title", "author", "isbn", "publication_year", "borrowed")
+COPY_FIELDS = {"copies", "available"}
+
+
 class WebManager:
     """
     Manager layer, CLI'deki main.py gibi çalışıyor. Pydantic ile doğrulama, iş mantığı, veritabanı işlemleri, 
@@ -24,8 +36,21 @@ class WebManager:
     - API ve domain arasında veri dönüşümü
     """
     
-    def __init__(self, library_name: str, db_file: str = "web_library.db"):
-        self.library = Library(library_name, db_file)
+    # pushdown açıksa kitaplar belleğe yüklenmez, tüm sorgular SQLite üzerinde çalışır
+    # events_dir verilirse dolaşım olayları bu dizindeki segmentlere yazılır, verilmezse bellekte tutulur
+    def __init__(self, library_name: str, db_file: str = "web_library.db", background_writer: bool = False,
+                 pushdown: bool = False, events_dir: Optional[str] = None, event_retention_days: Optional[float] = None):
+        event_log = EventLog(events_dir, retention_days=event_retention_days) if events_dir else None
+        self.library = Library(library_name, storage=SQLiteStorage(db_file, background_writer, pushdown),
+                               event_log=event_log)
+
+    # Veritabanı bağlantısını kapatır
+    def close(self):
+        self.library.close()
+
+    # Bekleyen yazmaları tamamlar, veritabanı bağlantısını ve async HTTP istemcisini kapatır
+    async def aclose(self):
+        await self.library.aclose()
     
     # Pydantic ile doğrulama
     def validate_book_data(self, data: Dict[str, Any]) -> PydanticBook:
@@ -68,36 +93,108 @@ class WebManager:
     def add_book_by_isbn(self, isbn: str) -> Dict[str, Any]:
         try:
             # Check if book already exists first (like the library does)
-            existing_book = self.library.find_book_by_isbn(isbn)
-            if existing_book:
-                return {
-                    "success": False,
-                    "message": "Kitap eklenemedi - ISBN zaten mevcut"
-                }
-            
-            success = self.library.add_book_by_isbn(isbn)
-            
-            if success:
-                book = self.library.find_book_by_isbn(isbn)
-                return {
-                    "success": True,
-                    "message": "Kitap ISBN ile başarıyla eklendi",
-                    "book": self._book_to_dict(book)
-                }
-            else:
-                return {
-                    "success": False,
-                    "message": "Kitap eklenemedi - ISBN OpenLibrary'de bulunamadı, lütfen manuel ekleme yapın"
-                }
-                
+            if self.library.find_book_by_isbn(isbn):
+                return self._isbn_duplicate_result()
+            return self._isbn_add_result(isbn, self.library.add_book_by_isbn(isbn))
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Error: {e}"
+            }
+
+    # ISBN ile kitap ekleme (async); OpenLibrary beklenirken diğer istekler engellenmez
+    async def add_book_by_isbn_async(self, isbn: str) -> Dict[str, Any]:
+        try:
+            if self.library.find_book_by_isbn(isbn):
+                return self._isbn_duplicate_result()
+            return self._isbn_add_result(isbn, await self.library.add_book_by_isbn_async(isbn))
         except Exception as e:
             return {
                 "success": False,
                 "message": f"Error: {e}"
             }
+
+    def _isbn_duplicate_result(self) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "message": "Kitap eklenemedi - ISBN zaten mevcut"
+        }
+
+    def _isbn_add_result(self, isbn: str, success: bool) -> Dict[str, Any]:
+        if success:
+            book = self.library.find_book_by_isbn(isbn)
+            return {
+                "success": True,
+                "message": "Kitap ISBN ile başarıyla eklendi",
+                "book": self._book_to_dict(book)
+            }
+        return {
+            "success": False,
+            "message": "Kitap eklenemedi - ISBN OpenLibrary'de bulunamadı, lütfen manuel ekleme yapın"
+        }
     
-    def get_all_books(self) -> List[Dict[str, Any]]:
-        return [self._book_to_dict(book) for book in self.library._books]
+    # ISBN listesi ile toplu kitap ekleme
+    def add_books_by_isbn(self, isbns: List[str]) -> Dict[str, Any]:
+        try:
+            return self._bulk_result(self.library.add_books_by_isbn(isbns))
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Error: {e}"
+            }
+
+    # ISBN listesi ile toplu kitap ekleme (async)
+    async def add_books_by_isbn_async(self, isbns: List[str]) -> Dict[str, Any]:
+        try:
+            return self._bulk_result(await self.library.add_books_by_isbn_async(isbns))
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Error: {e}"
+            }
+
+    def _bulk_result(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        added = sum(1 for result in results if result["success"])
+        return {
+            "success": True,
+            "message": f"{added} kitap eklendi",
+            "added": added,
+            "results": results
+        }
+
+    def get_all_books(self, borrowed: Optional[bool] = None, book_type: Optional[str] = None,
+                      fields: str = "") -> List[Dict[str, Any]]:
+        selected = self.parse_fields(fields)
+        return list(self._project_books(self.library.iter_books(borrowed=borrowed, book_type=book_type), selected))
+
+    # İmleç (ISBN) tabanlı sayfalama
+    def get_books_page(self, limit: int, cursor: str = "", borrowed: Optional[bool] = None,
+                       book_type: Optional[str] = None, fields: str = "") -> Dict[str, Any]:
+        selected = self.parse_fields(fields)
+        books, next_cursor = self.library.page_books(limit, cursor, borrowed, book_type)
+        return {
+            "kitaplar": list(self._project_books(books, selected)),
+            "sonraki_imleç": next_cursor
+        }
+
+    # Kitapları tek tek üreten akış; tüm liste bellekte oluşturulmaz
+    def iter_books(self, cursor: str = "", borrowed: Optional[bool] = None, book_type: Optional[str] = None,
+                   fields: str = "", limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        selected = self.parse_fields(fields)
+        books = self.library.iter_books(cursor, borrowed, book_type)
+        if limit:
+            books = islice(books, limit)
+        return self._project_books(books, selected)
+
+    # "title,isbn" gibi alan listesini doğrular, geçersiz alan varsa ValueError fırlatır
+    def parse_fields(self, fields: str) -> tuple:
+        if not fields:
+            return DEFAULT_BOOK_FIELDS
+        selected = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+        invalid = [name for name in selected if name not in BOOK_FIELDS]
+        if invalid or not selected:
+            raise ValueError(f"Geçersiz alan: {', '.join(invalid)}. Geçerli alanlar: {', '.join(BOOK_FIELDS)}")
+        return selected
     
     # Kitap arama
     def search_books(self, title: str = "", author: str = "", isbn: str = "") -> Optional[Dict[str, Any]]:
@@ -119,10 +216,19 @@ class WebManager:
         
         return None
     
+    # Serbest metin araması (SQLite FTS5, bm25 sıralı); offset ile sayfalanan sonuç döndürür
+    def search_books_ranked(self, query: str, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
+        books = self.library.search_books(query, limit + 1, offset)
+        return {
+            "kitaplar": [self._book_to_dict(book) for book in books[:limit]],
+            "sonraki_offset": offset + limit if len(books) > limit else None
+        }
+
     # Kitap ödünç alma
-    def borrow_book(self, isbn: str) -> Dict[str, Any]:
+    # member_id verilirse kitap üyeye ödünç verilir ve deftere kaydedilir
+    def borrow_book(self, isbn: str, member_id: Optional[str] = None, due_at: Optional[float] = None) -> Dict[str, Any]:
         try:
-            success = self.library.borrow_book(isbn)
+            success = self.library.borrow_book(isbn, member_id, due_at)
             if success:
                 book = self.library.find_book_by_isbn(isbn)
                 return {
@@ -132,7 +238,7 @@ class WebManager:
             else:
                 return {
                     "success": False,
-                    "message": "Kitap ödünç alınamadı - kitap bulunamadı veya zaten ödünç verildi"
+                    "message": self.library.last_error
                 }
         except Exception as e:
             return {
@@ -140,12 +246,22 @@ class WebManager:
                 "message": f"Error: {e}"
             }
     
-    # Kitap iade etme
-    def return_book(self, isbn: str) -> Dict[str, Any]:
+    # Kitap iade etme; barcode ile iade edilen nüsha seçilir
+    def return_book(self, isbn: str, member_id: Optional[str] = None, barcode: Optional[str] = None) -> Dict[str, Any]:
         try:
-            success = self.library.return_book(isbn)
+            holds = self.library.hold_queue(isbn, limit=1)
+            success = self.library.return_book(isbn, member_id, barcode)
             if success:
                 book = self.library.find_book_by_isbn(isbn)
+                # Ayırtma sırası varsa nüsha sıradaki üyeye ödünç verilmiştir
+                loan = next((loan for loan in self.library.title_loans(isbn) if loan.member_id == holds[0].member_id),
+                            None) if holds else None
+                if loan:
+                    return {
+                        "success": True,
+                        "message": f"'{book.title}' iade edildi ve sıradaki üyeye ({loan.member_id}) ödünç verildi",
+                        "loan": project_loan(loan)
+                    }
                 return {
                     "success": True,
                     "message": f"'{book.title}' iade edildi"
@@ -153,13 +269,46 @@ class WebManager:
             else:
                 return {
                     "success": False,
-                    "message": "Kitap iade edilemedi - kitap bulunamadı veya zaten iade edildi"
+                    "message": self.library.last_error
                 }
         except Exception as e:
             return {
                 "success": False,
                 "message": f"Error: {e}"
             }
+    # Nüsha ekleme; barkodlar verilmezse count kadar barkod üretilir
+    def add_copies(self, isbn: str, barcodes: Optional[List[str]] = None, count: Optional[int] = None) -> Dict[str, Any]:
+        if not barcodes and not count:
+            return {"success": False, "message": "barcodes ya da count gerekli"}
+        copies = self.library.add_copies(isbn, barcodes, count)
+        if copies:
+            return {"success": True, "message": f"{len(copies)} nüsha eklendi",
+                    "barcodes": [copy.barcode for copy in copies]}
+        return {"success": False, "message": self.library.last_error}
+
+    # Kitabın nüshaları ve ödünçleri, kitap yoksa None
+    # Nüshası kaydedilmemiş kitap, barkodu ISBN'i olan tek nüsha olarak gösterilir
+    def get_copies(self, isbn: str) -> Optional[Dict[str, Any]]:
+        book = self.library.find_book_by_isbn(isbn)
+        if not book:
+            return None
+        copies = self.library.copies(isbn) or [Copy(isbn, isbn, book.is_borrowed)]
+        loans = {loan.barcode: loan for loan in self.library.title_loans(isbn)}
+        return {
+            "isbn": isbn,
+            "copies": len(copies),
+            "available": sum(1 for copy in copies if not copy.on_loan),
+            "items": [{"barcode": copy.barcode, "on_loan": copy.on_loan,
+                       "loan": project_loan(loans[copy.barcode]) if copy.barcode in loans else None}
+                      for copy in copies]
+        }
+
+    # Nüsha silme; ödünçteki nüsha ve kitabın son nüshası silinemez
+    def remove_copy(self, barcode: str) -> Dict[str, Any]:
+        if self.library.remove_copy(barcode):
+            return {"success": True, "message": "Nüsha silindi"}
+        return {"success": False, "message": self.library.last_error}
+
     # Kitap silme
     def remove_book(self, isbn: str) -> Dict[str, Any]:
         try:
@@ -172,7 +321,7 @@ class WebManager:
             else:
                 return {
                     "success": False,
-                    "message": "Kitap bulunamadı"
+                    "message": self.library.last_error
                 }
         except Exception as e:
             return {
@@ -180,17 +329,127 @@ class WebManager:
                 "message": f"Error: {e}"
             }
         
+    # Toplu kitap ekleme; kitaplardan biri bile eklenemezse hiçbiri eklenmez
+    def add_books(self, books_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            validated = [self.validate_book_data(book_data) for book_data in books_data]
+            results = self.library.add_books([Book(b.title, b.author, b.isbn) for b in validated])
+            return self._batch_result(results, "kitap eklendi")
+        except ValidationError as e:
+            return {
+                "success": False,
+                "message": f"Validation failed: {e}",
+                "validation_errors": self._format_validation_errors(e)
+            }
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Unexpected error: {e}"
+            }
+
+    # Toplu ödünç verme
+    def borrow_books(self, isbns: List[str], member_id: Optional[str] = None) -> Dict[str, Any]:
+        return self._batch_result(self.library.borrow_books(isbns, member_id), "kitap ödünç verildi")
+
+    # Toplu iade
+    def return_books(self, isbns: List[str], member_id: Optional[str] = None) -> Dict[str, Any]:
+        return self._batch_result(self.library.return_books(isbns, member_id), "kitap iade edildi")
+
+    def _batch_result(self, results: List[Dict[str, Any]], action: str) -> Dict[str, Any]:
+        if not results:
+            return {"success": False, "message": "En az bir kitap gerekli", "results": []}
+        if all(result["success"] for result in results):
+            return {"success": True, "message": f"{len(results)} {action}", "results": results}
+        return {"success": False, "message": "Toplu işlem uygulanmadı", "results": results}
+
+    # Üye ekleme
+    def add_member(self, member_data: PydanticMember) -> Dict[str, Any]:
+        member = Member(member_data.name, member_data.member_id, member_data.email)
+        if self.library.add_member(member):
+            return {"success": True, "message": "Üye eklendi", "member": self._member_to_dict(member)}
+        return {"success": False, "message": self.library.last_error}
+
+    # Üye bilgileri, üye yoksa None
+    def get_member(self, member_id: str) -> Optional[Dict[str, Any]]:
+        member = self.library.find_member(member_id)
+        return self._member_to_dict(member) if member else None
+
+    # Üye silme; üyede ödünç kitap ya da bekleyen ayırtma varsa silinmez
+    def remove_member(self, member_id: str) -> Dict[str, Any]:
+        if self.library.remove_member(member_id):
+            return {"success": True, "message": "Üye silindi"}
+        return {"success": False, "message": self.library.last_error}
+
+    # Üyenin ödünçleri (iade tarihi sırasıyla), üye yoksa None
+    def get_member_loans(self, member_id: str) -> Optional[List[Dict[str, Any]]]:
+        if not self.library.find_member(member_id):
+            return None
+        return [project_loan(loan) for loan in self.library.member_loans(member_id)]
+
+    # Üyenin ayırtmaları ve sıradaki yerleri, üye yoksa None
+    def get_member_holds(self, member_id: str) -> Optional[List[Dict[str, Any]]]:
+        if not self.library.find_member(member_id):
+            return None
+        return [project_hold(hold, self.library.hold_position(hold.isbn, member_id))
+                for hold in self.library.member_holds(member_id)]
+
+    # Ayırtma: ödünçteki kitap için sıraya girilir, kitap iade edilince sıradaki üyeye ödünç verilir
+    def place_hold(self, isbn: str, member_id: str) -> Dict[str, Any]:
+        if self.library.place_hold(isbn, member_id):
+            return {"success": True, "message": "Ayırtma alındı",
+                    "position": self.library.hold_position(isbn, member_id)}
+        return {"success": False, "message": self.library.last_error}
+
+    def cancel_hold(self, isbn: str, member_id: str) -> Dict[str, Any]:
+        if self.library.cancel_hold(isbn, member_id):
+            return {"success": True, "message": "Ayırtma iptal edildi"}
+        return {"success": False, "message": self.library.last_error}
+
+    # Kitabın ayırtma sırası (sıradaki üye ilk), kitap yoksa None
+    def get_holds(self, isbn: str) -> Optional[List[Dict[str, Any]]]:
+        if not self.library.find_book_by_isbn(isbn):
+            return None
+        return [project_hold(hold, position) for position, hold in enumerate(self.library.hold_queue(isbn), 1)]
+
+    # Üyenin kitabın sırasındaki yeri, ayırtması yoksa None
+    def get_hold(self, isbn: str, member_id: str) -> Optional[Dict[str, Any]]:
+        for position, hold in enumerate(self.library.hold_queue(isbn), 1):
+            if hold.member_id == member_id:
+                return project_hold(hold, position)
+        return None
+
+    # Gecikmiş ödünçler; iade tarihi zamanlayıcısından okunur
+    def get_overdue_loans(self, limit: int = 100) -> List[Dict[str, Any]]:
+        now = time.time()
+        return [{**project_loan(loan), "days_overdue": int((now - loan.due_at) // 86400)}
+                for loan in self.library.overdue_loans(limit, now)]
+
+    # Kitabın tüm nüshalarının aktif ödünçleri, iade tarihi sırasıyla
+    def get_book_loans(self, isbn: str) -> List[Dict[str, Any]]:
+        return [project_loan(loan) for loan in self.library.title_loans(isbn)]
+
+    # [start, end) aralığındaki olaylar (Unix zamanı); zamanlar ISO 8601 (UTC) biçiminde döndürülür
+    def get_events(self, start: Optional[float] = None, end: Optional[float] = None, isbn: Optional[str] = None,
+                   limit: int = 100) -> List[Dict[str, Any]]:
+        return [project_event(event) for event in self.library.event_log.query(start, end, isbn, limit)]
+
+    # Aralıktaki tüm olaylar, okundukça (dışa aktarma)
+    def iter_events(self, start: Optional[float] = None, end: Optional[float] = None,
+                    isbn: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        return map(project_event, self.library.event_log.iter_events(start, end, isbn))
+
     # Kütüphane istatistikleri
     def get_stats(self) -> Dict[str, Any]:
-        total = self.library.total_books
-        borrowed = sum(1 for book in self.library._books if book.is_borrowed)
-        return {
-            "kütüphane": self.library.name,
-            "toplam_kitap": total,
-            "mevcut_kitap": total - borrowed,
-            "ödünç_kitap": borrowed
-        }
+        return self.library.stats()
+
+    # En çok kitabı bulunan yazarlar
+    def get_author_stats(self, limit: int = 10) -> List[Dict[str, Any]]:
+        return [{"yazar": author, "kitap_sayısı": count} for author, count in self.library.top_authors(limit)]
     
+    # OpenLibrary önbellek istatistikleri
+    def get_cache_stats(self) -> Dict[str, Any]:
+        return self.library.metadata_cache.stats()
+
     # Yardımcı metotlar
     def _book_to_dict(self, book: Book, publication_year: Optional[int] = None) -> Dict[str, Any]:
         return {
@@ -201,6 +460,24 @@ class WebManager:
             "borrowed": book.is_borrowed
         }
     
+    def _member_to_dict(self, member: Member) -> Dict[str, Any]:
+        return {"member_id": member.member_id, "name": member.name, "email": member.email}
+
+    # counts nüshası kaydedilmiş kitabın (nüsha sayısı, boştaki nüsha sayısı); yoksa kitap tek nüshadır
+    def _project(self, book: Book, fields: tuple, counts: Optional[tuple] = None) -> Dict[str, Any]:
+        values = self._book_to_dict(book)
+        values["type"] = type(book).__name__
+        values["copies"], values["available"] = counts or (1, 0 if book.is_borrowed else 1)
+        return {name: values[name] for name in fields}
+
+    # Nüsha alanları istendiyse sayılar her 500 kitap için tek seferde okunur
+    def _project_books(self, books, fields: tuple) -> Iterator[Dict[str, Any]]:
+        books = iter(books)
+        while chunk := list(islice(books, 500)):
+            counts = self.library.copy_counts([book.isbn for book in chunk]) if COPY_FIELDS.intersection(fields) else {}
+            for book in chunk:
+                yield self._project(book, fields, counts.get(book.isbn))
+
     def _format_validation_errors(self, error: ValidationError) -> List[Dict[str, Any]]:
         formatted_errors = []
         for err in error.errors():